@@ -277,6 +277,19 @@ OSMAXX_CONVERSION_SERVICE = {
     'PBF_PLANET_FILE_PATH': env.str(
         'OSMAXX_CONVERSION_SERVICE_PBF_PLANET_FILE_PATH',
         default='/var/data/osm-planet/pbf/planet-latest.osm.pbf'),
+    'PRE_EXTRACT_DIRECTORY': env.str(
+        'OSMAXX_CONVERSION_SERVICE_PRE_EXTRACT_DIRECTORY',
+        default='/var/data/osm-planet/pre-extracts'),
+    'PBF_CACHE_DIRECTORY': env.str(
+        'OSMAXX_CONVERSION_SERVICE_PBF_CACHE_DIRECTORY',
+        default='/var/data/osm-planet/pbf-cache'),
+    'PBF_CACHE_MAX_SIZE_IN_BYTES': env.int(
+        'OSMAXX_CONVERSION_SERVICE_PBF_CACHE_MAX_SIZE_IN_BYTES',
+        default=50 * 1024 ** 3),
+    'PLANET_PASS_COALESCING_WINDOW': timedelta(seconds=env.int(
+        'OSMAXX_CONVERSION_SERVICE_PLANET_PASS_COALESCING_WINDOW_SECONDS',
+        default=30)),
+    'WORKER_CONCURRENCY': env.int('WORKER_CONCURRENCY', default=1),
     'RESULT_TTL': env.str('OSMAXX_CONVERSION_SERVICE_RESULT_TTL', default=-1),  # never expire!
 }
 
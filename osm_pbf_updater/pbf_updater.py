@@ -14,6 +14,11 @@ BASE_DIR = '/var/data/osm-planet'
 PBF_DIR = os.path.join(BASE_DIR, 'pbf')
 PLANET_LATEST = os.path.join(PBF_DIR, 'planet-latest.osm.pbf')
 PLANET_LATEST_ON_UPDATE = os.path.join(PBF_DIR, 'new_planet-latest.osm.pbf')
+# the changes applied by each update are kept in here if enabled, for the osmaxx global database to apply them as well
+CHANGES_DIR = os.path.join(BASE_DIR, 'changes')
+CHANGE_FILE_ON_UPDATE = os.path.join(CHANGES_DIR, 'new_changes.osc.gz')
+# holds the name of the newest kept change file whose changes PLANET_LATEST contains
+LAST_CHANGE_FILE_MARKER = PLANET_LATEST + '.last_change_file'
 NICE = ["nice", "-n", "19"]
 OSM_PLANET_PATH_RELATIVE_TO_MIRROR = os.environ.get(
     'osm_planet_path_relative_to_mirror', '/pbf/planet-latest.osm.pbf'
@@ -33,10 +38,46 @@ def full_download(complete_planet_mirror_url):
     download_command = ["wget", "--continue", "-O", download_pbf_path, complete_planet_mirror_url]
     subprocess.check_call(NICE + download_command)
     shutil.move(download_pbf_path, PLANET_LATEST)
+    # the next update covers the changes since the downloaded planet, the kept change files aren't needed anymore
+    if os.path.isdir(CHANGES_DIR):
+        change_file_names = sorted(
+            name for name in os.listdir(CHANGES_DIR)
+            if name.endswith('.osc.gz') and name != os.path.basename(CHANGE_FILE_ON_UPDATE)
+        )
+        if change_file_names:
+            _mark_last_change_file(change_file_names[-1])
+
+
+def update(osmupdate_extra_params, *, keep_change_files=False):
+    if not _osmupdate(osmupdate_extra_params, PLANET_LATEST_ON_UPDATE):
+        return
+    change_file_name = None
+    if keep_change_files:
+        # made from the outdated planet after updating it, so the change file covers at least the same period
+        os.makedirs(CHANGES_DIR, exist_ok=True)
+        if _osmupdate(osmupdate_extra_params, CHANGE_FILE_ON_UPDATE):
+            change_file_name = '{:%Y%m%dT%H%M%SZ}.osc.gz'.format(datetime.datetime.utcnow())
+            shutil.move(CHANGE_FILE_ON_UPDATE, os.path.join(CHANGES_DIR, change_file_name))
+    shutil.move(PLANET_LATEST_ON_UPDATE, PLANET_LATEST)
+    if change_file_name is not None:
+        # only marked once the planet contains the changes, the file's modification time can't tell as moving keeps it
+        _mark_last_change_file(change_file_name)
+
+
+def _mark_last_change_file(change_file_name):
+    marker_on_update = LAST_CHANGE_FILE_MARKER + '_tmp'
+    with open(marker_on_update, 'w') as marker:
+        marker.write(change_file_name)
+    os.replace(marker_on_update, LAST_CHANGE_FILE_MARKER)
 
 
-def update(osmupdate_extra_params):
-    update_comand = ["osmupdate", "-v"] + osmupdate_extra_params.split() + [PLANET_LATEST, PLANET_LATEST_ON_UPDATE]
+def _osmupdate(osmupdate_extra_params, out_file_path):
+    """
+    Writes the planet updated to the latest changes or, for a .osc.gz out file, these changes to out_file_path.
+
+    Returns: False if there are no changes to apply
+    """
+    update_comand = ["osmupdate", "-v"] + osmupdate_extra_params.split() + [PLANET_LATEST, out_file_path]
     try:
         subprocess.check_call(NICE + update_comand)
     except subprocess.CalledProcessError as e:
@@ -53,17 +94,17 @@ def update(osmupdate_extra_params):
         #         PINFO("Your OSM file is already up-to-date.")
         # return 21;
         if e.returncode == 21:
-            return
+            return False
         else:
             raise
-    shutil.move(PLANET_LATEST_ON_UPDATE, PLANET_LATEST)
+    return True
 
 
 def _is_night_time(now):
     return now.hour < 4 or now.hour > 22
 
 
-def run(*, sleep_seconds=10, osmupdate_extra_params):
+def run(*, sleep_seconds=10, osmupdate_extra_params, keep_change_files=False):
     last_full_download_time = datetime.datetime.min
     while True:
         now = datetime.datetime.now()
@@ -72,7 +113,7 @@ def run(*, sleep_seconds=10, osmupdate_extra_params):
             full_download(planet_url())
             last_full_download_time = datetime.datetime.now()
         # start updating immediately
-        update(osmupdate_extra_params)
+        update(osmupdate_extra_params, keep_change_files=keep_change_files)
         print("update done, sleeping for {} seconds".format(sleep_seconds))
         # wait for this seconds
         time.sleep(sleep_seconds)
@@ -94,12 +135,17 @@ if __name__ == '__main__':
     args = parser.parse_args()
     sleep_seconds = args.wait_seconds
     update_extra_params = os.environ.get('osmupdate_extra_params', '')
+    keep_change_files = os.environ.get('osm_keep_change_files', '').lower() in ('1', 'true', 'yes')
 
     sentry_dsn = os.environ.get('SENTRY_DSN', None)
     if sentry_dsn is not None:
         sentry_sdk.init(sentry_dsn)
         run_with_sentry(
-            run, sleep_seconds=sleep_seconds, osmupdate_extra_params=update_extra_params
+            run, sleep_seconds=sleep_seconds, osmupdate_extra_params=update_extra_params,
+            keep_change_files=keep_change_files,
         )
     else:
-        run(sleep_seconds=sleep_seconds, osmupdate_extra_params=update_extra_params)
+        run(
+            sleep_seconds=sleep_seconds, osmupdate_extra_params=update_extra_params,
+            keep_change_files=keep_change_files,
+        )
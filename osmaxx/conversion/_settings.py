@@ -5,6 +5,38 @@ from django.conf import settings
 CONVERSION_SETTINGS = {
     'result_harvest_interval_seconds': timedelta(minutes=1).total_seconds(),
     'PBF_PLANET_FILE_PATH': '/var/data/osm-planet/pbf/planet-latest.osm.pbf',
+    'PRE_EXTRACT_DIRECTORY': '/var/data/osm-planet/pre-extracts',
+    'PRE_EXTRACT_MAX_AGE': timedelta(days=2),  # older pre-extracts are ignored, the planet is used instead
+    'PRE_EXTRACT_REBUILD_INTERVAL': timedelta(days=1),
+    'PBF_CACHE_DIRECTORY': None,  # caching of cut PBF files is disabled unless set
+    'PBF_CACHE_MAX_SIZE_IN_BYTES': 50 * 1024 ** 3,
+    # cuts from snapshots of the same source file written within this period are considered interchangeable
+    'PBF_CACHE_SNAPSHOT_GRANULARITY': timedelta(hours=1),
+    # planet cuts of queued conversions are coalesced into one pass if set (requires PBF_CACHE_DIRECTORY)
+    'PLANET_PASS_COALESCING_WINDOW': None,
+    'PLANET_PASS_MAX_EXTRACTS': 50,
+    'PLANET_PASS_PENDING_CUT_TTL': timedelta(hours=6),  # pending cuts registered earlier are forgotten
+    # more complex clipping areas are replaced by a simpler area including them before cutting
+    'CUTTING_AREA_MAX_VERTICES': 500,
+    'CLIPPED_BOUNDARIES_CACHE_DIRECTORY': None,  # caching of clipped coastline, land and sea is disabled unless set
+    'CLIPPED_BOUNDARIES_CACHE_MAX_SIZE_IN_BYTES': 10 * 1024 ** 3,
+    'PROGRESS_REPORT_INTERVAL': timedelta(seconds=15),  # how often running conversions publish their progress
+    'PROGRESS_STALL_WARNING_AGE': timedelta(minutes=30),  # conversions not advancing for this long are reported
+    'FILTER_STAGE_PARALLELISM': None,  # number of filter SQL folders run concurrently, defaults to the CPU count
+    'EXPORT_PARALLELISM': None,  # number of layers exported concurrently, defaults to the CPU count
+    'EXPORT_SPATIALLY_SORTED': False,  # whether features are written in geohash order of their centroids
+    'ARCHIVE_COMPRESSION_LEVEL': 6,  # zlib level of zipped results, from 1 (fastest) to 9 (smallest)
+    'OSM2PGSQL_MEMORY_SHARE': 0.75,  # share of the available memory osm2pgsql's node caches may take altogether
+    # number of conversions run concurrently on one host, which divide its memory and CPUs among their imports
+    'WORKER_CONCURRENCY': 1,
+    # full detail conversions are clipped from this long-lived, pre-filtered planet database if set
+    'GLOBAL_DATABASE_NAME': None,
+    'GLOBAL_DATABASE_FLAT_NODES_FILE_PATH': '/var/data/osm-planet/global-database/flat_nodes.bin',
+    'GLOBAL_DATABASE_CHANGE_FILE_DIRECTORY': '/var/data/osm-planet/changes',  # where osm_pbf_updater keeps them
+    'GLOBAL_DATABASE_UPDATE_INTERVAL': timedelta(minutes=10),
+    # the layers are rebuilt from the whole planet at most this often, they lag behind the applied changes up to this
+    'GLOBAL_DATABASE_PUBLISH_INTERVAL': timedelta(days=1),
+    'WORKSPACE_BASE_DIRECTORY': None,  # per-conversion scratch directories are created in here, defaults to tmp
     'SEA_AND_BOUNDS_ZIP_DIRECTORY': '/var/data/garmin/additional_data/',
     'RESULT_TTL': -1,  # never expire!
 }
@@ -17,6 +49,7 @@ CONVERSION_SETTINGS.update({
     'GIS_CONVERSION_DB_NAME': 'osmaxx_db',
     'GIS_CONVERSION_DB_USER': 'postgres',
     'GIS_CONVERSION_DB_PASSWORD': 'postgres',
+    'TRANSLITERATION_CACHE_DB_NAME': 'osmaxx_transliteration_cache',
 })
 
 copying_notice = os.path.join(os.path.dirname(__file__), 'converters', 'licenses', 'COPYING')
@@ -4,6 +4,7 @@ from collections import OrderedDict, namedtuple
 from django.utils.translation import gettext_lazy as _
 
 FGDB, SHAPEFILE, GPKG, SPATIALITE, GARMIN, PBF = 'fgdb', 'shapefile', 'gpkg', 'spatialite', 'garmin', 'pbf'
+FLATGEOBUF, GEOPARQUET = 'flatgeobuf', 'geoparquet'
 
 
 _OutputFormatBase = namedtuple(
@@ -69,6 +70,22 @@ DEFINITIONS = OrderedDict([
         abbreviations=[],
         is_white_box=True,
     )),
+    (FLATGEOBUF, OutputFormat(
+        long_identifier='FlatGeobuf',
+        verbose_name=_('FlatGeobuf'),
+        archive_file_name_identifier='FlatGeobuf',
+        abbreviations=['FGB'],
+        is_white_box=True,
+        layer_filename_extension='.fgb',
+    )),
+    (GEOPARQUET, OutputFormat(
+        long_identifier='GeoParquet',
+        verbose_name=_('GeoParquet'),
+        archive_file_name_identifier='GeoParquet',
+        abbreviations=[],
+        is_white_box=True,
+        layer_filename_extension='.parquet',
+    )),
     (GARMIN, OutputFormat(
         long_identifier='Garmin navigation & map data',
         verbose_name=_('Garmin navigation & map data'),
@@ -0,0 +1,249 @@
+"""
+Writes zip archives, compressing their members on several cores.
+
+Members are compressed concurrently while the archive is being written, but end up in the archive in the order they
+have been added. Members in formats compressing their content themselves are stored as they are, members of other
+archives are copied without being compressed again.
+"""
+import os
+import struct
+import tempfile
+import time
+import zipfile
+import zlib
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+
+STORED_EXTENSIONS = frozenset(['.pbf', '.img', '.zip', '.gz', '.bz2', '.png', '.jpg', '.jpeg', '.parquet'])
+# compressed members larger than this wait for being written in a temporary file instead of in memory
+SPOOL_MAX_SIZE = 16 * 1024 ** 2
+COPY_BUFFER_SIZE = 1024 ** 2
+
+_ZIP_STORED, _ZIP_DEFLATED = 0, 8
+_ZIP64_LIMIT = 0xFFFFFFFF  # sizes and offsets from here on are stored in zip64 extra fields
+_ZIP_FILECOUNT_LIMIT = 0xFFFF
+_UTF8_FLAG = 0x0800
+_VERSION_MADE_BY = (3 << 8) | 45  # Unix, zip specification 4.5
+_LOCAL_FILE_HEADER = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL_DIRECTORY_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END_OF_CENTRAL_DIRECTORY = struct.Struct('<IHHHHIIH')
+_ZIP64_END_OF_CENTRAL_DIRECTORY = struct.Struct('<IQHHIIQQQQ')
+_ZIP64_END_OF_CENTRAL_DIRECTORY_LOCATOR = struct.Struct('<IIQI')
+
+_Member = namedtuple(
+    '_Member', ['arcname', 'method', 'crc', 'compressed_size', 'file_size', 'date_time', 'mode', 'write_data']
+)
+
+
+class ArchiveWriter:
+    """
+    Writes a zip archive of files added from anywhere, without changing the working directory.
+
+    Usage:
+
+        with ArchiveWriter(zip_file_path) as archive:
+            archive.add_directory(data_dir, arcname='data')
+            archive.add_file(license_path, arcname='static/LICENSE.txt')
+
+    Args:
+        zip_file_path: where to write the archive to
+        compression_level: the zlib compression level of compressed members, from 1 (fastest) to 9 (smallest);
+            defaults to ``ARCHIVE_COMPRESSION_LEVEL``
+        max_workers: the number of members compressed at the same time, defaults to the CPU count
+    """
+
+    def __init__(self, zip_file_path, *, compression_level=None, max_workers=None):
+        if compression_level is None:
+            compression_level = CONVERSION_SETTINGS['ARCHIVE_COMPRESSION_LEVEL']
+        self._compression_level = compression_level
+        self._zip_file_path = zip_file_path
+        self._file = open(zip_file_path, 'wb')
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count())
+        self._pending_members = deque()
+        self._central_directory = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._abort()
+
+    def add_file(self, path, arcname):
+        """
+        Adds the file at ``path`` as member ``arcname``.
+        """
+        arcname = arcname.replace(os.sep, '/')
+        if os.path.splitext(path)[1].lower() in STORED_EXTENSIONS:
+            future = self._executor.submit(_stored, path, arcname)
+        else:
+            future = self._executor.submit(_deflated, path, arcname, self._compression_level)
+        self._pending_members.append(future)
+        self._write_finished_members()
+
+    def add_directory(self, directory, arcname=''):
+        """
+        Adds the files within ``directory`` and its subdirectories, with their paths relative to ``directory`` below
+        ``arcname``. Empty directories are left out.
+        """
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for file_name in sorted(files):
+                path = os.path.join(root, file_name)
+                self.add_file(path, arcname=os.path.join(arcname, os.path.relpath(path, directory)))
+
+    def add_members_of(self, zip_file_path):
+        """
+        Adds the members of the archive at ``zip_file_path`` as they are, copying their compressed data instead of
+        compressing it again.
+        """
+        with zipfile.ZipFile(zip_file_path) as fragment:
+            infos = fragment.infolist()
+        for info in infos:
+            self._pending_members.append(self._executor.submit(_copied, zip_file_path, info))
+        self._write_finished_members()
+
+    def close(self):
+        """
+        Writes the members still being compressed and completes the archive.
+        """
+        try:
+            while self._pending_members:
+                self._write_member(self._pending_members.popleft().result())
+            self._write_central_directory()
+        except BaseException:
+            self._abort()
+            raise
+        self._executor.shutdown()
+        self._file.close()
+
+    def _write_finished_members(self):
+        while self._pending_members and self._pending_members[0].done():
+            self._write_member(self._pending_members.popleft().result())
+
+    def _write_member(self, member):
+        offset = self._file.tell()
+        name = member.arcname.encode('utf-8')
+        dos_time, dos_date = _dos_date_time(member.date_time)
+        zip64 = member.file_size >= _ZIP64_LIMIT or member.compressed_size >= _ZIP64_LIMIT
+        extra = struct.pack('<HHQQ', 1, 16, member.file_size, member.compressed_size) if zip64 else b''
+        self._file.write(_LOCAL_FILE_HEADER.pack(
+            0x04034b50, 45 if zip64 else 20, _UTF8_FLAG, member.method, dos_time, dos_date, member.crc,
+            _ZIP64_LIMIT if zip64 else member.compressed_size, _ZIP64_LIMIT if zip64 else member.file_size,
+            len(name), len(extra),
+        ))
+        self._file.write(name)
+        self._file.write(extra)
+        member.write_data(self._file)
+        self._central_directory.append((member, offset))
+
+    def _write_central_directory(self):
+        start = self._file.tell()
+        for member, offset in self._central_directory:
+            name = member.arcname.encode('utf-8')
+            dos_time, dos_date = _dos_date_time(member.date_time)
+            zip64_values = [
+                value for value in [member.file_size, member.compressed_size, offset] if value >= _ZIP64_LIMIT
+            ]
+            extra = struct.pack('<HH{}Q'.format(len(zip64_values)), 1, 8 * len(zip64_values), *zip64_values) \
+                if zip64_values else b''
+            self._file.write(_CENTRAL_DIRECTORY_HEADER.pack(
+                0x02014b50, _VERSION_MADE_BY, 45 if zip64_values else 20, _UTF8_FLAG, member.method, dos_time,
+                dos_date, member.crc, min(member.compressed_size, _ZIP64_LIMIT), min(member.file_size, _ZIP64_LIMIT),
+                len(name), len(extra), 0, 0, 0, (member.mode & 0xFFFF) << 16, min(offset, _ZIP64_LIMIT),
+            ))
+            self._file.write(name)
+            self._file.write(extra)
+        end = self._file.tell()
+        count, size = len(self._central_directory), end - start
+        if count >= _ZIP_FILECOUNT_LIMIT or start >= _ZIP64_LIMIT or size >= _ZIP64_LIMIT:
+            self._file.write(_ZIP64_END_OF_CENTRAL_DIRECTORY.pack(
+                0x06064b50, _ZIP64_END_OF_CENTRAL_DIRECTORY.size - 12, _VERSION_MADE_BY, 45, 0, 0, count, count,
+                size, start,
+            ))
+            self._file.write(_ZIP64_END_OF_CENTRAL_DIRECTORY_LOCATOR.pack(0x07064b50, 0, end, 1))
+        self._file.write(_END_OF_CENTRAL_DIRECTORY.pack(
+            0x06054b50, 0, 0, min(count, _ZIP_FILECOUNT_LIMIT), min(count, _ZIP_FILECOUNT_LIMIT),
+            min(size, _ZIP64_LIMIT), min(start, _ZIP64_LIMIT), 0,
+        ))
+
+    def _abort(self):
+        for future in self._pending_members:
+            future.cancel()
+        self._executor.shutdown()
+        self._file.close()
+        os.remove(self._zip_file_path)
+
+
+def _stored(path, arcname):
+    crc, size = 0, 0
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(COPY_BUFFER_SIZE), b''):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+
+    def write_data(target):
+        with open(path, 'rb') as source:
+            _copy(source, target, size)
+    return _Member(arcname, _ZIP_STORED, crc, size, size, *_date_time_and_mode(path), write_data)
+
+
+def _deflated(path, arcname, compression_level):
+    compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    crc, size = 0, 0
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(COPY_BUFFER_SIZE), b''):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            compressed.write(compressor.compress(chunk))
+    compressed.write(compressor.flush())
+    compressed_size = compressed.tell()
+
+    def write_data(target):
+        with compressed:
+            compressed.seek(0)
+            _copy(compressed, target, compressed_size)
+    return _Member(arcname, _ZIP_DEFLATED, crc, compressed_size, size, *_date_time_and_mode(path), write_data)
+
+
+def _copied(zip_file_path, info):
+    with open(zip_file_path, 'rb') as fragment:
+        fragment.seek(info.header_offset)
+        local_file_header = _LOCAL_FILE_HEADER.unpack(fragment.read(_LOCAL_FILE_HEADER.size))
+    name_length, extra_length = local_file_header[-2:]
+    data_offset = info.header_offset + _LOCAL_FILE_HEADER.size + name_length + extra_length
+
+    def write_data(target):
+        with open(zip_file_path, 'rb') as fragment:
+            fragment.seek(data_offset)
+            _copy(fragment, target, info.compress_size)
+    return _Member(
+        info.filename, info.compress_type, info.CRC, info.compress_size, info.file_size, info.date_time,
+        info.external_attr >> 16, write_data,
+    )
+
+
+def _copy(source, target, size):
+    while size > 0:
+        chunk = source.read(min(COPY_BUFFER_SIZE, size))
+        if not chunk:
+            raise IOError('{} ended {} bytes early'.format(source.name, size))
+        target.write(chunk)
+        size -= len(chunk)
+
+
+def _date_time_and_mode(path):
+    stat = os.stat(path)
+    return time.localtime(stat.st_mtime)[:6], stat.st_mode
+
+
+def _dos_date_time(date_time):
+    year, month, day, hour, minute, second = date_time
+    if year < 1980:  # the earliest date zip archives can hold
+        year, month, day, hour, minute, second = 1980, 1, 1, 0, 0, 0
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
@@ -2,6 +2,7 @@ from osmaxx.conversion import output_format
 from osmaxx.conversion.converters import converter_garmin
 from osmaxx.conversion.converters import converter_gis
 from osmaxx.conversion.converters import converter_pbf
+from osmaxx.conversion.converters.converter_pbf import planet_pass
 from osmaxx.conversion.job_dispatcher.rq_dispatcher import rq_enqueue_with_settings
 from osmaxx.utils.frozendict import frozendict
 
@@ -13,13 +14,20 @@ _format_converter = frozendict(
         output_format.SHAPEFILE: converter_gis,
         output_format.GPKG: converter_gis,
         output_format.SPATIALITE: converter_gis,
+        output_format.FLATGEOBUF: converter_gis,
+        output_format.GEOPARQUET: converter_gis,
     }
 )
 
+# the formats exported from the same database, see ``convert_group``
+GROUPABLE_FORMATS = frozenset(
+    conversion_format for conversion_format, converter in _format_converter.items() if converter is converter_gis
+)
+
 
 def convert(
         *, conversion_format, area_name, osmosis_polygon_file_string, output_zip_file_path, filename_prefix,
-        out_srs, detail_level, use_worker=False, queue_name='default'
+        out_srs, detail_level, layers=None, use_worker=False, queue_name='default'
 ):
     params = dict(
         conversion_format=conversion_format,
@@ -28,11 +36,13 @@ def convert(
         output_zip_file_path=output_zip_file_path,
         filename_prefix=filename_prefix,
         detail_level=detail_level,
+        layers=layers,
         out_srs=out_srs,
     )
 
     # TODO: find a cleaner way for this recursion magic!
     if use_worker:
+        planet_pass.register_pending_cut(osmosis_polygon_file_string)
         return rq_enqueue_with_settings(
             convert,
             use_worker=False,
@@ -42,3 +52,40 @@ def convert(
     converter = _format_converter[conversion_format]
     converter.perform_export(**params)
     return None
+
+
+def convert_group(
+        *, exports, area_name, osmosis_polygon_file_string, detail_level, layers=None, use_worker=False,
+        queue_name='default'
+):
+    """
+    Converts an area into several GIS formats and spatial reference systems, importing and filtering its data once.
+
+    Args:
+        exports: for each export, a dict holding its ``conversion_format``, ``output_zip_file_path``,
+            ``filename_prefix`` and ``out_srs``, and optionally further keys identifying it, e.g. a ``job_id``
+
+    Returns:
+        the id of the rq job if ``use_worker`` is set, else ``None``
+    """
+    unsupported_formats = {export['conversion_format'] for export in exports} - set(GROUPABLE_FORMATS)
+    if unsupported_formats:
+        raise ValueError('formats {} cannot be converted in groups'.format(sorted(unsupported_formats)))
+    params = dict(
+        exports=exports,
+        area_name=area_name,
+        osmosis_polygon_file_string=osmosis_polygon_file_string,
+        detail_level=detail_level,
+        layers=layers,
+    )
+
+    if use_worker:
+        planet_pass.register_pending_cut(osmosis_polygon_file_string)
+        return rq_enqueue_with_settings(
+            convert_group,
+            use_worker=False,
+            queue_name=queue_name,
+            **params
+        ).id
+    converter_gis.perform_group_export(**params)
+    return None
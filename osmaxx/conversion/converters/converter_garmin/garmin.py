@@ -1,14 +1,15 @@
-import shutil
-
 import os
 import tempfile
 from django.utils import timezone
 from rq import get_current_job
 
 from osmaxx.conversion._settings import CONVERSION_SETTINGS, odb_license, copying_notice, creative_commons_license
+from osmaxx.conversion.converters.archive import ArchiveWriter
 from osmaxx.conversion.converters.converter_pbf.to_pbf import cut_pbf_along_polyfile
-
-from osmaxx.conversion.converters.utils import zip_folders_relative, recursive_getsize, logged_check_call
+from osmaxx.conversion.converters.job_statistics import record_worker_environment, timed
+from osmaxx.conversion.converters.progress import check_call_reporting_progress
+from osmaxx.conversion.converters.utils import recursive_getsize
+from osmaxx.conversion.converters.workspace import Workspace
 
 
 def perform_export(*, output_zip_file_path, area_name, osmosis_polygon_file_string, **__):
@@ -40,6 +41,7 @@ class Garmin:
 
     def create_garmin_export(self):
         self._start_time = timezone.now()
+        record_worker_environment(tools=['osmconvert', 'osmium', 'splitter', 'mkgmap'])
         self._to_garmin()
         self._osmosis_polygon_file.close()
         job = get_current_job()
@@ -49,38 +51,37 @@ class Garmin:
             job.save()
 
     def _to_garmin(self):
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            tmp_out_dir = os.path.join(tmp_dir, 'garmin')
-            config_file_path = self._split(tmp_dir)
-            self._produce_garmin(config_file_path, tmp_out_dir)
-            self._create_zip(tmp_out_dir)
+        with Workspace() as workspace:
+            tmp_out_dir = workspace.path('garmin')
+            config_file_path = self._split(workspace.directory)
+            with timed('render'):
+                self._produce_garmin(config_file_path, tmp_out_dir)
+            with timed('zip'):
+                self._create_zip(tmp_out_dir)
 
     def _split(self, workdir):
         memory_option = '-Xmx7000m'
         _splitter_path = os.path.abspath(os.path.join(_path_to_commandline_utils, 'splitter', 'splitter.jar'))
-        _pbf_file_path = os.path.join('/tmp', 'pbf_cutted.pbf')
-        cut_pbf_along_polyfile(self._area_polyfile_string, _pbf_file_path)
-        logged_check_call([
-            'java',
-            memory_option,
-            '-jar', _splitter_path,
-            '--output-dir={0}'.format(workdir),
-            '--description={0}'.format(self._map_description),
-            '--geonames-file={0}'.format(_path_to_geonames_zip),
-            '--polygon-file={}'.format(self._polyfile_path),
-            _pbf_file_path,
-        ])
+        _pbf_file_path = os.path.join(workdir, 'pbf_cutted.pbf')
+        with timed('cut'):
+            cut_pbf_along_polyfile(self._area_polyfile_string, _pbf_file_path)
+        with timed('split'):
+            check_call_reporting_progress([
+                'java',
+                memory_option,
+                '-jar', _splitter_path,
+                '--output-dir={0}'.format(workdir),
+                '--description={0}'.format(self._map_description),
+                '--geonames-file={0}'.format(_path_to_geonames_zip),
+                '--polygon-file={}'.format(self._polyfile_path),
+                _pbf_file_path,
+            ], stage='split', input_file_path=_pbf_file_path)
         config_file_path = os.path.join(workdir, 'template.args')
         return config_file_path
 
     def _produce_garmin(self, config_file_path, out_dir):
-        out_dir = os.path.join(out_dir, 'garmin')  # hack to get a subdirectory in the zipfile.
         os.makedirs(out_dir, exist_ok=True)
 
-        shutil.copy(copying_notice, out_dir)
-        shutil.copy(odb_license, out_dir)
-        shutil.copy(creative_commons_license, out_dir)
-
         _mkgmap_path = os.path.abspath(os.path.join(_path_to_commandline_utils, 'mkgmap', 'mkgmap.jar'))
         mkg_map_command = ['java', '-jar', _mkgmap_path]
         output_dir = ['--output-dir={0}'.format(out_dir)]
@@ -92,8 +93,11 @@ class Garmin:
             '--route',
         ]
 
-        logged_check_call(mkg_map_command + output_dir + config)
+        check_call_reporting_progress(mkg_map_command + output_dir + config, stage='render')
         self._unzipped_result_size = recursive_getsize(out_dir)
 
     def _create_zip(self, data_dir):
-        zip_folders_relative([data_dir], self._resulting_zip_file_path)
+        with ArchiveWriter(self._resulting_zip_file_path) as archive:
+            archive.add_directory(data_dir, arcname='garmin')
+            for license_file in [copying_notice, odb_license, creative_commons_license]:
+                archive.add_file(license_file, arcname=os.path.join('garmin', os.path.basename(license_file)))
@@ -1,3 +1,3 @@
-from .gis import perform_export
+from .gis import perform_export, perform_group_export
 
-__all__ = ['perform_export']
+__all__ = ['perform_export', 'perform_group_export']
@@ -1,3 +1,4 @@
 from .bootstrap import BootStrapper
+from .global_database import GlobalDatabase
 
-__all__ = ['BootStrapper']
+__all__ = ['BootStrapper', 'GlobalDatabase']
@@ -1,99 +1,264 @@
 import glob
 import os
+import tempfile
+import time
 
 from memoize import mproperty
+from rq import get_current_job
 
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_gis.bootstrap.import_profile import plan_import
+from osmaxx.conversion.converters.converter_gis.bootstrap.task_graph import run_task_graph
+from osmaxx.conversion.converters.converter_gis.bootstrap.template_database import TemplateDatabase
+from osmaxx.conversion.converters.converter_gis.bootstrap.transliteration_cache import TransliterationCache
 from osmaxx.conversion.converters.converter_gis.detail_levels import DETAIL_LEVEL_ALL, DETAIL_LEVEL_TABLES
 from osmaxx.conversion.converters.converter_gis.helper.default_postgres import get_default_postgres_wrapper
-from osmaxx.conversion.converters.converter_gis.helper.osm_boundaries_importer import OSMBoundariesImporter
+from osmaxx.conversion.converters.converter_gis.helper.osm_boundaries_importer import OSMBoundariesImporter, \
+    OSM_BOUNDARIES_TABLES
 from osmaxx.conversion.converters.converter_pbf.to_pbf import cut_pbf_along_polyfile
-from osmaxx.conversion.converters.utils import logged_check_call
+from osmaxx.conversion.converters.job_statistics import record_stage_duration, timed
+from osmaxx.conversion.converters.progress import check_call_reporting_progress, heartbeat, \
+    parse_osm2pgsql_output, report_progress
 from osmaxx.utils import polyfile_helpers
 
 
 class BootStrapper:
-    def __init__(self, area_polyfile_string, *, detail_level=DETAIL_LEVEL_ALL):
+    EXTENSIONS = ['hstore', 'postgis', 'unaccent', 'fuzzystrmatch', 'osml10n']
+    # These scripts process the imported data and thus can't be part of the template database. They are run only if
+    # one of the filter folders listed for them is.
+    DATA_DEPENDENT_FUNCTION_SCRIPTS = {'0040_interpolate_addresses.sql': ['address']}
+    FILTER_SQL_SCRIPT_FOLDERS = [
+        'address',
+        'adminarea_boundary',
+        'building',
+        'landuse',
+        'military',
+        'natural',
+        'nonop',
+        'geoname',
+        'pow',
+        'poi',
+        'misc',
+        'transport',
+        'railway',
+        'road',
+        'route',
+        'traffic',
+        'utility',
+        'water',
+    ]
+    # The filter folders are run concurrently. Each of them only reads the imported data and writes its own osmaxx
+    # tables. A folder reading the tables of other folders must list those here, e.g. 'poi': {'building'}.
+    FILTER_SQL_SCRIPT_FOLDER_PREREQUISITES = {}
+    # the filter folder creating each output layer, except for the layers imported from the OSM boundaries database
+    FILTER_SQL_SCRIPT_FOLDER_OF_LAYER = {
+        'address_p': 'address',
+        'adminarea_a': 'adminarea_boundary',
+        'boundary_l': 'adminarea_boundary',
+        'building_a': 'building',
+        'geoname_l': 'geoname',
+        'geoname_p': 'geoname',
+        'landuse_a': 'landuse',
+        'military_a': 'military',
+        'military_p': 'military',
+        'misc_l': 'misc',
+        'natural_a': 'natural',
+        'natural_p': 'natural',
+        'nonop_l': 'nonop',
+        'poi_a': 'poi',
+        'poi_p': 'poi',
+        'pow_a': 'pow',
+        'pow_p': 'pow',
+        'railway_l': 'railway',
+        'road_l': 'road',
+        'route_l': 'route',
+        'traffic_a': 'traffic',
+        'traffic_p': 'traffic',
+        'transport_a': 'transport',
+        'transport_l': 'transport',
+        'transport_p': 'transport',
+        'utility_a': 'utility',
+        'utility_l': 'utility',
+        'utility_p': 'utility',
+        'water_a': 'water',
+        'water_l': 'water',
+        'water_p': 'water',
+    }
+    # the address interpolation looks up the nodes of the interpolation ways in osm2pgsql's slim tables
+    LAYERS_NEEDING_SLIM_TABLES = ['address_p']
+
+    def __init__(
+            self, area_polyfile_string, *, detail_level=DETAIL_LEVEL_ALL, layers=None, db_name=None, work_dir=None):
+        """
+        Args:
+            area_polyfile_string: the clipping area as osmosis polygon file string
+            detail_level: one of ``DETAIL_LEVEL_CHOICES``
+            layers: names of the output layers to create, defaults to all layers of ``detail_level``; layers not
+                part of ``detail_level`` are ignored
+            db_name: database to bootstrap, defaults to ``GIS_CONVERSION_DB_NAME``; it is dropped and recreated!
+            work_dir: directory for intermediate files, should be exclusive to this bootstrapper
+        """
         self.area_polyfile_string = area_polyfile_string
-        self._postgres = get_default_postgres_wrapper()
+        self._parallelism = CONVERSION_SETTINGS['FILTER_STAGE_PARALLELISM'] or os.cpu_count()
+        self._postgres = get_default_postgres_wrapper(db_name=db_name, pool_size=self._parallelism)
         self._script_base_dir = os.path.abspath(os.path.dirname(__file__))
         self._terminal_style_path = os.path.join(self._script_base_dir, 'styles', 'terminal.style')
         self._style_path = os.path.join(self._script_base_dir, 'styles', 'style.lua')
-        self._pbf_file_path = os.path.join('/tmp', 'pbf_cutted.pbf')
+        self._pbf_file_path = os.path.join(work_dir or tempfile.gettempdir(), 'pbf_cutted.pbf')
         self._detail_level = DETAIL_LEVEL_TABLES[detail_level]
+        self._included_layers = [
+            layer for layer in self._detail_level['included_layers'] if layers is None or layer in layers
+        ]
 
     def bootstrap(self):
-        self._reset_database()
-        cut_pbf_along_polyfile(self.area_polyfile_string, self._pbf_file_path)
-        self._import_boundaries()
-        self._import_pbf()
-        self._setup_db_functions()
-        self._harmonize_database()
-        self._filter_data()
-        self._create_views()
+        with timed('database'):
+            self._reset_database()
+        with timed('cut'):
+            cut_pbf_along_polyfile(self.area_polyfile_string, self._pbf_file_path)
+        with timed('boundaries'):
+            self._import_boundaries()
+        with timed('import'):
+            self._import_pbf()
+        with timed('functions'):
+            self._setup_db_functions()
+        with timed('harmonize'):
+            self._harmonize_database()
+        with timed('transliterate'):
+            self._cache_transliterations()
+        with timed('filter'):
+            self._filter_data()
+        with timed('views'):
+            self._create_views()
 
     @mproperty
     def geom(self):
         return polyfile_helpers.parse_poly_string(self.area_polyfile_string)
 
     def _reset_database(self):
+        template_db_name = self._template_database().ensure()
         self._postgres.drop_db()
-        self._postgres.create_db()
-        self._setup_db()
+        self._postgres.create_db(template=template_db_name)
 
-    def _setup_db(self):
-        extensions = ['hstore', 'postgis', 'unaccent', 'fuzzystrmatch', 'osml10n']
-        for extension in extensions:
-            self._postgres.create_extension(extension)
+    def _template_database(self):
+        """
+        Returns: the template holding the extensions, the empty schemas and the data independent functions
+        """
         drop_and_recreate_script_folder = os.path.join(self._script_base_dir, 'sql', 'drop_and_recreate')
-        self._execute_sql_scripts_in_folder(drop_and_recreate_script_folder)
+        function_scripts = [
+            script_path for script_path in self._function_script_paths()
+            if os.path.basename(script_path) not in self.DATA_DEPENDENT_FUNCTION_SCRIPTS
+        ]
+        return TemplateDatabase(
+            extensions=self.EXTENSIONS,
+            script_paths=self._sql_script_paths_in_folder(drop_and_recreate_script_folder) + function_scripts,
+        )
 
     def _import_boundaries(self):
-        osm_importer = OSMBoundariesImporter()
+        if not any(layer in OSM_BOUNDARIES_TABLES for layer in self._included_layers):
+            return
+        osm_importer = OSMBoundariesImporter(local_db_name=self._postgres.get_db_name())
         osm_importer.load_area_specific_data(extent=self.geom)
 
     def _setup_db_functions(self):
-        self._execute_sql_scripts_in_folder(os.path.join(self._script_base_dir, 'sql', 'functions'))
+        filter_sql_script_folders = self._filter_sql_script_folders()
+        for script_path in self._function_script_paths():
+            using_folders = self.DATA_DEPENDENT_FUNCTION_SCRIPTS.get(os.path.basename(script_path), [])
+            if any(folder in filter_sql_script_folders for folder in using_folders):
+                self._postgres.execute_sql_file(script_path)
+
+    def _function_script_paths(self):
+        return self._sql_script_paths_in_folder(os.path.join(self._script_base_dir, 'sql', 'functions'))
 
     def _harmonize_database(self):
+        report_progress('harmonize')
         cleanup_sql_path = os.path.join(self._script_base_dir, 'sql', 'sweeping_data.sql')
-        self._postgres.execute_sql_file(cleanup_sql_path)
+        with heartbeat():
+            self._postgres.execute_sql_file(cleanup_sql_path)
 
-    def _filter_data(self):
-        filter_sql_script_folders = [
-            'address',
-            'adminarea_boundary',
-            'building',
-            'landuse',
-            'military',
-            'natural',
-            'nonop',
-            'geoname',
-            'pow',
-            'poi',
-            'misc',
-            'transport',
-            'railway',
-            'road',
-            'route',
-            'traffic',
-            'utility',
-            'water',
+    def _cache_transliterations(self):
+        report_progress('transliterate')
+        with heartbeat():
+            TransliterationCache().copy_to(self._postgres)
+
+    def _filter_sql_script_folders(self):
+        """
+        Returns: the filter folders creating the included layers and the folders these depend on, in declared order
+        """
+        needed_folders = set()
+        pending_folders = [
+            self.FILTER_SQL_SCRIPT_FOLDER_OF_LAYER[layer] for layer in self._included_layers
+            if layer in self.FILTER_SQL_SCRIPT_FOLDER_OF_LAYER
         ]
+        while pending_folders:
+            folder = pending_folders.pop()
+            if folder not in needed_folders:
+                needed_folders.add(folder)
+                pending_folders.extend(self.FILTER_SQL_SCRIPT_FOLDER_PREREQUISITES.get(folder, ()))
+        return [folder for folder in self.FILTER_SQL_SCRIPT_FOLDERS if folder in needed_folders]
+
+    def _filter_data(self):
         base_dir = os.path.join(self._script_base_dir, 'sql', 'filter')
-        for script_folder in filter_sql_script_folders:
-            script_folder_path = os.path.join(base_dir, script_folder)
-            self._execute_sql_scripts_in_folder(script_folder_path)
+        filter_sql_script_folders = self._filter_sql_script_folders()
+        done_folders = []
+
+        def report_done(script_folder, duration):
+            record_stage_duration('filter/{}'.format(script_folder), duration)
+            done_folders.append(script_folder)
+            report_progress('filter', percent=100 * len(done_folders) / len(filter_sql_script_folders))
+
+        report_progress('filter', percent=0)
+        with heartbeat():  # a single folder may take longer than the stall warning age
+            run_task_graph(
+                filter_sql_script_folders,
+                prerequisites={
+                    folder: prerequisites
+                    for folder, prerequisites in self.FILTER_SQL_SCRIPT_FOLDER_PREREQUISITES.items()
+                    if folder in filter_sql_script_folders
+                },
+                run=lambda script_folder: self._filter_data_of_folder(os.path.join(base_dir, script_folder)),
+                max_workers=self._parallelism,
+                on_done=report_done,
+            )
+            with timed('filter/analyze'):
+                self._analyze_osmaxx_tables()
+
+    def _filter_data_of_folder(self, script_folder_path):
+        """
+        Returns: how long the folder's scripts took, to be recorded in the job's thread
+        """
+        started_at = time.monotonic()
+        self._execute_sql_scripts_in_folder(script_folder_path)
+        return round(time.monotonic() - started_at, 3)
+
+    def _analyze_osmaxx_tables(self):
+        # the osmaxx tables are filled in one go, so autovacuum may not have analyzed them before they get exported
+        run_task_graph(
+            self._osmaxx_table_names(),
+            prerequisites={},
+            run=lambda table_name: self._postgres.execute_sql_command('ANALYZE osmaxx."{}";'.format(table_name)),
+            max_workers=self._parallelism,
+        )
+
+    def _osmaxx_table_names(self):
+        result = self._postgres.execute_sql_command("SELECT tablename FROM pg_tables WHERE schemaname = 'osmaxx';")
+        return sorted(row[0] for row in result)
 
     def _create_views(self):
-        create_view_sql_script_folder = os.path.join(self._script_base_dir, 'sql', 'create_view')
+        report_progress('views')
+        with heartbeat():
+            self._execute_sql_scripts_in_folder(
+                self._create_view_script_folder, filter_function=self._is_included_view
+            )
 
-        def filter_script_names(sql_file_path):
-            file_name = os.path.basename(sql_file_path)
-            if any(table_name in file_name for table_name in self._detail_level['included_layers']):
-                return True
-            return False
+    @property
+    def _create_view_script_folder(self):
+        return os.path.join(self._script_base_dir, 'sql', 'create_view')
 
-        self._execute_sql_scripts_in_folder(create_view_sql_script_folder, filter_function=filter_script_names)
+    def _is_included_view(self, sql_file_path):
+        file_name = os.path.basename(sql_file_path)
+        if any(table_name in file_name for table_name in self._included_layers):
+            return True
+        return False
 
     def _level_adapted_script_path(self, script_path):
         script_directory = os.path.dirname(script_path)
@@ -106,29 +271,58 @@ class BootStrapper:
         return script_path
 
     def _execute_sql_scripts_in_folder(self, folder_path, *, filter_function=lambda x: True):
-        sql_scripts_in_folder = filter(filter_function, glob.glob(os.path.join(folder_path, '*.sql')))
-        for script_path in sorted(sql_scripts_in_folder, key=os.path.basename):
-            script_path = self._level_adapted_script_path(script_path)
+        for script_path in self._sql_script_paths_in_folder(folder_path, filter_function=filter_function):
             self._postgres.execute_sql_file(script_path)
 
+    def _sql_script_paths_in_folder(self, folder_path, *, filter_function=lambda x: True):
+        sql_scripts_in_folder = filter(filter_function, glob.glob(os.path.join(folder_path, '*.sql')))
+        return [
+            self._level_adapted_script_path(script_path)
+            for script_path in sorted(sql_scripts_in_folder, key=os.path.basename)
+        ]
+
     def _import_pbf(self):
+        self._run_osm2pgsql(['--create', '--input-reader', 'pbf'], self._pbf_file_path)
+
+    def _run_osm2pgsql(self, mode_options, input_file_path):
         db_name = self._postgres.get_db_name()
         postgres_user = self._postgres.get_user()
 
+        import_profile = self._plan_import()
         osm_2_pgsql_command = [
             'osm2pgsql',
-            '--create',
-            '--extra-attributes',
-            '--slim',
+        ] + mode_options + [
             '--latlon',
             '--database', db_name,
             '--prefix', 'osm',
             '--style', self._terminal_style_path,
             '--tag-transform-script', self._style_path,
-            '--number-processes', '8',
             '--username', postgres_user,
             '--hstore-all',
-            '--input-reader', 'pbf',
-            self._pbf_file_path,
+        ] + import_profile.command_line_options() + [
+            input_file_path,
         ]
-        logged_check_call(osm_2_pgsql_command)
+        check_call_reporting_progress(
+            osm_2_pgsql_command,
+            stage='import',
+            parse_output=parse_osm2pgsql_output,
+            input_file_path=input_file_path,
+            input_passes=1,
+        )
+
+    def _plan_import(self):
+        included_layers = self._included_layers
+        import_profile = plan_import(
+            self._pbf_file_path,
+            flat_nodes_file_path=os.path.join(os.path.dirname(self._pbf_file_path), 'flat_nodes.bin'),
+            keep_slim_tables=any(layer in included_layers for layer in self.LAYERS_NEEDING_SLIM_TABLES),
+            # each view exposes the osm_timestamp as lastchange, layers without view aren't made from the import
+            extra_attributes=any(self._sql_script_paths_in_folder(
+                self._create_view_script_folder, filter_function=self._is_included_view
+            )),
+        )
+        job = get_current_job()
+        if job:
+            job.meta['import_profile'] = import_profile._asdict()
+            job.save_meta()
+        return import_profile
@@ -0,0 +1,303 @@
+import glob
+import logging
+import os
+import re
+from contextlib import contextmanager
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_gis.bootstrap.bootstrap import BootStrapper
+from osmaxx.conversion.converters.converter_gis.bootstrap.import_profile import plan_import
+from osmaxx.conversion.converters.converter_gis.bootstrap.task_graph import run_task_graph
+from osmaxx.conversion.converters.converter_gis.detail_levels import DETAIL_LEVEL_ALL
+from osmaxx.conversion.converters.converter_gis.helper.default_postgres import get_default_postgres_wrapper
+from osmaxx.conversion.converters.converter_gis.helper.osm_boundaries_importer import OSM_BOUNDARIES_TABLES, \
+    OSMBoundariesImporter, SUBDIVIDED_TABLES, clipped_pieces_sql, subdivided_table_sql
+from osmaxx.conversion.converters.job_statistics import timed
+from osmaxx.conversion.converters.workspace import WORKSPACE_PREFIX, is_stale
+
+logger = logging.getLogger(__name__)
+
+PUBLISHED_SCHEMA = 'osmaxx_published'
+PUBLISHED_VIEW_SCHEMA = 'view_osmaxx_published'
+# as written by osm_pbf_updater, e.g. 20170712T182500Z.osc.gz; ordered by name, they are ordered by time
+CHANGE_FILE_NAME_PATTERN = re.compile(r'^\d{8}T\d{6}Z\.osc\.gz$')
+# next to the planet, osm_pbf_updater keeps the name of the newest change file the planet contains in here
+LAST_CHANGE_FILE_MARKER_SUFFIX = '.last_change_file'
+
+OSM_BOUNDARIES_GEOMETRY_TYPES = {
+    'coastline_l': 'MULTILINESTRING',
+    'landmass_a': 'MULTIPOLYGON',
+    'sea_a': 'MULTIPOLYGON',
+}
+
+_WORLD_POLYFILE_STRING = os.linesep.join(
+    ['world', '1', '-180.0 -90.0', '180.0 -90.0', '180.0 90.0', '-180.0 90.0', '-180.0 -90.0', 'END', 'END']
+)
+
+
+def published_global_database(*, detail_level, layers=None):
+    """
+    Returns: the ``GlobalDatabase`` to clip conversions of ``detail_level`` from or ``None`` if they are bootstrapped
+    """
+    if CONVERSION_SETTINGS['GLOBAL_DATABASE_NAME'] is None or detail_level != DETAIL_LEVEL_ALL:
+        return None
+    global_database = GlobalDatabase(layers=layers)
+    if not global_database.is_published():
+        logger.warning('global database %s has not been published yet', global_database.db_name)
+        return None
+    return global_database
+
+
+class GlobalDatabase(BootStrapper):
+    """
+    Long-lived database holding the layers of the whole planet in full detail, which conversions are clipped from
+    instead of bootstrapping a database of their own.
+
+    The layers are built in the ``osmaxx`` and ``view_osmaxx`` schemas and then published by renaming these to
+    ``PUBLISHED_SCHEMA`` and ``PUBLISHED_VIEW_SCHEMA`` in one transaction, so conversions never see half-built layers.
+    The OSM data is kept current by applying the change files ``osm_pbf_updater`` keeps in
+    ``GLOBAL_DATABASE_CHANGE_FILE_DIRECTORY``. The layers are not updated from these changes, they are rebuilt from
+    the whole planet and published again, which takes hours. This is done at most every
+    ``GLOBAL_DATABASE_PUBLISH_INTERVAL``, the published layers lag behind the OSM data by up to this interval plus
+    the duration of a rebuild.
+
+    Usage:
+
+        GlobalDatabase().bootstrap()  # once
+        GlobalDatabase().update()  # regularly
+
+        with GlobalDatabase(layers=['road_l']).clipped_schema('some_schema', geom=geom) as schema:
+            extract_to(..., db_name=CONVERSION_SETTINGS['GLOBAL_DATABASE_NAME'], schema=schema)
+    """
+
+    def __init__(self, *, layers=None):
+        """
+        Args:
+            layers: names of the layers clipped by ``clipped_schema``, defaults to all layers of full detail
+        """
+        super().__init__(
+            _WORLD_POLYFILE_STRING, detail_level=DETAIL_LEVEL_ALL, layers=layers,
+            db_name=CONVERSION_SETTINGS['GLOBAL_DATABASE_NAME'],
+        )
+        self._pbf_file_path = CONVERSION_SETTINGS['PBF_PLANET_FILE_PATH']
+        self._change_file_directory = CONVERSION_SETTINGS['GLOBAL_DATABASE_CHANGE_FILE_DIRECTORY']
+
+    @property
+    def db_name(self):
+        return self._postgres.get_db_name()
+
+    def bootstrap(self):
+        """
+        Drops the database and builds it again from the planet, including all change files the planet contains.
+        """
+        # read before importing the planet, which may only contain more changes by the time it is imported
+        last_contained_change_file_name = self._last_contained_change_file_name()
+        with timed('database'):
+            self._reset_database()
+        with timed('boundaries'):
+            self._import_boundaries()
+        with timed('import'):
+            self._import_pbf()
+        self._postgres.execute_sql_command(
+            'CREATE TABLE osmaxx_applied_change_files '
+            '(file_name text PRIMARY KEY, applied_at timestamptz DEFAULT now(), published_at timestamptz);'
+        )
+        self._mark_as_applied([
+            path for path in self._change_file_paths()
+            if os.path.basename(path) <= last_contained_change_file_name
+        ])
+        self._rebuild_and_publish_layers()
+
+    def update(self):
+        """
+        Applies the change files newer than the last one applied, in order, and rebuilds and publishes the layers
+        again if changes have been applied since they were published and ``GLOBAL_DATABASE_PUBLISH_INTERVAL`` has
+        passed since.
+
+        Returns: the number of change files applied
+        """
+        result = self._postgres.execute_sql_command('SELECT max(file_name) FROM osmaxx_applied_change_files;')
+        last_applied_file_name = result.scalar() or ''
+        pending_change_file_paths = [
+            path for path in self._change_file_paths() if os.path.basename(path) > last_applied_file_name
+        ]
+        for change_file_path in pending_change_file_paths:
+            logger.info('applying change file %s to global database %s', change_file_path, self.db_name)
+            with timed('import'):
+                self._run_osm2pgsql(['--append', '--input-reader', 'xml'], change_file_path)
+            self._mark_as_applied([change_file_path])
+        if self._is_publishing_due():
+            self._rebuild_and_publish_layers()
+        return len(pending_change_file_paths)
+
+    def is_published(self):
+        result = get_default_postgres_wrapper(db_name='postgres').execute_sql_command(
+            "SELECT 1 FROM pg_database WHERE datname = '{}';".format(self.db_name)
+        )
+        if result.first() is None:
+            return False
+        result = self._postgres.execute_sql_command(
+            "SELECT 1 FROM pg_namespace WHERE nspname = '{}';".format(PUBLISHED_SCHEMA)
+        )
+        return result.first() is not None
+
+    @contextmanager
+    def clipped_schema(self, schema, *, geom):
+        """
+        Copies the published features of the layers intersecting ``geom`` into the new ``schema``, which is dropped
+        again on exit.
+
+        Features are copied whole, just like bootstrapping keeps the ways crossing the border of the excerpt whole.
+        Only the land and sea layers are cut along ``geom``, as ``OSMBoundariesImporter`` does, using the pieces of
+        their subdivided copies.
+
+        Args:
+            schema: name of the schema to create, should be the name of the conversion's workspace
+            geom: the clipping area
+        """
+        self._drop_stale_clipped_schemas()
+        try:
+            with timed('clip'):
+                self._postgres.execute_sql_command(self._clip_sql(schema, geom=geom))
+            yield schema
+        finally:
+            self._postgres.execute_sql_command('DROP SCHEMA IF EXISTS "{}" CASCADE;'.format(schema))
+
+    def _clip_sql(self, schema, *, geom):
+        extent = "ST_GeomFromEWKT('{}')".format(geom.ewkt)
+        layers = [layer for layer in self._included_layers if layer not in OSM_BOUNDARIES_TABLES]
+        statements = ['CREATE SCHEMA "{}";'.format(schema)]
+        if layers:
+            # all layers are copied in one transaction, which keeps an update from publishing in the meantime
+            statements.append('LOCK TABLE {} IN ACCESS SHARE MODE;'.format(
+                ', '.join('{}."{}"'.format(PUBLISHED_SCHEMA, layer) for layer in layers)
+            ))
+        for layer in layers:
+            statements.append(
+                'CREATE TABLE "{schema}"."{layer}" AS SELECT * FROM {view_schema}."{layer}" '
+                'WHERE ST_Intersects(geom, {extent});'.format(
+                    schema=schema, layer=layer, view_schema=PUBLISHED_VIEW_SCHEMA, extent=extent,
+                )
+            )
+        for layer in self._included_layers:
+            if layer in SUBDIVIDED_TABLES:
+                geometry = 'wkb_geometry'
+                rows = '({}) AS clipped'.format(clipped_pieces_sql(layer, extent=geom))
+            elif layer in OSM_BOUNDARIES_TABLES:
+                geometry = 'ST_Multi(ST_Intersection(wkb_geometry, {}))'.format(extent)
+                rows = 'public."{}" WHERE ST_Intersects(wkb_geometry, {})'.format(layer, extent)
+            else:
+                continue
+            statements.append(
+                'CREATE TABLE "{schema}"."{layer}" AS SELECT ogc_fid, fid, '
+                'CAST({geometry} AS geometry({geometry_type}, 4326)) AS geom FROM {rows};'.format(
+                    schema=schema, layer=layer, geometry=geometry, rows=rows,
+                    geometry_type=OSM_BOUNDARIES_GEOMETRY_TYPES[layer],
+                )
+            )
+        return '\n'.join(statements)
+
+    def _drop_stale_clipped_schemas(self):
+        result = self._postgres.execute_sql_command(
+            "SELECT nspname FROM pg_namespace WHERE nspname LIKE '{}%';".format(WORKSPACE_PREFIX)
+        )
+        for schema in [row[0] for row in result]:
+            if is_stale(schema):
+                logger.warning('removing stale clipped schema %s', schema)
+                self._postgres.execute_sql_command('DROP SCHEMA IF EXISTS "{}" CASCADE;'.format(schema))
+
+    def _rebuild_and_publish_layers(self):
+        # left over by a build that failed before publishing, if at all
+        self._postgres.execute_sql_command(
+            'DROP SCHEMA IF EXISTS view_osmaxx CASCADE; DROP SCHEMA IF EXISTS osmaxx CASCADE; '
+            'CREATE SCHEMA osmaxx; CREATE SCHEMA view_osmaxx;'
+        )
+        with timed('functions'):
+            self._setup_db_functions()
+        with timed('harmonize'):
+            self._harmonize_database()
+        with timed('transliterate'):
+            self._cache_transliterations()
+        with timed('filter'):
+            self._filter_data()
+        with timed('index'):
+            self._log_and_index_osmaxx_tables()
+        with timed('views'):
+            self._create_views()
+        self._postgres.execute_sql_command(
+            'DROP SCHEMA IF EXISTS {published_view_schema} CASCADE; DROP SCHEMA IF EXISTS {published_schema} CASCADE; '
+            'ALTER SCHEMA osmaxx RENAME TO {published_schema}; '
+            'ALTER SCHEMA view_osmaxx RENAME TO {published_view_schema}; '
+            'UPDATE osmaxx_applied_change_files SET published_at = now() WHERE published_at IS NULL;'.format(
+                published_schema=PUBLISHED_SCHEMA, published_view_schema=PUBLISHED_VIEW_SCHEMA,
+            )
+        )
+
+    def _is_publishing_due(self):
+        result = self._postgres.execute_sql_command(
+            "SELECT bool_or(published_at IS NULL) "
+            "AND coalesce(max(published_at) < now() - interval '{} seconds', true) "
+            "FROM osmaxx_applied_change_files;".format(
+                int(CONVERSION_SETTINGS['GLOBAL_DATABASE_PUBLISH_INTERVAL'].total_seconds())
+            )
+        )
+        return bool(result.scalar())
+
+    def _log_and_index_osmaxx_tables(self):
+        # the filter scripts create the tables unlogged, which would be emptied by a crash of the long-lived database
+        run_task_graph(
+            self._osmaxx_table_names(),
+            prerequisites={},
+            run=lambda table_name: self._postgres.execute_sql_command(
+                'ALTER TABLE osmaxx."{0}" SET LOGGED; CREATE INDEX ON osmaxx."{0}" USING gist (geom);'.format(
+                    table_name
+                )
+            ),
+            max_workers=self._parallelism,
+        )
+
+    def _import_boundaries(self):
+        # conversions cut the land and sea polygons from pieces of them, which are subdivided here once
+        OSMBoundariesImporter(local_db_name=self.db_name).load_whole_tables()
+        for table_name in SUBDIVIDED_TABLES:
+            self._postgres.execute_sql_command(subdivided_table_sql(table_name))
+        for table_name in OSM_BOUNDARIES_TABLES:
+            if table_name not in SUBDIVIDED_TABLES:
+                self._postgres.execute_sql_command(
+                    'CREATE INDEX IF NOT EXISTS "{0}_clip_idx" ON public."{0}" USING gist (wkb_geometry);'.format(
+                        table_name
+                    )
+                )
+
+    def _plan_import(self):
+        import_profile = plan_import(
+            self._pbf_file_path,
+            flat_nodes_file_path=None,
+            keep_slim_tables=True,  # needed for applying change files
+            extra_attributes=True,
+        )
+        flat_nodes_file_path = CONVERSION_SETTINGS['GLOBAL_DATABASE_FLAT_NODES_FILE_PATH']
+        os.makedirs(os.path.dirname(flat_nodes_file_path), exist_ok=True)
+        # change files are applied using the node locations stored during the import of the planet
+        return import_profile._replace(flat_nodes_file_path=flat_nodes_file_path)
+
+    def _change_file_paths(self):
+        return sorted(
+            path for path in glob.glob(os.path.join(self._change_file_directory, '*.osc.gz'))
+            if CHANGE_FILE_NAME_PATTERN.match(os.path.basename(path))
+        )
+
+    def _last_contained_change_file_name(self):
+        try:
+            with open(self._pbf_file_path + LAST_CHANGE_FILE_MARKER_SUFFIX) as marker:
+                return marker.read().strip()
+        except FileNotFoundError:  # no change files have been kept before the planet has been written
+            return ''
+
+    def _mark_as_applied(self, change_file_paths):
+        for change_file_path in change_file_paths:
+            self._postgres.execute_sql_command(
+                "INSERT INTO osmaxx_applied_change_files (file_name) VALUES ('{}');".format(
+                    os.path.basename(change_file_path)
+                )
+            )
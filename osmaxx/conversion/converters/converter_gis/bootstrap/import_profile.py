@@ -0,0 +1,93 @@
+import math
+import os
+from collections import namedtuple
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+
+# osm2pgsql's node cache holds the locations of all nodes, which take about as much memory as the PBF file
+# containing them takes disk space; the rest is headroom for the sparse parts of the cache
+NODE_CACHE_BYTES_PER_PBF_BYTE = 1.5
+MIN_NODE_CACHE_SIZE_IN_BYTES = 200 * 1024 ** 2
+# additional processes only pay off once there are enough ways and relations to distribute among them
+PBF_BYTES_PER_PROCESS = 32 * 1024 ** 2
+
+_ImportProfileBase = namedtuple(
+    '_ImportProfileBase',
+    [
+        'pbf_size_in_bytes',
+        'cpu_count',
+        'available_memory_in_bytes',
+        'cache_size_in_bytes',
+        'number_of_processes',
+        'flat_nodes_file_path',
+        'drop_slim_tables',
+        'extra_attributes',
+    ]
+)
+
+
+class ImportProfile(_ImportProfileBase):
+    """
+    The osm2pgsql options chosen for an import, along with the figures they have been derived from.
+    """
+
+    def command_line_options(self):
+        options = [
+            '--slim',
+            '--cache', str(self.cache_size_in_bytes // 1024 ** 2),
+            '--number-processes', str(self.number_of_processes),
+        ]
+        if self.flat_nodes_file_path is not None:
+            options += ['--flat-nodes', self.flat_nodes_file_path]
+        if self.drop_slim_tables:
+            options.append('--drop')
+        if self.extra_attributes:
+            options.append('--extra-attributes')
+        return options
+
+
+def plan_import(pbf_file_path, *, flat_nodes_file_path, keep_slim_tables, extra_attributes):
+    """
+    Chooses the osm2pgsql options for importing ``pbf_file_path`` on this host.
+
+    The node cache is sized to the extract, within this import's part of ``OSM2PGSQL_MEMORY_SHARE`` of the memory
+    available. Node locations not fitting into that are stored in a flat nodes file instead. Memory and CPUs are
+    divided evenly among the ``WORKER_CONCURRENCY`` conversions that may be importing on this host at the same time.
+
+    Args:
+        pbf_file_path: the extract to import
+        flat_nodes_file_path: where to put the flat nodes file, if one is needed
+        keep_slim_tables: whether the slim tables (e.g. ``osm_ways``) are needed after the import
+        extra_attributes: whether the OSM metadata (e.g. ``osm_timestamp``) is needed after the import
+
+    Returns: the chosen ``ImportProfile``
+    """
+    pbf_size = os.path.getsize(pbf_file_path)
+    cpu_count = os.cpu_count() or 1
+    worker_concurrency = CONVERSION_SETTINGS['WORKER_CONCURRENCY']
+    available_memory = _available_memory_in_bytes()
+    node_cache_budget = int(available_memory * CONVERSION_SETTINGS['OSM2PGSQL_MEMORY_SHARE'] / worker_concurrency)
+    max_number_of_processes = max(1, cpu_count // worker_concurrency)
+    required_node_cache_size = max(int(pbf_size * NODE_CACHE_BYTES_PER_PBF_BYTE), MIN_NODE_CACHE_SIZE_IN_BYTES)
+    needs_flat_nodes = required_node_cache_size > node_cache_budget
+    return ImportProfile(
+        pbf_size_in_bytes=pbf_size,
+        cpu_count=cpu_count,
+        available_memory_in_bytes=available_memory,
+        cache_size_in_bytes=max(min(required_node_cache_size, node_cache_budget), MIN_NODE_CACHE_SIZE_IN_BYTES),
+        number_of_processes=max(1, min(max_number_of_processes, math.ceil(pbf_size / PBF_BYTES_PER_PROCESS))),
+        flat_nodes_file_path=flat_nodes_file_path if needs_flat_nodes else None,
+        drop_slim_tables=not keep_slim_tables,
+        extra_attributes=extra_attributes,
+    )
+
+
+def _available_memory_in_bytes():
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:  # not on Linux
+        pass
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
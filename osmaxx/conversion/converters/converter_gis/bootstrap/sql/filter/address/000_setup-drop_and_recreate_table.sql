@@ -2,7 +2,7 @@
 --  address_p  --
 -----------------
 DROP TABLE if exists osmaxx.address_p;
-CREATE TABLE osmaxx.address_p(
+CREATE UNLOGGED TABLE osmaxx.address_p(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
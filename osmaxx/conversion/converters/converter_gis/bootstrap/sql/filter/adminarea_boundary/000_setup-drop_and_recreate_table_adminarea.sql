@@ -2,7 +2,7 @@
 -- adminarea_a --
 -----------------
 DROP TABLE if exists osmaxx.adminarea_a;
-CREATE TABLE osmaxx.adminarea_a (
+CREATE UNLOGGED TABLE osmaxx.adminarea_a (
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
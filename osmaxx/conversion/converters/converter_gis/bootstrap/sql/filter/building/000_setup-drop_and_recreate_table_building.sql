@@ -2,7 +2,7 @@
 --  building_a --
 -----------------
 DROP TABLE if exists osmaxx.building_a;
-CREATE TABLE osmaxx.building_a (
+CREATE UNLOGGED TABLE osmaxx.building_a (
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
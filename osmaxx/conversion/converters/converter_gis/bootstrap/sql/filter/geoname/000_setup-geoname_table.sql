@@ -1,7 +1,7 @@
 DROP TABLE if exists osmaxx.geoname_l;
 DROP TABLE if exists osmaxx.geoname_p;
 
-CREATE TABLE osmaxx.geoname_l (
+CREATE UNLOGGED TABLE osmaxx.geoname_l (
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
@@ -19,7 +19,7 @@ CREATE TABLE osmaxx.geoname_l (
     wikipedia text
 );
 
-CREATE TABLE osmaxx.geoname_p (
+CREATE UNLOGGED TABLE osmaxx.geoname_p (
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype text,
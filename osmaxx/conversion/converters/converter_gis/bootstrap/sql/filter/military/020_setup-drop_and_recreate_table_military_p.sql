@@ -2,7 +2,7 @@
 --  military_p --
 -----------------
 DROP TABLE if exists osmaxx.military_p;
-CREATE TABLE osmaxx.military_p (
+CREATE UNLOGGED TABLE osmaxx.military_p (
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype text,
@@ -1,5 +1,5 @@
 DROP TABLE if exists osmaxx.misc_l;
-CREATE TABLE osmaxx.misc_l(
+CREATE UNLOGGED TABLE osmaxx.misc_l(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
@@ -2,7 +2,7 @@
 --  natural_p  --
 -----------------
 DROP TABLE if exists osmaxx.natural_p;
-CREATE TABLE osmaxx.natural_p (
+CREATE UNLOGGED TABLE osmaxx.natural_p (
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype text,
@@ -2,7 +2,7 @@
 --          poi_a          --
 -----------------------------
 DROP TABLE if exists osmaxx.poi_a;
-CREATE TABLE osmaxx.poi_a(
+CREATE UNLOGGED TABLE osmaxx.poi_a(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
@@ -2,7 +2,7 @@
 --          poi_p          --
 -----------------------------
 DROP TABLE if exists osmaxx.poi_p;
-CREATE TABLE osmaxx.poi_p(
+CREATE UNLOGGED TABLE osmaxx.poi_p(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype text,
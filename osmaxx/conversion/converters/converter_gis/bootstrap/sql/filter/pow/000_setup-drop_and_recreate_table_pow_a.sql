@@ -2,7 +2,7 @@
 ----  pow_a ----
 -----------------
 DROP TABLE if exists osmaxx.pow_a;
-CREATE TABLE osmaxx.pow_a (
+CREATE UNLOGGED TABLE osmaxx.pow_a (
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
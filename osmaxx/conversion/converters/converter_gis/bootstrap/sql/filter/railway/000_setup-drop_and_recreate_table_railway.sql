@@ -2,7 +2,7 @@
 --- railway_l ---
 -----------------
 DROP TABLE if exists osmaxx.railway_l;
-CREATE TABLE osmaxx.railway_l(
+CREATE UNLOGGED TABLE osmaxx.railway_l(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
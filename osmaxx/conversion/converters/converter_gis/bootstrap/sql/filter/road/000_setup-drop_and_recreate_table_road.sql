@@ -2,7 +2,7 @@
 ----  road_l ----
 -----------------
 DROP TABLE if exists osmaxx.road_l;
-CREATE TABLE osmaxx.road_l(
+CREATE UNLOGGED TABLE osmaxx.road_l(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
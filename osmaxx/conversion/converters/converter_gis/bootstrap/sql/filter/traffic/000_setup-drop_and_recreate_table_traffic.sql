@@ -2,7 +2,7 @@
 --- traffic_a ---
 -----------------
 DROP TABLE if exists osmaxx.traffic_a;
-CREATE TABLE osmaxx.traffic_a(
+CREATE UNLOGGED TABLE osmaxx.traffic_a(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
@@ -2,7 +2,7 @@
 --- traffic_p ---
 -----------------
 DROP TABLE if exists osmaxx.traffic_p;
-CREATE TABLE osmaxx.traffic_p(
+CREATE UNLOGGED TABLE osmaxx.traffic_p(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype text,
@@ -2,7 +2,7 @@
 -- transport_a --
 -----------------
 DROP TABLE if exists osmaxx.transport_a;
-CREATE TABLE osmaxx.transport_a(
+CREATE UNLOGGED TABLE osmaxx.transport_a(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
@@ -1,5 +1,5 @@
 DROP TABLE IF EXISTS osmaxx.transport_l;
-CREATE TABLE osmaxx.transport_l (
+CREATE UNLOGGED TABLE osmaxx.transport_l (
   osm_id     BIGINT,
   lastchange TIMESTAMP WITHOUT TIME ZONE,
   geomtype   CHAR(1),
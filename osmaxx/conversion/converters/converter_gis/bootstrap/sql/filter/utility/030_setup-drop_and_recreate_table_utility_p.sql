@@ -2,7 +2,7 @@
 --  utility_p  --
 -----------------
 DROP TABLE if exists osmaxx.utility_p;
-CREATE TABLE osmaxx.utility_p(
+CREATE UNLOGGED TABLE osmaxx.utility_p(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype text,
@@ -2,7 +2,7 @@
 ---- water_a ----
 -----------------
 DROP TABLE if exists osmaxx.water_a;
-CREATE TABLE osmaxx.water_a(
+CREATE UNLOGGED TABLE osmaxx.water_a(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype char(1),
@@ -22,7 +22,7 @@ CREATE TABLE osmaxx.water_a(
 ---- water_p ----
 -----------------
 DROP TABLE if exists osmaxx.water_p;
-CREATE TABLE osmaxx.water_p(
+CREATE UNLOGGED TABLE osmaxx.water_p(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype text,
@@ -43,7 +43,7 @@ CREATE TABLE osmaxx.water_p(
 --  water_l --
 -----------------
 DROP TABLE if exists osmaxx.water_l;
-CREATE TABLE osmaxx.water_l(
+CREATE UNLOGGED TABLE osmaxx.water_l(
     osm_id bigint,
     lastchange timestamp without time zone,
     geomtype text,
@@ -6,3 +6,16 @@
 ---------------------------------------------------------------------------------------
 CREATE EXTENSION IF NOT EXISTS postgis CASCADE;
 CREATE EXTENSION IF NOT EXISTS osml10n CASCADE;
+
+---------------------------------------------------------------------------------------
+-- osml10n_translit, looking up the names transliterated by previous conversions first.
+-- The lookup table is filled by TransliterationCache before filtering.
+---------------------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS osmaxx_transliteration (original text PRIMARY KEY, transliterated text);
+
+CREATE OR REPLACE FUNCTION osmaxx_translit(txt text) RETURNS text AS $$
+  SELECT coalesce(
+    (SELECT transliterated FROM osmaxx_transliteration WHERE original = txt),
+    osml10n_translit(txt)
+  );
+$$ LANGUAGE sql STABLE;
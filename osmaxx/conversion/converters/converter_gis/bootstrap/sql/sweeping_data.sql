@@ -1,451 +1,301 @@
 /*
-Lowercase all the values in all the rows
+Lowercase and trim the values in all the rows, in one pass per table rewriting only the rows whose values change
 This excludes osm_id, osm_timestamp, all names, ele, voltage, frequency, height, population, way, contact:phone, maxspeed, oneway, opening_hours, ref, osm_version, z_order, tags
 */
 
-/*lower osm_line*/
+/*harmonize osm_line*/
 UPDATE
     osm_line
 SET
-    "access"=lower("access"),
-    "addr:city"=lower("addr:city"),
+    "access"=trim(lower("access")),
+    "addr:city"=trim(lower("addr:city")),
     "addr:housenumber"=lower("addr:housenumber"),
     "addr:interpolation"=lower("addr:interpolation"),
     "addr:place"=lower("addr:place"),
     "addr:postcode"=lower("addr:postcode"),
-    "addr:street"=("addr:street"),
-    "addr:country"=("addr:country"),
-    admin_level=lower(admin_level),
-    aerialway=lower(aerialway),
-    aeroway=lower(aeroway),
-    amenity=lower(amenity),
-    area=lower(area),
-    barrier=lower(barrier),
-    brand=lower(brand),
-    bridge=lower(bridge),
-    boundary=lower(boundary),
-    building=lower(building),
-    bus=lower(bus),
-    cuisine=lower(cuisine),
-    denomination=lower(denomination),
-    drinkable=lower(drinkable),
-    emergency=lower(emergency),
-    entrance=lower(entrance),
-    foot= lower(foot),
-    "generator:source"=lower("generator:source"),
-    highway=lower(highway),
-    historic=lower(historic),
-    information=lower(information),
-    junction=lower(junction),
-    landuse=lower(landuse),
-    leisure=lower(leisure),
-    man_made=lower(man_made),
-    military=lower(military),
-    "natural"=lower("natural"),
-    office=lower(office),
-    oneway=lower(oneway),
-    operator=lower(operator),
-    phone=lower(phone),
-    "power"=lower("power"),
-    power_source=lower(power_source),
-    parking=lower(parking),
-    place=lower(place),
-    public_transport=lower(public_transport),
-    "recycling:glass"=lower("recycling:glass"),
-    "recycling:paper"=lower("recycling:paper"),
-    "recycling:clothes"=lower("recycling:clothes"),
-    "recycling:scrap_metal"=lower("recycling:scrap_metal"),
-    railway=lower(railway),
-    religion=lower(religion),
-    route=lower(route),
-    service=lower(service),
-    shop=lower(shop),
-    sport=lower(sport),
-    tourism=lower(tourism),
-    "tower:type"=lower("tower:type"),
-    traffic_calming=lower(traffic_calming),
-    train=lower(train),
-    tram=lower(tram),
-    tunnel=lower(tunnel),
-    type=lower(type),
-    vending=lower(vending),
-    water=lower(water),
-    waterway=lower(waterway),
-    website=lower(website),
-    wetland=lower(wetland),
-    wikipedia=lower(wikipedia),
-    tracktype=lower(tracktype);
+    admin_level=trim(lower(admin_level)),
+    aerialway=trim(lower(aerialway)),
+    aeroway=trim(lower(aeroway)),
+    amenity=trim(lower(amenity)),
+    area=trim(lower(area)),
+    barrier=trim(lower(barrier)),
+    brand=trim(lower(brand)),
+    bridge=trim(lower(bridge)),
+    boundary=trim(lower(boundary)),
+    building=trim(lower(building)),
+    bus=trim(lower(bus)),
+    cuisine=trim(lower(cuisine)),
+    denomination=trim(lower(denomination)),
+    drinkable=trim(lower(drinkable)),
+    emergency=trim(lower(emergency)),
+    entrance=trim(lower(entrance)),
+    foot=trim(lower(foot)),
+    "generator:source"=trim(lower("generator:source")),
+    highway=trim(lower(highway)),
+    historic=trim(lower(historic)),
+    information=trim(lower(information)),
+    junction=trim(lower(junction)),
+    landuse=trim(lower(landuse)),
+    leisure=trim(lower(leisure)),
+    man_made=trim(lower(man_made)),
+    military=trim(lower(military)),
+    "natural"=trim(lower("natural")),
+    office=trim(lower(office)),
+    oneway=trim(lower(oneway)),
+    operator=trim(lower(operator)),
+    phone=trim(lower(phone)),
+    "power"=trim(lower("power")),
+    power_source=trim(lower(power_source)),
+    parking=trim(lower(parking)),
+    place=trim(lower(place)),
+    public_transport=trim(lower(public_transport)),
+    "recycling:glass"=trim(lower("recycling:glass")),
+    "recycling:paper"=trim(lower("recycling:paper")),
+    "recycling:clothes"=trim(lower("recycling:clothes")),
+    "recycling:scrap_metal"=trim(lower("recycling:scrap_metal")),
+    railway=trim(lower(railway)),
+    religion=trim(lower(religion)),
+    route=trim(lower(route)),
+    service=trim(lower(service)),
+    shop=trim(lower(shop)),
+    sport=trim(lower(sport)),
+    tourism=trim(lower(tourism)),
+    "tower:type"=trim(lower("tower:type")),
+    traffic_calming=trim(lower(traffic_calming)),
+    train=trim(lower(train)),
+    tram=trim(lower(tram)),
+    tunnel=trim(lower(tunnel)),
+    type=trim(lower(type)),
+    vending=trim(lower(vending)),
+    water=trim(lower(water)),
+    waterway=trim(lower(waterway)),
+    website=trim(lower(website)),
+    wetland=trim(lower(wetland)),
+    wikipedia=trim(lower(wikipedia)),
+    tracktype=trim(lower(tracktype))
+WHERE
+    (
+        "access", "addr:city", "addr:housenumber", "addr:interpolation", "addr:place", "addr:postcode", admin_level,
+        aerialway, aeroway, amenity, area, barrier, brand, bridge, boundary, building, bus, cuisine, denomination,
+        drinkable, emergency, entrance, foot, "generator:source", highway, historic, information, junction, landuse,
+        leisure, man_made, military, "natural", office, oneway, operator, phone, "power", power_source, parking,
+        place, public_transport, "recycling:glass", "recycling:paper", "recycling:clothes", "recycling:scrap_metal",
+        railway, religion, route, service, shop, sport, tourism, "tower:type", traffic_calming, train, tram, tunnel,
+        type, vending, water, waterway, website, wetland, wikipedia, tracktype
+    ) IS DISTINCT FROM (
+        trim(lower("access")), trim(lower("addr:city")), lower("addr:housenumber"), lower("addr:interpolation"),
+        lower("addr:place"), lower("addr:postcode"), trim(lower(admin_level)), trim(lower(aerialway)),
+        trim(lower(aeroway)), trim(lower(amenity)), trim(lower(area)), trim(lower(barrier)), trim(lower(brand)),
+        trim(lower(bridge)), trim(lower(boundary)), trim(lower(building)), trim(lower(bus)), trim(lower(cuisine)),
+        trim(lower(denomination)), trim(lower(drinkable)), trim(lower(emergency)), trim(lower(entrance)),
+        trim(lower(foot)), trim(lower("generator:source")), trim(lower(highway)), trim(lower(historic)),
+        trim(lower(information)), trim(lower(junction)), trim(lower(landuse)), trim(lower(leisure)),
+        trim(lower(man_made)), trim(lower(military)), trim(lower("natural")), trim(lower(office)),
+        trim(lower(oneway)), trim(lower(operator)), trim(lower(phone)), trim(lower("power")),
+        trim(lower(power_source)), trim(lower(parking)), trim(lower(place)), trim(lower(public_transport)),
+        trim(lower("recycling:glass")), trim(lower("recycling:paper")), trim(lower("recycling:clothes")),
+        trim(lower("recycling:scrap_metal")), trim(lower(railway)), trim(lower(religion)), trim(lower(route)),
+        trim(lower(service)), trim(lower(shop)), trim(lower(sport)), trim(lower(tourism)),
+        trim(lower("tower:type")), trim(lower(traffic_calming)), trim(lower(train)), trim(lower(tram)),
+        trim(lower(tunnel)), trim(lower(type)), trim(lower(vending)), trim(lower(water)), trim(lower(waterway)),
+        trim(lower(website)), trim(lower(wetland)), trim(lower(wikipedia)), trim(lower(tracktype))
+    );
 
-/*lower osm_point*/
+/*harmonize osm_point*/
 UPDATE
     osm_point
 SET
-    "access"=lower("access"),
-    "addr:city"=lower("addr:city"),
+    "access"=trim(lower("access")),
+    "addr:city"=trim(lower("addr:city")),
     "addr:housenumber"=lower("addr:housenumber"),
     "addr:interpolation"=lower("addr:interpolation"),
     "addr:place"=lower("addr:place"),
     "addr:postcode"=lower("addr:postcode"),
-    "addr:street"=("addr:street"),
-    "addr:country"=("addr:country"),
-    admin_level=lower(admin_level),
-    aerialway=lower(aerialway),
-    aeroway=lower(aeroway),
-    amenity=lower(amenity),
-    area=lower(area),
-    barrier=lower(barrier),
-    brand=lower(brand),
-    bridge=lower(bridge),
-    boundary=lower(boundary),
-    building=lower(building),
-    bus=lower(bus),
-    cuisine=lower(cuisine),
-    denomination=lower(denomination),
-    drinkable=lower(drinkable),
-    emergency=lower(emergency),
-    entrance=lower(entrance),
-    foot= lower(foot),
-    "generator:source"=lower("generator:source"),
-    highway=lower(highway),
-    historic=lower(historic),
-    information=lower(information),
-    junction=lower(junction),
-    landuse=lower(landuse),
-    leisure=lower(leisure),
-    man_made=lower(man_made),
-    military=lower(military),
-    "natural"=lower("natural"),
-    office=lower(office),
-    oneway=lower(oneway),
-    operator=lower(operator),
-    phone=lower(phone),
-    "power"=lower("power"),
-    power_source=lower(power_source),
-    parking=lower(parking),
-    place=lower(place),
-    public_transport=lower(public_transport),
-    "recycling:glass"=lower("recycling:glass"),
-    "recycling:paper"=lower("recycling:paper"),
-    "recycling:clothes"=lower("recycling:clothes"),
-    "recycling:scrap_metal"=lower("recycling:scrap_metal"),
-    railway=lower(railway),
-    religion=lower(religion),
-    route=lower(route),
-    service=lower(service),
-    shop=lower(shop),
-    sport=lower(sport),
-    tourism=lower(tourism),
-    "tower:type"=lower("tower:type"),
-    traffic_calming=lower(traffic_calming),
-    train=lower(train),
-    tram=lower(tram),
-    tunnel=lower(tunnel),
-    type=lower(type),
-    vending=lower(vending),
-    water=lower(water),
-    waterway=lower(waterway),
-    website=lower(website),
-    wetland=lower(wetland),
-    wikipedia=lower(wikipedia);
+    admin_level=trim(lower(admin_level)),
+    aerialway=trim(lower(aerialway)),
+    aeroway=trim(lower(aeroway)),
+    amenity=trim(lower(amenity)),
+    area=trim(lower(area)),
+    barrier=trim(lower(barrier)),
+    brand=trim(lower(brand)),
+    bridge=trim(lower(bridge)),
+    boundary=trim(lower(boundary)),
+    building=trim(lower(building)),
+    bus=trim(lower(bus)),
+    cuisine=trim(lower(cuisine)),
+    denomination=trim(lower(denomination)),
+    drinkable=trim(lower(drinkable)),
+    emergency=trim(lower(emergency)),
+    entrance=trim(lower(entrance)),
+    foot=trim(lower(foot)),
+    "generator:source"=trim(lower("generator:source")),
+    highway=trim(lower(highway)),
+    historic=trim(lower(historic)),
+    information=trim(lower(information)),
+    junction=trim(lower(junction)),
+    landuse=trim(lower(landuse)),
+    leisure=trim(lower(leisure)),
+    man_made=trim(lower(man_made)),
+    military=trim(lower(military)),
+    "natural"=trim(lower("natural")),
+    office=trim(lower(office)),
+    oneway=trim(lower(oneway)),
+    operator=trim(lower(operator)),
+    phone=trim(lower(phone)),
+    "power"=trim(lower("power")),
+    power_source=trim(lower(power_source)),
+    parking=trim(lower(parking)),
+    place=trim(lower(place)),
+    public_transport=trim(lower(public_transport)),
+    "recycling:glass"=trim(lower("recycling:glass")),
+    "recycling:paper"=trim(lower("recycling:paper")),
+    "recycling:clothes"=trim(lower("recycling:clothes")),
+    "recycling:scrap_metal"=trim(lower("recycling:scrap_metal")),
+    railway=trim(lower(railway)),
+    religion=trim(lower(religion)),
+    route=trim(lower(route)),
+    service=trim(lower(service)),
+    shop=trim(lower(shop)),
+    sport=trim(lower(sport)),
+    tourism=trim(lower(tourism)),
+    "tower:type"=trim(lower("tower:type")),
+    traffic_calming=trim(lower(traffic_calming)),
+    train=trim(lower(train)),
+    tram=trim(lower(tram)),
+    tunnel=trim(lower(tunnel)),
+    type=trim(lower(type)),
+    vending=trim(lower(vending)),
+    water=trim(lower(water)),
+    waterway=trim(lower(waterway)),
+    website=trim(lower(website)),
+    wetland=trim(lower(wetland)),
+    wikipedia=trim(lower(wikipedia))
+WHERE
+    (
+        "access", "addr:city", "addr:housenumber", "addr:interpolation", "addr:place", "addr:postcode", admin_level,
+        aerialway, aeroway, amenity, area, barrier, brand, bridge, boundary, building, bus, cuisine, denomination,
+        drinkable, emergency, entrance, foot, "generator:source", highway, historic, information, junction, landuse,
+        leisure, man_made, military, "natural", office, oneway, operator, phone, "power", power_source, parking,
+        place, public_transport, "recycling:glass", "recycling:paper", "recycling:clothes", "recycling:scrap_metal",
+        railway, religion, route, service, shop, sport, tourism, "tower:type", traffic_calming, train, tram, tunnel,
+        type, vending, water, waterway, website, wetland, wikipedia
+    ) IS DISTINCT FROM (
+        trim(lower("access")), trim(lower("addr:city")), lower("addr:housenumber"), lower("addr:interpolation"),
+        lower("addr:place"), lower("addr:postcode"), trim(lower(admin_level)), trim(lower(aerialway)),
+        trim(lower(aeroway)), trim(lower(amenity)), trim(lower(area)), trim(lower(barrier)), trim(lower(brand)),
+        trim(lower(bridge)), trim(lower(boundary)), trim(lower(building)), trim(lower(bus)), trim(lower(cuisine)),
+        trim(lower(denomination)), trim(lower(drinkable)), trim(lower(emergency)), trim(lower(entrance)),
+        trim(lower(foot)), trim(lower("generator:source")), trim(lower(highway)), trim(lower(historic)),
+        trim(lower(information)), trim(lower(junction)), trim(lower(landuse)), trim(lower(leisure)),
+        trim(lower(man_made)), trim(lower(military)), trim(lower("natural")), trim(lower(office)),
+        trim(lower(oneway)), trim(lower(operator)), trim(lower(phone)), trim(lower("power")),
+        trim(lower(power_source)), trim(lower(parking)), trim(lower(place)), trim(lower(public_transport)),
+        trim(lower("recycling:glass")), trim(lower("recycling:paper")), trim(lower("recycling:clothes")),
+        trim(lower("recycling:scrap_metal")), trim(lower(railway)), trim(lower(religion)), trim(lower(route)),
+        trim(lower(service)), trim(lower(shop)), trim(lower(sport)), trim(lower(tourism)),
+        trim(lower("tower:type")), trim(lower(traffic_calming)), trim(lower(train)), trim(lower(tram)),
+        trim(lower(tunnel)), trim(lower(type)), trim(lower(vending)), trim(lower(water)), trim(lower(waterway)),
+        trim(lower(website)), trim(lower(wetland)), trim(lower(wikipedia))
+    );
 
-/*lower osm_polygon*/
+/*harmonize osm_polygon*/
 UPDATE
     osm_polygon
 SET
-    "access"=lower("access"),
-    "addr:city"=lower("addr:city"),
+    "access"=trim(lower("access")),
+    "addr:city"=trim(lower("addr:city")),
     "addr:housenumber"=lower("addr:housenumber"),
     "addr:interpolation"=lower("addr:interpolation"),
     "addr:place"=lower("addr:place"),
     "addr:postcode"=lower("addr:postcode"),
-    "addr:street"=("addr:street"),
-    "addr:country"=("addr:country"),
-    admin_level=lower(admin_level),
-    aerialway=lower(aerialway),
-    aeroway=lower(aeroway),
-    amenity=lower(amenity),
-    area=lower(area),
-    barrier=lower(barrier),
-    brand=lower(brand),
-    bridge=lower(bridge),
-    boundary=lower(boundary),
-    building=lower(building),
-    bus=lower(bus),
-    cuisine=lower(cuisine),
-    denomination=lower(denomination),
-    drinkable=lower(drinkable),
-    emergency=lower(emergency),
-    entrance=lower(entrance),
-    foot= lower(foot),
-    "generator:source"=lower("generator:source"),
-    highway=lower(highway),
-    historic=lower(historic),
-    information=lower(information),
-    junction=lower(junction),
-    landuse=lower(landuse),
-    leisure=lower(leisure),
-    man_made=lower(man_made),
-    military=lower(military),
-    "natural"=lower("natural"),
-    oneway=lower(oneway),
-    operator=lower(operator),
-    phone=lower(phone),
-    "power"=lower("power"),
-    power_source=lower(power_source),
-    parking=lower(parking),
-    place=lower(place),
-    public_transport=lower(public_transport),
-    "recycling:glass"=lower("recycling:glass"),
-    "recycling:paper"=lower("recycling:paper"),
-    "recycling:clothes"=lower("recycling:clothes"),
-    "recycling:scrap_metal"=lower("recycling:scrap_metal"),
-    railway=lower(railway),
-    religion=lower(religion),
-    route=lower(route),
-    service=lower(service),
-    shop=lower(shop),
-    sport=lower(sport),
-    tourism=lower(tourism),
-    "tower:type"=lower("tower:type"),
-    traffic_calming=lower(traffic_calming),
-    train=lower(train),
-    tram=lower(tram),
-    tunnel=lower(tunnel),
-    type=lower(type),
-    vending=lower(vending),
-    water=lower(water),
-    waterway=lower(waterway),
-    website=lower(website),
-    wetland=lower(wetland),
-    wikipedia=lower(wikipedia);
-
-/*End of lowercase*/
-
-
-/*
-trim all the values in all the rows
-This excludes osm_id, osm_timestamp, all names, ele, voltage, frequency, height, population, way, contact:phone, maxspeed, oneway, opening_hours, ref, osm_version, z_order, tags
-*/
-
-
-/*trim osm_line*/
-UPDATE
-    osm_line
-SET
-    "access"=trim("access"),
-    "addr:city"=trim("addr:city"),
-    "addr:housenumber"=("addr:housenumber"),
-    "addr:interpolation"=("addr:interpolation"),
-    "addr:place"=("addr:place"),
-    "addr:postcode"=("addr:postcode"),
-    "addr:street"=("addr:street"),
-    "addr:country"=("addr:country"),
-    admin_level=trim(admin_level),
-    aerialway=trim(aerialway),
-    aeroway=trim(aeroway),
-    amenity=trim(amenity),
-    area=trim(area),
-    barrier=trim(barrier),
-    brand=trim(brand),
-    bridge=trim(bridge),
-    boundary=trim(boundary),
-    building=trim(building),
-    bus=trim(bus),
-    cuisine=trim(cuisine),
-    denomination=trim(denomination),
-    drinkable=trim(drinkable),
-    emergency=trim(emergency),
-    entrance=trim(entrance),
-    foot= trim(foot),
-    "generator:source"=trim("generator:source"),
-    highway=trim(highway),
-    historic=trim(historic),
-    information=trim(information),
-    junction=trim(junction),
-    landuse=trim(landuse),
-    leisure=trim(leisure),
-    man_made=trim(man_made),
-    military=trim(military),
-    "natural"=trim("natural"),
-    office=trim(office),
-    oneway=trim(oneway),
-    operator=trim(operator),
-    phone=trim(phone),
-    "power"=trim("power"),
-    power_source=trim(power_source),
-    parking=trim(parking),
-    place=trim(place),
-    public_transport=trim(public_transport),
-    "recycling:glass"=trim("recycling:glass"),
-    "recycling:paper"=trim("recycling:paper"),
-    "recycling:clothes"=trim("recycling:clothes"),
-    "recycling:scrap_metal"=trim("recycling:scrap_metal"),
-    railway=trim(railway),
-    religion=trim(religion),
-    route=trim(route),
-    service=trim(service),
-    shop=trim(shop),
-    sport=trim(sport),
-    tourism=trim(tourism),
-    "tower:type"=trim("tower:type"),
-    traffic_calming=trim(traffic_calming),
-    train=trim(train),
-    tram=trim(tram),
-    tunnel=trim(tunnel),
-    type=trim(type),
-    vending=trim(vending),
-    water=trim(water),
-    waterway=trim(waterway),
-    website=trim(website),
-    wetland=trim(wetland),
-    wikipedia=trim(wikipedia),
-    tracktype=trim(tracktype);
-
-/*trim osm_point*/
-UPDATE
-    osm_point
-SET
-    "access"=trim("access"),
-    "addr:city"=trim("addr:city"),
-    "addr:housenumber"=("addr:housenumber"),
-    "addr:interpolation"=("addr:interpolation"),
-    "addr:place"=("addr:place"),
-    "addr:postcode"=("addr:postcode"),
-    "addr:street"=("addr:street"),
-    "addr:country"=("addr:country"),
-    admin_level=trim(admin_level),
-    aerialway=trim(aerialway),
-    aeroway=trim(aeroway),
-    amenity=trim(amenity),
-    area=trim(area),
-    barrier=trim(barrier),
-    brand=trim(brand),
-    bridge=trim(bridge),
-    boundary=trim(boundary),
-    building=trim(building),
-    bus=trim(bus),
-    cuisine=trim(cuisine),
-    denomination=trim(denomination),
-    drinkable=trim(drinkable),
-    emergency=trim(emergency),
-    entrance=trim(entrance),
-    foot= trim(foot),
-    "generator:source"=trim("generator:source"),
-    highway=trim(highway),
-    historic=trim(historic),
-    information=trim(information),
-    junction=trim(junction),
-    landuse=trim(landuse),
-    leisure=trim(leisure),
-    man_made=trim(man_made),
-    military=trim(military),
-    "natural"=trim("natural"),
-    office=trim(office),
-    oneway=trim(oneway),
-    operator=trim(operator),
-    phone=trim(phone),
-    "power"=trim("power"),
-    power_source=trim(power_source),
-    parking=trim(parking),
-    place=trim(place),
-    public_transport=trim(public_transport),
-    "recycling:glass"=trim("recycling:glass"),
-    "recycling:paper"=trim("recycling:paper"),
-    "recycling:clothes"=trim("recycling:clothes"),
-    "recycling:scrap_metal"=trim("recycling:scrap_metal"),
-    railway=trim(railway),
-    religion=trim(religion),
-    route=trim(route),
-    service=trim(service),
-    shop=trim(shop),
-    sport=trim(sport),
-    tourism=trim(tourism),
-    "tower:type"=trim("tower:type"),
-    traffic_calming=trim(traffic_calming),
-    train=trim(train),
-    tram=trim(tram),
-    tunnel=trim(tunnel),
-    type=trim(type),
-    vending=trim(vending),
-    water=trim(water),
-    waterway=trim(waterway),
-    website=trim(website),
-    wetland=trim(wetland),
-    wikipedia=trim(wikipedia);
-
-/*trim osm_polygon*/
-UPDATE
-    osm_polygon
-SET
-    "access"=trim("access"),
-    "addr:city"=trim("addr:city"),
-    "addr:housenumber"=("addr:housenumber"),
-    "addr:interpolation"=("addr:interpolation"),
-    "addr:place"=("addr:place"),
-    "addr:postcode"=("addr:postcode"),
-    "addr:street"=("addr:street"),
-    "addr:country"=("addr:country"),
-    admin_level=trim(admin_level),
-    aerialway=trim(aerialway),
-    aeroway=trim(aeroway),
-    amenity=trim(amenity),
-    area=trim(area),
-    barrier=trim(barrier),
-    brand=trim(brand),
-    bridge=trim(bridge),
-    boundary=trim(boundary),
-    building=trim(building),
-    bus=trim(bus),
-    cuisine=trim(cuisine),
-    denomination=trim(denomination),
-    drinkable=trim(drinkable),
-    emergency=trim(emergency),
-    entrance=trim(entrance),
-    foot= trim(foot),
-    "generator:source"=trim("generator:source"),
-    highway=trim(highway),
-    historic=trim(historic),
-    information=trim(information),
-    junction=trim(junction),
-    landuse=trim(landuse),
-    leisure=trim(leisure),
-    man_made=trim(man_made),
-    military=trim(military),
-    "natural"=trim("natural"),
-    office=trim(office),
-    oneway=trim(oneway),
-    operator=trim(operator),
-    phone=trim(phone),
-    "power"=trim("power"),
-    power_source=trim(power_source),
-    parking=trim(parking),
-    place=trim(place),
-    public_transport=trim(public_transport),
-    "recycling:glass"=trim("recycling:glass"),
-    "recycling:paper"=trim("recycling:paper"),
-    "recycling:clothes"=trim("recycling:clothes"),
-    "recycling:scrap_metal"=trim("recycling:scrap_metal"),
-    railway=trim(railway),
-    religion=trim(religion),
-    route=trim(route),
-    service=trim(service),
-    shop=trim(shop),
-    sport=trim(sport),
-    tourism=trim(tourism),
-    "tower:type"=trim("tower:type"),
-    traffic_calming=trim(traffic_calming),
-    train=trim(train),
-    tram=trim(tram),
-    tunnel=trim(tunnel),
-    type=trim(type),
-    vending=trim(vending),
-    water=trim(water),
-    waterway=trim(waterway),
-    website=trim(website),
-    wetland=trim(wetland),
-    wikipedia=trim(wikipedia);
-/*End of trimcase*/
+    admin_level=trim(lower(admin_level)),
+    aerialway=trim(lower(aerialway)),
+    aeroway=trim(lower(aeroway)),
+    amenity=trim(lower(amenity)),
+    area=trim(lower(area)),
+    barrier=trim(lower(barrier)),
+    brand=trim(lower(brand)),
+    bridge=trim(lower(bridge)),
+    boundary=trim(lower(boundary)),
+    building=trim(lower(building)),
+    bus=trim(lower(bus)),
+    cuisine=trim(lower(cuisine)),
+    denomination=trim(lower(denomination)),
+    drinkable=trim(lower(drinkable)),
+    emergency=trim(lower(emergency)),
+    entrance=trim(lower(entrance)),
+    foot=trim(lower(foot)),
+    "generator:source"=trim(lower("generator:source")),
+    highway=trim(lower(highway)),
+    historic=trim(lower(historic)),
+    information=trim(lower(information)),
+    junction=trim(lower(junction)),
+    landuse=trim(lower(landuse)),
+    leisure=trim(lower(leisure)),
+    man_made=trim(lower(man_made)),
+    military=trim(lower(military)),
+    "natural"=trim(lower("natural")),
+    oneway=trim(lower(oneway)),
+    operator=trim(lower(operator)),
+    phone=trim(lower(phone)),
+    "power"=trim(lower("power")),
+    power_source=trim(lower(power_source)),
+    parking=trim(lower(parking)),
+    place=trim(lower(place)),
+    public_transport=trim(lower(public_transport)),
+    "recycling:glass"=trim(lower("recycling:glass")),
+    "recycling:paper"=trim(lower("recycling:paper")),
+    "recycling:clothes"=trim(lower("recycling:clothes")),
+    "recycling:scrap_metal"=trim(lower("recycling:scrap_metal")),
+    railway=trim(lower(railway)),
+    religion=trim(lower(religion)),
+    route=trim(lower(route)),
+    service=trim(lower(service)),
+    shop=trim(lower(shop)),
+    sport=trim(lower(sport)),
+    tourism=trim(lower(tourism)),
+    "tower:type"=trim(lower("tower:type")),
+    traffic_calming=trim(lower(traffic_calming)),
+    train=trim(lower(train)),
+    tram=trim(lower(tram)),
+    tunnel=trim(lower(tunnel)),
+    type=trim(lower(type)),
+    vending=trim(lower(vending)),
+    water=trim(lower(water)),
+    waterway=trim(lower(waterway)),
+    website=trim(lower(website)),
+    wetland=trim(lower(wetland)),
+    wikipedia=trim(lower(wikipedia)),
+    office=trim(office)
+WHERE
+    (
+        "access", "addr:city", "addr:housenumber", "addr:interpolation", "addr:place", "addr:postcode", admin_level,
+        aerialway, aeroway, amenity, area, barrier, brand, bridge, boundary, building, bus, cuisine, denomination,
+        drinkable, emergency, entrance, foot, "generator:source", highway, historic, information, junction, landuse,
+        leisure, man_made, military, "natural", oneway, operator, phone, "power", power_source, parking, place,
+        public_transport, "recycling:glass", "recycling:paper", "recycling:clothes", "recycling:scrap_metal",
+        railway, religion, route, service, shop, sport, tourism, "tower:type", traffic_calming, train, tram, tunnel,
+        type, vending, water, waterway, website, wetland, wikipedia, office
+    ) IS DISTINCT FROM (
+        trim(lower("access")), trim(lower("addr:city")), lower("addr:housenumber"), lower("addr:interpolation"),
+        lower("addr:place"), lower("addr:postcode"), trim(lower(admin_level)), trim(lower(aerialway)),
+        trim(lower(aeroway)), trim(lower(amenity)), trim(lower(area)), trim(lower(barrier)), trim(lower(brand)),
+        trim(lower(bridge)), trim(lower(boundary)), trim(lower(building)), trim(lower(bus)), trim(lower(cuisine)),
+        trim(lower(denomination)), trim(lower(drinkable)), trim(lower(emergency)), trim(lower(entrance)),
+        trim(lower(foot)), trim(lower("generator:source")), trim(lower(highway)), trim(lower(historic)),
+        trim(lower(information)), trim(lower(junction)), trim(lower(landuse)), trim(lower(leisure)),
+        trim(lower(man_made)), trim(lower(military)), trim(lower("natural")), trim(lower(oneway)),
+        trim(lower(operator)), trim(lower(phone)), trim(lower("power")), trim(lower(power_source)),
+        trim(lower(parking)), trim(lower(place)), trim(lower(public_transport)), trim(lower("recycling:glass")),
+        trim(lower("recycling:paper")), trim(lower("recycling:clothes")), trim(lower("recycling:scrap_metal")),
+        trim(lower(railway)), trim(lower(religion)), trim(lower(route)), trim(lower(service)), trim(lower(shop)),
+        trim(lower(sport)), trim(lower(tourism)), trim(lower("tower:type")), trim(lower(traffic_calming)),
+        trim(lower(train)), trim(lower(tram)), trim(lower(tunnel)), trim(lower(type)), trim(lower(vending)),
+        trim(lower(water)), trim(lower(waterway)), trim(lower(website)), trim(lower(wetland)),
+        trim(lower(wikipedia)), trim(office)
+    );
 
+/*End of harmonization*/
 
 /*Split concatenated values into seperate rows*/
 /*Split shop*/
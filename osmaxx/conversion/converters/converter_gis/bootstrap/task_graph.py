@@ -0,0 +1,45 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def run_task_graph(tasks, *, prerequisites, run, max_workers, on_done=lambda task, result: None):
+    """
+    Calls ``run`` for each task on a pool of threads, starting each task only after all its prerequisites are done.
+
+    Tasks ready at the same time are started in the order given. Thus, with a single worker, the tasks run one after
+    another in the order given, as far as the prerequisites allow.
+
+    Args:
+        tasks: the tasks, in preferred order
+        prerequisites: mapping from a task to the tasks which must be done before it can start; tasks without
+            prerequisites may be omitted
+        run: called with a task as only argument
+        max_workers: the maximum number of tasks running at the same time
+        on_done: called in the calling thread with each task that is done and what ``run`` returned for it; unlike
+            ``run``, it sees the current rq job
+
+    Raises:
+        ValueError: if the prerequisites refer to unknown tasks or are cyclic
+        Exception: the first exception raised by ``run``, after the tasks running at that time have ended; no
+            further tasks are started then
+    """
+    unknown_tasks = set().union(*prerequisites.values()).union(prerequisites) - set(tasks)
+    if unknown_tasks:
+        raise ValueError('prerequisites refer to unknown tasks {}'.format(sorted(unknown_tasks)))
+    pending = list(tasks)
+    done = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while pending or running:
+            # submitting no more tasks than there are workers leaves none queued to be started after a failure
+            ready_tasks = [task for task in pending if set(prerequisites.get(task, ())) <= done]
+            for task in ready_tasks[:max_workers - len(running)]:
+                pending.remove(task)
+                running[executor.submit(run, task)] = task
+            if not running:
+                raise ValueError('cyclic prerequisites among tasks {}'.format(pending))
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = running.pop(future)
+                result = future.result()
+                done.add(task)
+                on_done(task, result)
@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import os
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_gis.helper.default_postgres import get_default_postgres_wrapper
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateDatabase:
+    """
+    Pre-initialized database the conversion databases are cloned from using ``CREATE DATABASE ... TEMPLATE``.
+
+    The template holds the extensions and everything the given SQL scripts set up. Its name contains a fingerprint
+    of these, so the template is rebuilt whenever one of the scripts changes. Templates of former versions are
+    dropped then.
+    """
+
+    def __init__(self, *, extensions, script_paths):
+        """
+        Args:
+            extensions: names of the extensions to create
+            script_paths: SQL scripts to execute after creating the extensions, in this order
+        """
+        self._extensions = extensions
+        self._script_paths = script_paths
+
+    @property
+    def name(self):
+        return '{}{}'.format(_name_prefix(), self._fingerprint()[:16])
+
+    def ensure(self):
+        """
+        Builds the template unless it is available already.
+
+        Returns: the name of the template database
+        """
+        name = self.name
+        maintenance_postgres = _maintenance_postgres()
+        if name not in _template_database_names(maintenance_postgres):
+            self._build(name, maintenance_postgres)
+            self._remove_outdated(keep=name, maintenance_postgres=maintenance_postgres)
+        return name
+
+    def _fingerprint(self):
+        digest = hashlib.sha256()
+        for extension in self._extensions:
+            digest.update(extension.encode('utf-8'))
+        for script_path in self._script_paths:
+            digest.update(os.path.basename(script_path).encode('utf-8'))
+            with open(script_path, 'rb') as script:
+                digest.update(script.read())
+        return digest.hexdigest()
+
+    def _build(self, name, maintenance_postgres):
+        logger.info('building template database %s', name)
+        # built under a name of its own, so concurrent conversions never clone a half-built template
+        build_name = '{}_build_{}'.format(name, os.getpid())
+        postgres = get_default_postgres_wrapper(db_name=build_name)
+        postgres.drop_db()
+        postgres.create_db()
+        try:
+            for extension in self._extensions:
+                postgres.create_extension(extension)
+            for script_path in self._script_paths:
+                postgres.execute_sql_file(script_path)
+            postgres.dispose()  # no connections may remain to a database being renamed or used as template
+        except Exception:
+            postgres.drop_db()
+            raise
+        try:
+            maintenance_postgres.execute_sql_command('ALTER DATABASE "{}" RENAME TO "{}";'.format(build_name, name))
+        except Exception:
+            postgres.drop_db()
+            if name in _template_database_names(maintenance_postgres):
+                logger.info('template database %s has been built concurrently', name)
+                return
+            raise
+        maintenance_postgres.execute_sql_command(
+            'ALTER DATABASE "{}" WITH IS_TEMPLATE true ALLOW_CONNECTIONS false;'.format(name)
+        )
+
+    def _remove_outdated(self, *, keep, maintenance_postgres):
+        for name in _template_database_names(maintenance_postgres):
+            if name.startswith(keep):
+                continue
+            logger.info('dropping outdated template database %s', name)
+            try:
+                maintenance_postgres.execute_sql_command(
+                    'ALTER DATABASE "{}" WITH IS_TEMPLATE false ALLOW_CONNECTIONS true;'.format(name)
+                )
+                get_default_postgres_wrapper(db_name=name).drop_db()
+            except Exception as e:
+                logger.exception(e)
+
+
+def _name_prefix():
+    return '{}_template_'.format(CONVERSION_SETTINGS['GIS_CONVERSION_DB_NAME'])
+
+
+def _maintenance_postgres():
+    return get_default_postgres_wrapper(db_name='postgres')
+
+
+def _template_database_names(maintenance_postgres):
+    result = maintenance_postgres.execute_sql_command(
+        "SELECT datname FROM pg_database WHERE datname LIKE '{}%';".format(_name_prefix())
+    )
+    return [row[0] for row in result]
@@ -0,0 +1,106 @@
+import logging
+
+from sqlalchemy.exc import DBAPIError
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_gis.helper.default_postgres import get_default_postgres_wrapper
+
+logger = logging.getLogger(__name__)
+
+# the tables and columns the filter scripts compute labels from
+NAME_COLUMNS = {
+    'osm_point': ['name', 'int_name'],
+    'osm_line': ['name', 'int_name'],
+    'osm_polygon': ['name', 'int_name'],
+}
+BATCH_SIZE = 10000
+
+# serializes setting up the cache database among concurrent conversions
+_SETUP_LOCK_ID = 7140216
+
+
+class TransliterationCache:
+    """
+    Transliterations of names by ``osml10n_translit``, kept in a database of its own across conversions.
+
+    Before filtering, the transliterations of all names of a conversion database are copied into its
+    ``osmaxx_transliteration`` table, which ``osmaxx_translit`` reads instead of transliterating again. Names missing
+    in the cache are transliterated in bulk and added to it, so each distinct name is transliterated only once, until
+    the version of ``osml10n`` changes.
+    """
+
+    def __init__(self):
+        self._postgres = get_default_postgres_wrapper(db_name=CONVERSION_SETTINGS['TRANSLITERATION_CACHE_DB_NAME'])
+
+    def copy_to(self, postgres):
+        """
+        Fills the ``osmaxx_transliteration`` table of the database ``postgres`` connects to with the transliterations
+        of its names not contained yet.
+
+        Returns: the number of names copied
+        """
+        self._ensure()
+        copied_count = 0
+        for rows in postgres.stream_sql_command(_missing_names_sql(), batch_size=BATCH_SIZE):
+            originals, transliterations = self._transliterations(sorted(row[0] for row in rows))
+            postgres.execute_sql_command(
+                'INSERT INTO osmaxx_transliteration (original, transliterated) '
+                'SELECT * FROM unnest(CAST(:originals AS text[]), CAST(:transliterations AS text[])) '
+                'ON CONFLICT (original) DO NOTHING;',
+                originals=originals, transliterations=transliterations,
+            )
+            copied_count += len(rows)
+        return copied_count
+
+    def _transliterations(self, names):
+        # concurrent conversions insert overlapping names, which must be inserted in the same order to not deadlock
+        self._postgres.execute_sql_command(
+            'INSERT INTO transliteration (original, transliterated) '
+            'SELECT name, osml10n_translit(name) FROM unnest(CAST(:names AS text[])) AS name '
+            'WHERE NOT EXISTS (SELECT 1 FROM transliteration WHERE original = name) '
+            'ORDER BY name '
+            'ON CONFLICT (original) DO NOTHING;',
+            names=names,
+        )
+        result = self._postgres.execute_sql_command(
+            'SELECT original, transliterated FROM transliteration WHERE original = ANY(CAST(:names AS text[]));',
+            names=names,
+        )
+        rows = list(result)
+        return [row[0] for row in rows], [row[1] for row in rows]
+
+    def _ensure(self):
+        try:
+            self._postgres.create_db()
+        except DBAPIError:
+            if not self._exists():
+                raise
+            logger.info('transliteration cache database has been created concurrently')
+        self._postgres.execute_sql_command(
+            'SELECT pg_advisory_xact_lock({lock_id}); '
+            'CREATE EXTENSION IF NOT EXISTS osml10n CASCADE; '
+            'CREATE TABLE IF NOT EXISTS transliteration (original text PRIMARY KEY, transliterated text); '
+            'CREATE TABLE IF NOT EXISTS osml10n_version (version text); '
+            # transliterations of another version of osml10n may differ
+            'DELETE FROM transliteration WHERE EXISTS ('
+            '  SELECT 1 FROM osml10n_version, pg_extension WHERE extname = \'osml10n\' AND version <> extversion'
+            '); '
+            'DELETE FROM osml10n_version; '
+            'INSERT INTO osml10n_version SELECT extversion FROM pg_extension WHERE extname = \'osml10n\';'.format(
+                lock_id=_SETUP_LOCK_ID,
+            )
+        )
+
+    def _exists(self):
+        result = get_default_postgres_wrapper(db_name='postgres').execute_sql_command(
+            "SELECT 1 FROM pg_database WHERE datname = '{}';".format(self._postgres.get_db_name())
+        )
+        return result.first() is not None
+
+
+def _missing_names_sql():
+    selects = [
+        'SELECT {column} FROM {table} WHERE {column} IS NOT NULL'.format(table=table, column=column)
+        for table, columns in sorted(NAME_COLUMNS.items()) for column in columns
+    ]
+    return '{} EXCEPT SELECT original FROM osmaxx_transliteration ORDER BY 1;'.format(' UNION '.join(selects))
@@ -1,12 +1,22 @@
 import os
+import re
+import shutil
 import subprocess
+import tempfile
+import time
+from collections import OrderedDict
 
 from osmaxx.conversion._settings import CONVERSION_SETTINGS
 from osmaxx.conversion import output_format
+from osmaxx.conversion.converters.converter_gis.bootstrap.task_graph import run_task_graph
+from osmaxx.conversion.converters.converter_gis.helper.default_postgres import get_default_postgres_wrapper
+from osmaxx.conversion.converters.job_statistics import record_layer_statistics
+from osmaxx.conversion.converters.progress import heartbeat, report_progress
+from osmaxx.conversion.converters.utils import logged_check_call
 
 FORMATS = {
     output_format.FGDB: {
-        'ogr_name': 'FileGDB',
+        'ogr_name': 'OpenFileGDB',
         'extension': '.gdb',
         'extraction_options': [],
     },
@@ -25,12 +35,35 @@ FORMATS = {
         'extension': '.sqlite',
         'extraction_options': ['-dsco', 'SPATIALITE=YES', '-nlt', 'GEOMETRY']  # FIXME: Remove or change -nlt because of geometry reading problems
     },
+    output_format.FLATGEOBUF: {
+        'ogr_name': 'FlatGeobuf',
+        'extension': '.fgb',
+        'extraction_options': ['-lco', 'SPATIAL_INDEX=YES'],
+    },
+    output_format.GEOPARQUET: {
+        'ogr_name': 'Parquet',
+        'extension': '.parquet',
+        'extraction_options': ['-lco', 'COMPRESSION=ZSTD'],
+    },
 }
 
 
-def extract_to(*, to_format, output_dir, base_filename, out_srs):
+def extract_to(*, to_format, output_dir, base_filename, out_srs, db_name=None, schema='view_osmaxx'):
+    """
+    Exports the layers of ``schema`` to ``to_format``, several layers at once.
+
+    Formats storing each layer in a file of its own, like shapefiles, are written straight into a directory, one file
+    per layer. The layers of the other formats are written to datasets of their own first, which are merged into a
+    single one in the end.
+
+    With ``EXPORT_SPATIALLY_SORTED`` set, the features of each layer are written in the geohash order of their
+    centroids, so that features close to each other are close in the files as well.
+
+    Returns: the path to the exported dataset
+    """
     conversion_service_settings = CONVERSION_SETTINGS
-    db_name = conversion_service_settings['GIS_CONVERSION_DB_NAME']
+    if db_name is None:
+        db_name = conversion_service_settings['GIS_CONVERSION_DB_NAME']
     db_user = conversion_service_settings['GIS_CONVERSION_DB_USER']
     db_pass = conversion_service_settings['GIS_CONVERSION_DB_PASSWORD']
 
@@ -40,16 +73,125 @@ def extract_to(*, to_format, output_dir, base_filename, out_srs):
     extension = to_format_options['extension']
 
     output_path = os.path.join(output_dir, base_filename + extension)
+    source = 'PG:dbname={dbname} user={user} password={password} schemas={schema}'.format(
+        dbname=db_name,
+        user=db_user,
+        password=db_pass,
+        schema=schema,
+    )
+    layer_geometries = _layer_geometries(db_name, schema)
+    layers = list(layer_geometries)
+    done_layers = []
 
-    ogr2ogr_command = [
-        'ogr2ogr', '-f', str(ogr_name), output_path,
-        '-t_srs', out_srs,
-        'PG:dbname={dbname} user={user} password={password} schemas=view_osmaxx'.format(
-            dbname=db_name,
-            user=db_user,
-            password=db_pass,
-        ),
-    ]
-    ogr2ogr_command += extraction_options
-    subprocess.check_output(ogr2ogr_command)
+    def export_layer(layer, layer_path):
+        """
+        Returns: how long exporting took and the number of features exported, to be recorded in the job's thread
+        """
+        started_at = time.monotonic()
+        ogr2ogr_command = ['ogr2ogr', '-f', str(ogr_name), layer_path, '-t_srs', out_srs, source]
+        if conversion_service_settings['EXPORT_SPATIALLY_SORTED']:
+            geometry_column, geometry_type, srid = layer_geometries[layer]
+            # layers read through SQL need to be told their name, geometry type and spatial reference system
+            ogr2ogr_command += [
+                '-sql', _spatially_sorted_sql(schema, layer, geometry_column=geometry_column, srid=srid),
+                '-nln', layer, '-nlt', geometry_type, '-s_srs', 'EPSG:{}'.format(srid),
+            ]
+        else:
+            ogr2ogr_command.append(layer)
+        ogr2ogr_command += extraction_options
+        logged_check_call(ogr2ogr_command)
+        return round(time.monotonic() - started_at, 3), _feature_count(layer_path, layer)
+
+    def report_done(layer, statistics):
+        duration, feature_count = statistics
+        record_layer_statistics(layer, duration=duration, feature_count=feature_count)
+        done_layers.append(layer)
+        report_progress('export', percent=100 * len(done_layers) / len(layers))
+
+    report_progress('export', percent=0)
+    if output_format.DEFINITIONS[to_format].layer_filename_extension is not None:
+        os.makedirs(output_path)
+        _export_layers(
+            layers, run=lambda layer: export_layer(layer, os.path.join(output_path, layer + extension)),
+            on_done=report_done,
+        )
+        return output_path
+
+    with tempfile.TemporaryDirectory(dir=output_dir) as layer_dir:
+        def layer_path(layer):
+            return os.path.join(layer_dir, layer + extension)
+
+        _export_layers(layers, run=lambda layer: export_layer(layer, layer_path(layer)), on_done=report_done)
+        report_progress('export/merge')
+        shutil.move(layer_path(layers[0]), output_path)
+        layer_creation_options = _layer_creation_options(extraction_options)
+        with heartbeat():
+            for layer in layers[1:]:
+                logged_check_call(
+                    ['ogr2ogr', '-f', str(ogr_name), output_path, layer_path(layer), '-update'] + layer_creation_options
+                )
     return output_path
+
+
+def _export_layers(layers, *, run, on_done):
+    with heartbeat():  # a single large layer may take longer than the stall warning age
+        run_task_graph(
+            layers,
+            prerequisites={},
+            run=run,
+            max_workers=CONVERSION_SETTINGS['EXPORT_PARALLELISM'] or os.cpu_count(),
+            on_done=on_done,
+        )
+
+
+def _layer_geometries(db_name, schema):
+    """
+    Returns: the geometry column, type and SRID of each table and view of ``schema`` having a geometry, i.e. of each
+        layer ``ogr2ogr`` exports, ordered by layer name
+    """
+    postgres = get_default_postgres_wrapper(db_name=db_name, pool_size=1)
+    try:
+        result = postgres.execute_sql_command(
+            'SELECT f_table_name, f_geometry_column, type, srid FROM geometry_columns WHERE f_table_schema = :schema '
+            'ORDER BY f_table_name;',
+            schema=schema,
+        )
+        return OrderedDict((row[0], (row[1], row[2], row[3])) for row in result)
+    finally:
+        postgres.dispose()
+
+
+def _spatially_sorted_sql(schema, layer, *, geometry_column, srid):
+    """
+    Returns: a query of the features of ``layer`` in the geohash order of their centroids, i.e. along a Z-order curve
+    """
+    centroid = 'ST_Centroid("{}")'.format(geometry_column)
+    if srid != 4326:  # geohashes are computed from geographic coordinates
+        centroid = 'ST_Transform({}, 4326)'.format(centroid)
+    return (
+        'SELECT * FROM "{schema}"."{layer}" ORDER BY '
+        'CASE WHEN ST_IsEmpty("{geometry}") THEN NULL ELSE ST_GeoHash({centroid}) END'
+    ).format(schema=schema, layer=layer, geometry=geometry_column, centroid=centroid)
+
+
+def _layer_creation_options(extraction_options):
+    """
+    Returns: ``extraction_options`` without the dataset creation options, which only apply to new datasets
+    """
+    options = []
+    remaining_options = iter(extraction_options)
+    for option in remaining_options:
+        if option == '-dsco':
+            next(remaining_options)
+        else:
+            options.append(option)
+    return options
+
+
+def _feature_count(dataset_path, layer):
+    """
+    Returns: the number of features of ``layer`` in the dataset at ``dataset_path`` or ``None`` if unknown
+    """
+    output = subprocess.check_output(['ogrinfo', '-ro', '-so', dataset_path, layer]).decode('utf-8', errors='replace')
+    match = re.search(r'^Feature Count: (\d+)$', output, flags=re.MULTILINE)
+    return int(match.group(1)) if match else None
@@ -1,8 +1,7 @@
-import tempfile
-
+import functools
 import os
 
-import shutil
+from contextlib import contextmanager
 from enum import Enum
 from fractions import Fraction
 
@@ -12,26 +11,55 @@ from jinja2 import Environment, PackageLoader
 from rq import get_current_job
 
 from osmaxx.conversion import output_format
-from osmaxx.conversion._settings import odb_license
+from osmaxx.conversion.converters.archive import ArchiveWriter
 from osmaxx.conversion.converters.converter_gis.bootstrap import BootStrapper
+from osmaxx.conversion.converters.converter_gis.bootstrap.global_database import published_global_database
 from osmaxx.conversion.converters.converter_gis.extract.db_to_format.extract import extract_to
-from osmaxx.conversion.converters.utils import zip_folders_relative, recursive_getsize
+from osmaxx.conversion.converters.converter_gis.static_files import static_files_archive_fragment
+from osmaxx.conversion.converters.job_statistics import record_worker_environment, timed
+from osmaxx.conversion.converters.utils import recursive_getsize
+from osmaxx.conversion.converters.workspace import Workspace
+from osmaxx.utils import polyfile_helpers
 
 
 def perform_export(
         *, conversion_format, output_zip_file_path, filename_prefix, out_srs, osmosis_polygon_file_string, detail_level,
-        **__):
+        layers=None, **__):
     gis = GISConverter(
         conversion_format=conversion_format,
         output_zip_file_path=output_zip_file_path,
         base_file_name=filename_prefix,
         out_srs=out_srs,
         polyfile_string=osmosis_polygon_file_string,
-        detail_level=detail_level
+        detail_level=detail_level,
+        layers=layers,
     )
     gis.create_gis_export()
 
 
+def perform_group_export(*, exports, osmosis_polygon_file_string, detail_level, layers=None, **__):
+    """
+    Converts the area into several formats and spatial reference systems, importing and filtering its data only once.
+
+    Args:
+        exports: for each export, a dict holding its ``conversion_format``, ``output_zip_file_path``,
+            ``filename_prefix`` and ``out_srs``
+    """
+    converters = [
+        GISConverter(
+            conversion_format=export['conversion_format'],
+            output_zip_file_path=export['output_zip_file_path'],
+            base_file_name=export['filename_prefix'],
+            out_srs=export['out_srs'],
+            polyfile_string=osmosis_polygon_file_string,
+            detail_level=detail_level,
+            layers=layers,
+        )
+        for export in exports
+    ]
+    GISConverter.create_gis_exports(converters)
+
+
 QGIS_DISPLAY_SRID = 3857  # Web Mercator
 
 
@@ -43,7 +71,8 @@ class ScaleLevel(Enum):
 
 class GISConverter:
     def __init__(
-            self, *, conversion_format, output_zip_file_path, base_file_name, out_srs, polyfile_string, detail_level):
+            self, *, conversion_format, output_zip_file_path, base_file_name, out_srs, polyfile_string, detail_level,
+            layers=None):
         """
         Converts a specified pbf into the specified format.
 
@@ -51,6 +80,7 @@ class GISConverter:
             output_zip_file_path: path to where the zipped result should be stored, directory must already exist
             conversion_format: One of 'fgdb', 'shapefile', 'gpkg', 'spatialite'
             base_file_name: base for created files inside the zip file
+            layers: names of the layers to create, defaults to all layers of ``detail_level``
 
         Returns:
             the path to the resulting zip file
@@ -60,67 +90,131 @@ class GISConverter:
         self._polyfile_string = polyfile_string
         self._conversion_format = conversion_format
         self._out_srs = out_srs
-        dir = os.path.abspath(os.path.dirname(__file__))
-        self._static_directory = os.path.join(dir, 'static')
-        self._symbology_directory = os.path.join(dir, 'symbology')
-        self._env = Environment(loader=PackageLoader(__package__, os.path.join('symbology', 'templates')))
-        self._env.globals.update(zip=zip)
         self._detail_level = detail_level
-        self._start_time = None
+        self._layers = layers
 
     def create_gis_export(self):
-        self._start_time = timezone.now()
+        return self.create_gis_exports([self])[0]
 
-        _bootstrapper = BootStrapper(self._polyfile_string, detail_level=self._detail_level)
-        _bootstrapper.bootstrap()
-        geom_in_qgis_display_srs = _bootstrapper.geom.transform(QGIS_DISPLAY_SRID, clone=True)
-
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            data_dir = os.path.join(tmp_dir, 'data')
-            data_location = self._dump_gis_data(data_dir, tmp_dir)
-            unzipped_result_size = recursive_getsize(data_dir)
+    @staticmethod
+    def create_gis_exports(converters):
+        """
+        Creates the exports of ``converters`` from a single database holding their layers.
 
-            symbology_dir = os.path.join(tmp_dir, 'symbology')
-            self._dump_qgis_symbology(data_location, geom_in_qgis_display_srs, target_dir=symbology_dir)
+        All ``converters`` must convert the same area with the same detail level and layers.
+        """
+        start_time = timezone.now()
+        first_converter = converters[0]
+        record_worker_environment(tools=['osmconvert', 'osmium', 'osm2pgsql', 'ogr2ogr'])
 
-            zip_folders_relative([tmp_dir], zip_out_file_path=self._out_zip_file_path)
+        global_database = published_global_database(
+            detail_level=first_converter._detail_level, layers=first_converter._layers
+        )
+        unzipped_result_sizes = {}
+        with Workspace(with_database=global_database is None) as workspace:
+            geom = polyfile_helpers.parse_poly_string(first_converter._polyfile_string)
+            geom_in_qgis_display_srs = geom.transform(QGIS_DISPLAY_SRID, clone=True)
+
+            layers_to_export = first_converter._layers_to_export(workspace, geom, global_database=global_database)
+            with layers_to_export as (db_name, schema):
+                for index, converter in enumerate(converters):
+                    # the stages of each export are told apart by format and spatial reference system within groups
+                    stage_suffix = '' if len(converters) == 1 else '/{}/{}'.format(
+                        converter._conversion_format, converter._out_srs
+                    )
+                    unzipped_result_sizes[converter._out_zip_file_path] = converter._create_export_from(
+                        db_name, schema, workspace.path('result', str(index)),
+                        geom_in_qgis_display_srs=geom_in_qgis_display_srs, stage_suffix=stage_suffix,
+                    )
 
         job = get_current_job()
         if job:
-            total_duration = timezone.now() - self._start_time
-            job.meta['duration'] = total_duration
-            job.meta['unzipped_result_size'] = unzipped_result_size
+            job.meta['duration'] = timezone.now() - start_time
+            if len(converters) == 1:
+                job.meta['unzipped_result_size'] = unzipped_result_sizes[first_converter._out_zip_file_path]
+            else:
+                job.meta['unzipped_result_sizes'] = unzipped_result_sizes
             job.save()
-        return self._out_zip_file_path
+        return [converter._out_zip_file_path for converter in converters]
+
+    def _create_export_from(self, db_name, schema, result_dir, *, geom_in_qgis_display_srs, stage_suffix=''):
+        """
+        Exports the layers of ``schema`` to the format and spatial reference system of this converter.
+
+        Returns: the size of the exported data, without the static files
+        """
+        data_dir = os.path.join(result_dir, 'data')
+        with timed('export/{}{}'.format(self._conversion_format, stage_suffix)):
+            data_location = self._dump_gis_data(data_dir, db_name=db_name, schema=schema)
+        unzipped_result_size = recursive_getsize(data_dir)
 
-    def _dump_gis_data(self, data_dir, target_dir):
-        static_dir = os.path.join(target_dir, 'static')
+        qgis_symbology_dir = os.path.join(result_dir, 'symbology', 'QGIS')
+        with timed('symbology{}'.format(stage_suffix)):
+            self._dump_qgis_symbology(data_location, geom_in_qgis_display_srs, target_dir=qgis_symbology_dir)
+
+        with timed('zip{}'.format(stage_suffix)):
+            self._create_zip(result_dir)
+        return unzipped_result_size
+
+    @contextmanager
+    def _layers_to_export(self, workspace, geom, *, global_database):
+        """
+        Clips the layers from ``global_database`` or, if ``None``, bootstraps a database of the workspace holding them.
+
+        Yields: the database and the schema holding the layers to export
+        """
+        if global_database is not None:
+            with global_database.clipped_schema(os.path.basename(workspace.directory), geom=geom) as schema:
+                yield global_database.db_name, schema
+            return
+        work_dir = workspace.path('work')
+        os.makedirs(work_dir)
+        _bootstrapper = BootStrapper(
+            self._polyfile_string, detail_level=self._detail_level, layers=self._layers, db_name=workspace.db_name,
+            work_dir=work_dir,
+        )
+        _bootstrapper.bootstrap()
+        yield workspace.db_name, 'view_osmaxx'
+
+    def _dump_gis_data(self, data_dir, *, db_name, schema):
         os.makedirs(data_dir)
-        shutil.copytree(self._static_directory, static_dir)
-        shutil.copy(odb_license, static_dir)
         data_location = extract_to(
             to_format=self._conversion_format,
             output_dir=data_dir,
             base_filename=self._base_file_name,
-            out_srs=self._out_srs
+            out_srs=self._out_srs,
+            db_name=db_name,
+            schema=schema,
         )
         return data_location
 
     def _dump_qgis_symbology(self, data_location, geom_in_qgis_display_srs, target_dir):
-        qgis_symbology_dir = os.path.join(target_dir, 'QGIS')
-        os.makedirs(qgis_symbology_dir)
-        qgis_symbology_readme = os.path.join(self._symbology_directory, 'README.rst')
-        shutil.copy(qgis_symbology_readme, qgis_symbology_dir)
+        os.makedirs(target_dir)
         for scale_level in ScaleLevel:
-            template = self._env.get_template('OSMaxx_{}.qgs.jinja2'.format(scale_level.name.upper()))
+            template = _symbology_templates().get_template('OSMaxx_{}.qgs.jinja2'.format(scale_level.name.upper()))
             format_definition = output_format.DEFINITIONS[self._conversion_format]
             template.stream(
                 data_location=os.path.basename(data_location),
                 separator=format_definition.qgis_datasource_separator,
                 extension=format_definition.layer_filename_extension,
                 extent=geom_in_qgis_display_srs.extent
-            ).dump(os.path.join(qgis_symbology_dir, 'OSMaxx_{}.qgs'.format(scale_level.name.upper())))
-        shutil.copytree(
-            os.path.join(self._symbology_directory, 'OSMaxx_point_symbols'),
-            os.path.join(target_dir, 'OSMaxx_point_symbols'),
-        )
+            ).dump(os.path.join(target_dir, 'OSMaxx_{}.qgs'.format(scale_level.name.upper())))
+
+    def _create_zip(self, result_dir):
+        """
+        Zips the exported data and rendered QGIS projects in ``result_dir`` together with the static files, which are
+        copied from their prebuilt archive fragment instead of being compressed again.
+        """
+        with ArchiveWriter(self._out_zip_file_path) as archive:
+            archive.add_directory(result_dir)
+            archive.add_members_of(static_files_archive_fragment())
+
+
+@functools.lru_cache()
+def _symbology_templates():
+    """
+    Returns: the environment of the QGIS project templates, built once per worker process
+    """
+    env = Environment(loader=PackageLoader(__package__, os.path.join('symbology', 'templates')))
+    env.globals.update(zip=zip)
+    return env
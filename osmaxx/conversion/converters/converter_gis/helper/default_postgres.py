@@ -2,10 +2,13 @@ from osmaxx.conversion._settings import CONVERSION_SETTINGS
 from osmaxx.conversion.converters.converter_gis.helper.postgres_wrapper import Postgres
 
 
-def get_default_postgres_wrapper():
+def get_default_postgres_wrapper(db_name=None, *, pool_size=5):
     conversion_service_settings = CONVERSION_SETTINGS
+    if db_name is None:
+        db_name = conversion_service_settings['GIS_CONVERSION_DB_NAME']
     return Postgres(
         user=conversion_service_settings['GIS_CONVERSION_DB_USER'],
         password=conversion_service_settings['GIS_CONVERSION_DB_PASSWORD'],
-        db_name=conversion_service_settings['GIS_CONVERSION_DB_NAME'],
+        db_name=db_name,
+        pool_size=pool_size,
     )
@@ -1,52 +1,94 @@
-from sqlalchemy import MetaData, Table, create_engine, func
+import functools
+import logging
+import os
+import tempfile
+import threading
+
+from sqlalchemy import MetaData, Table, create_engine, func, text
 from sqlalchemy.engine.url import URL
-from sqlalchemy.sql import select, insert, expression
+from sqlalchemy.sql import select, expression
 from geoalchemy2 import Geometry, Geography
 
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_pbf.cache import CutPbfCache, cache_key
 
-class OSMBoundariesImporter:
-    def __init__(self):
-        self._osm_boundaries_tables = ['coastline_l', 'landmass_a', 'sea_a']
+OSM_BOUNDARIES_TABLES = ['coastline_l', 'landmass_a', 'sea_a']
+# the columns copied from the OSM boundaries database, the local tables have the same types
+COPIED_COLUMNS = ['ogc_fid', 'fid', 'wkb_geometry']
+# Their polygons span whole oceans and continents. The OSM boundaries database is given copies of these tables with
+# the polygons cut into pieces of at most SUBDIVISION_MAX_VERTICES vertices, named like the table plus
+# SUBDIVIDED_TABLE_SUFFIX, so intersecting them with an area only processes the pieces near it.
+SUBDIVIDED_TABLES = ['landmass_a', 'sea_a']
+SUBDIVIDED_TABLE_SUFFIX = '_subdivided'
+SUBDIVISION_MAX_VERTICES = 256
+
+# serializes building the subdivided tables among concurrent conversions
+_SUBDIVISION_LOCK_ID = 7140217
+# changes whenever the tables are recreated, truncated or have rows inserted, updated or deleted
+_TABLES_FINGERPRINT_SQL = """
+SELECT string_agg(
+  concat_ws(':', c.relname, c.relfilenode, s.n_tup_ins, s.n_tup_upd, s.n_tup_del), ',' ORDER BY c.relname
+)
+FROM pg_class c LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+WHERE c.relkind = 'r' AND c.relname = ANY(:table_names);
+"""
+
+logger = logging.getLogger(__name__)
 
-        _osm_boundaries_db_connection_parameters = dict(
-            username='osmboundaries',
-            password='osmboundaries',
-            port=5432,
-            database='osmboundaries',
-            host='osmboundaries-database',
-        )
-        osm_boundaries_db_connection = URL('postgresql', **_osm_boundaries_db_connection_parameters)
-        self._osm_boundaries_db_engine = create_engine(osm_boundaries_db_connection)
 
+class OSMBoundariesImporter:
+    def __init__(self, *, local_db_name=None):
+        self._osm_boundaries_tables = OSM_BOUNDARIES_TABLES
+        self._osm_boundaries_db_engine = _osm_boundaries_db_engine()
+
+        if local_db_name is None:
+            local_db_name = CONVERSION_SETTINGS['GIS_CONVERSION_DB_NAME']
         _local_db_connection_parameters = dict(
-            username='postgres',
-            password='postgres',
+            username=CONVERSION_SETTINGS['GIS_CONVERSION_DB_USER'],
+            password=CONVERSION_SETTINGS['GIS_CONVERSION_DB_PASSWORD'],
             port=5432,
-            database='osmaxx_db',
+            database=local_db_name,
         )
         local_db_connection = URL('postgresql', **_local_db_connection_parameters)
         self._local_db_engine = create_engine(local_db_connection)
 
-        assert Geometry, Geography  # assert classes needed for GIS-reflection are available
-        self._db_meta_data = MetaData()
-        self._table_metas = self._get_meta_tables()
-
-    def _autoinspect_tables(self, tables, autoloader):
-        return {
-            table: Table(table, self._db_meta_data, autoload=True, autoload_with=autoloader)
-            for table in tables
-        }
-
-    def _get_meta_tables(self):
-        meta_boundaries = self._autoinspect_tables(
-            tables=self._osm_boundaries_tables, autoloader=self._osm_boundaries_db_engine
-        )
-        return meta_boundaries
+        self._db_meta_data = _osm_boundaries_meta_data()
+        self._table_metas = self._db_meta_data.tables
 
     def load_area_specific_data(self, *, extent):
+        self.ensure_subdivided_tables()
         self._create_tables_on_local_db()
         self._load_boundaries_tables(extent)
 
+    def load_whole_tables(self):
+        """
+        Copies the tables as they are, without creating views clipping them.
+        """
+        self._create_tables_on_local_db()
+        for table_name in self._osm_boundaries_tables:
+            self._copy_into_local_db(table_name, 'SELECT {} FROM {}'.format(', '.join(COPIED_COLUMNS), table_name))
+
+    def ensure_subdivided_tables(self):
+        """
+        Builds the subdivided copies of ``SUBDIVIDED_TABLES`` in the OSM boundaries database, unless they have been
+        built from the current contents of these tables already.
+        """
+        with self._osm_boundaries_db_engine.begin() as connection:
+            connection.execute(text('SELECT pg_advisory_xact_lock(:lock_id);'), lock_id=_SUBDIVISION_LOCK_ID)
+            connection.execute(text('CREATE TABLE IF NOT EXISTS osmaxx_subdivision (fingerprint text);'))
+            fingerprint = connection.execute(
+                text(_TABLES_FINGERPRINT_SQL), table_names=SUBDIVIDED_TABLES
+            ).scalar()
+            if connection.execute(text('SELECT fingerprint FROM osmaxx_subdivision;')).scalar() == fingerprint:
+                return
+            for table_name in SUBDIVIDED_TABLES:
+                logger.info('subdividing %s of the OSM boundaries database', table_name)
+                connection.execute(text(subdivided_table_sql(table_name)))
+            connection.execute(text('DELETE FROM osmaxx_subdivision;'))
+            connection.execute(
+                text('INSERT INTO osmaxx_subdivision (fingerprint) VALUES (:fingerprint);'), fingerprint=fingerprint
+            )
+
     def _create_tables_on_local_db(self):
         self._db_meta_data.create_all(self._local_db_engine)
 
@@ -58,15 +100,20 @@ class OSMBoundariesImporter:
             'landmass_a': multipolygon_cast,
             'coastline_l': multilinestring_cast,
         }
+        cache = get_clipped_boundaries_cache()
+        if cache is not None:
+            dataset_version = self._osm_boundaries_db_engine.execute(
+                text(_TABLES_FINGERPRINT_SQL), table_names=self._osm_boundaries_tables
+            ).scalar()
         for table_name in self._osm_boundaries_tables:
             source_table_meta = self._table_metas[table_name]
-            query = select([
-                source_table_meta.c.ogc_fid,
-                source_table_meta.c.fid,
-                source_table_meta.c.wkb_geometry
-            ])
-            query = query.where(func.ST_Intersects(source_table_meta.c.wkb_geometry, extent.ewkt))
-            self._execute_and_insert_into_local_db(query, source_table_meta, source_engine=self._osm_boundaries_db_engine)
+            clipped_rows_sql = self._clipped_rows_sql(table_name, extent)
+            if cache is None:
+                self._copy_into_local_db(table_name, clipped_rows_sql)
+            else:
+                # the query holds the table name and the area
+                key = cache_key(clipped_rows_sql, dataset_version)
+                self._copy_into_local_db_through_cache(cache, key, table_name, clipped_rows_sql)
             from sqlalchemy_views import CreateView
             view_definition_query = select([
                 source_table_meta.c.ogc_fid,
@@ -80,7 +127,6 @@ class OSMBoundariesImporter:
             view = Table(table_name, view_meta, schema='view_osmaxx')
 
             from sqlalchemy.dialects import postgresql
-            from sqlalchemy.sql import text
             query_defintion_string = str(
                 view_definition_query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
             )
@@ -90,11 +136,163 @@ class OSMBoundariesImporter:
             create_view = CreateView(view, query_defintion_text, or_replace=True)
             self._local_db_engine.execute(create_view)
 
-    def _execute_and_insert_into_local_db(self, query, table_meta, source_engine=None):
-        query_result = source_engine.execute(query)
-        if query_result.rowcount > 0:
-            results = query_result.fetchall()
-            for result in results:
-                self._local_db_engine.execute(
-                    insert(table_meta, values=result)
-                )
+    def _clipped_rows_sql(self, table_name, extent):
+        if table_name in SUBDIVIDED_TABLES:
+            # the pieces of each polygon within the extent are cut and joined again right away
+            return clipped_pieces_sql(table_name, extent=extent)
+        return "SELECT {columns} FROM {table} WHERE ST_Intersects(wkb_geometry, ST_GeomFromEWKT('{extent}'))".format(
+            columns=', '.join(COPIED_COLUMNS), table=table_name, extent=extent.ewkt,
+        )
+
+    def _copy_into_local_db(self, table_name, query):
+        """
+        Streams the rows ``query`` selects from the OSM boundaries database into ``table_name`` of the local database,
+        using binary COPY on both ends.
+
+        The rows are passed on through a pipe while they are being read, so memory use doesn't depend on their
+        size and neither end waits for a round-trip per row.
+        """
+        copy_out_sql = _copy_out_sql(query)
+        copy_in_sql = _copy_in_sql(table_name)
+        source_connection = self._osm_boundaries_db_engine.raw_connection()
+        local_connection = self._local_db_engine.raw_connection()
+        try:
+            _copy_between(source_connection, copy_out_sql, local_connection, copy_in_sql)
+            local_connection.commit()
+        finally:
+            source_connection.close()
+            local_connection.close()
+
+    def _copy_into_local_db_through_cache(self, cache, key, table_name, query):
+        """
+        Like ``_copy_into_local_db``, but the rows are taken from ``cache`` if it holds them under ``key`` and added
+        to it otherwise.
+        """
+        def copy_out(out_path):
+            source_connection = self._osm_boundaries_db_engine.raw_connection()
+            try:
+                with open(out_path, 'wb') as out_file:
+                    source_connection.cursor().copy_expert(_copy_out_sql(query), out_file)
+            finally:
+                source_connection.close()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            rows_path = os.path.join(tmp_dir, table_name + ClippedBoundariesCache.FILENAME_EXTENSION)
+            cache.provide(key, copy_out, rows_path)
+            local_connection = self._local_db_engine.raw_connection()
+            try:
+                with open(rows_path, 'rb') as rows_file:
+                    local_connection.cursor().copy_expert(_copy_in_sql(table_name), rows_file)
+                local_connection.commit()
+            finally:
+                local_connection.close()
+
+
+def get_clipped_boundaries_cache():
+    """
+    Returns: the shared cache for clipped boundaries tables or ``None`` if caching is disabled
+    """
+    cache_directory = CONVERSION_SETTINGS['CLIPPED_BOUNDARIES_CACHE_DIRECTORY']
+    if cache_directory is None:
+        return None
+    return ClippedBoundariesCache(
+        cache_directory, max_size_in_bytes=CONVERSION_SETTINGS['CLIPPED_BOUNDARIES_CACHE_MAX_SIZE_IN_BYTES'],
+    )
+
+
+class ClippedBoundariesCache(CutPbfCache):
+    """
+    Size-bounded on-disk cache of the rows of a boundaries table clipped to an area, in PostgreSQL's binary COPY
+    format, which holds the geometries as EWKB. They are loaded into a conversion database in one COPY.
+    """
+    FILENAME_EXTENSION = '.pgcopy'
+
+
+def subdivided_table_sql(table_name):
+    """
+    Returns: SQL (re)building the subdivided copy of ``table_name`` and its spatial index
+    """
+    return (
+        'DROP TABLE IF EXISTS {subdivided_table}; '
+        'CREATE TABLE {subdivided_table} AS '
+        'SELECT ogc_fid, fid, ST_Subdivide(wkb_geometry, {max_vertices}) AS wkb_geometry FROM {table}; '
+        'CREATE INDEX ON {subdivided_table} USING gist (wkb_geometry); '
+        'ANALYZE {subdivided_table};'.format(
+            table=table_name, subdivided_table=table_name + SUBDIVIDED_TABLE_SUFFIX,
+            max_vertices=SUBDIVISION_MAX_VERTICES,
+        )
+    )
+
+
+def clipped_pieces_sql(table_name, *, extent, schema='public'):
+    """
+    Returns: SQL selecting ``ogc_fid``, ``fid`` and the multipolygon ``wkb_geometry`` of each polygon of
+        ``table_name`` intersecting ``extent``, cut to ``extent`` using the pieces of its subdivided copy
+    """
+    return (
+        "SELECT ogc_fid, fid, "
+        "ST_Multi(ST_CollectionExtract(ST_Union(ST_Intersection(wkb_geometry, {extent})), 3)) AS wkb_geometry "
+        "FROM {schema}.{subdivided_table} WHERE ST_Intersects(wkb_geometry, {extent}) "
+        "GROUP BY ogc_fid, fid".format(
+            schema=schema, subdivided_table=table_name + SUBDIVIDED_TABLE_SUFFIX,
+            extent="ST_GeomFromEWKT('{}')".format(extent.ewkt),
+        )
+    )
+
+
+def _copy_out_sql(query):
+    return 'COPY ({}) TO STDOUT WITH (FORMAT binary)'.format(query)
+
+
+def _copy_in_sql(table_name):
+    return 'COPY {table} ({columns}) FROM STDIN WITH (FORMAT binary)'.format(
+        table=table_name, columns=', '.join(COPIED_COLUMNS),
+    )
+
+
+def _copy_between(source_connection, copy_out_sql, target_connection, copy_in_sql):
+    read_fd, write_fd = os.pipe()
+    copy_out_errors = []
+
+    def copy_out():
+        try:
+            with open(write_fd, 'wb') as pipe_writer:
+                source_connection.cursor().copy_expert(copy_out_sql, pipe_writer)
+        except Exception as e:
+            copy_out_errors.append(e)
+
+    copy_out_thread = threading.Thread(target=copy_out, daemon=True)
+    copy_out_thread.start()
+    try:
+        # closing the reading end makes copy_out give up, should copying in fail
+        with open(read_fd, 'rb') as pipe_reader:
+            target_connection.cursor().copy_expert(copy_in_sql, pipe_reader)
+    finally:
+        copy_out_thread.join()
+    if copy_out_errors:
+        raise copy_out_errors[0]
+
+
+@functools.lru_cache()
+def _osm_boundaries_db_engine():
+    _osm_boundaries_db_connection_parameters = dict(
+        username='osmboundaries',
+        password='osmboundaries',
+        port=5432,
+        database='osmboundaries',
+        host='osmboundaries-database',
+    )
+    osm_boundaries_db_connection = URL('postgresql', **_osm_boundaries_db_connection_parameters)
+    return create_engine(osm_boundaries_db_connection)
+
+
+@functools.lru_cache()
+def _osm_boundaries_meta_data():
+    """
+    Returns: the tables of the OSM boundaries database, reflected once per process as they don't change
+    """
+    assert Geometry, Geography  # assert classes needed for GIS-reflection are available
+    db_meta_data = MetaData()
+    for table in OSM_BOUNDARIES_TABLES:
+        Table(table, db_meta_data, autoload=True, autoload_with=_osm_boundaries_db_engine())
+    return db_meta_data
@@ -9,7 +9,7 @@ logger = logging.getLogger()
 
 
 class Postgres:
-    def __init__(self, user, password, db_name, host=None, port=5432):
+    def __init__(self, user, password, db_name, host=None, port=5432, pool_size=5):
         self._connection_parameters = {
             'username': user,
             'password': password,
@@ -19,7 +19,7 @@ class Postgres:
         if host:
             self._connection_parameters['host'] = host
         connection_url = URL('postgresql', **self._connection_parameters)
-        self._engine = create_engine(connection_url)
+        self._engine = create_engine(connection_url, pool_size=pool_size)
 
     def execute_sql_file(self, file_path):
         try:
@@ -29,15 +29,29 @@ class Postgres:
             logger.error("exception caught while processing %s", file_path)
             raise
 
-    def execute_sql_command(self, sql):
+    def execute_sql_command(self, sql, **parameters):
         connection = self._engine.connect()
         with connection.begin():
-            result = connection.execute(sqlalchemy.text(sql))
+            result = connection.execute(sqlalchemy.text(sql), **parameters)
         return result
 
-    def create_db(self):
+    def stream_sql_command(self, sql, *, batch_size, **parameters):
+        """
+        Executes ``sql``, fetching its result through a server-side cursor instead of loading it at once.
+
+        Yields: the rows of the result, in lists of at most ``batch_size`` rows
+        """
+        with self._engine.connect() as connection, connection.begin():
+            result = connection.execution_options(stream_results=True).execute(sqlalchemy.text(sql), **parameters)
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield rows
+
+    def create_db(self, *, template=None):
         if not sql_alchemy_utils.database_exists(self._engine.url):
-            sql_alchemy_utils.create_database(self._engine.url)
+            sql_alchemy_utils.create_database(self._engine.url, template=template)
 
     def create_extension(self, extension):
         create_extension = "CREATE EXTENSION IF NOT EXISTS {extension};".format(
@@ -49,6 +63,12 @@ class Postgres:
         if sql_alchemy_utils.database_exists(self._engine.url):
             sql_alchemy_utils.drop_database(self._engine.url)
 
+    def dispose(self):
+        """
+        Closes all pooled connections to the database.
+        """
+        self._engine.dispose()
+
     def get_db_name(self):
         return self._connection_parameters['database']
 
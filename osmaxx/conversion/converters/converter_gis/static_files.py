@@ -0,0 +1,88 @@
+"""
+The files zipped into every GIS export next to its data.
+
+They are the same for all exports, so they are compressed only once into an archive fragment, whose members are copied
+into the archive of each export as they are.
+"""
+import functools
+import hashlib
+import logging
+import os
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS, odb_license
+from osmaxx.conversion.converters.archive import ArchiveWriter
+from osmaxx.conversion.converters.workspace import workspace_base_directory
+
+logger = logging.getLogger(__name__)
+
+_converter_gis_directory = os.path.abspath(os.path.dirname(__file__))
+STATIC_DIRECTORY = os.path.join(_converter_gis_directory, 'static')
+SYMBOLOGY_DIRECTORY = os.path.join(_converter_gis_directory, 'symbology')
+FRAGMENT_PREFIX = 'osmaxx_gis_static_files_'
+
+
+def static_files():
+    """
+    Returns: the path and the name within the archive of each static file
+    """
+    point_symbols_directory = os.path.join(SYMBOLOGY_DIRECTORY, 'OSMaxx_point_symbols')
+    return _files_within(STATIC_DIRECTORY, arcname='static') + [
+        (odb_license, os.path.join('static', os.path.basename(odb_license))),
+        (os.path.join(SYMBOLOGY_DIRECTORY, 'README.rst'), os.path.join('symbology', 'QGIS', 'README.rst')),
+    ] + _files_within(point_symbols_directory, arcname=os.path.join('symbology', 'OSMaxx_point_symbols'))
+
+
+def static_files_archive_fragment():
+    """
+    Builds the archive fragment holding the static files unless it is available already.
+
+    Returns: the path to the archive fragment
+    """
+    path = os.path.join(workspace_base_directory(), '{}{}.zip'.format(FRAGMENT_PREFIX, _fingerprint()[:16]))
+    if not os.path.exists(path):
+        _build(path)
+        _remove_outdated(keep=path)
+    return path
+
+
+@functools.lru_cache()
+def _fingerprint():
+    digest = hashlib.sha256()
+    digest.update(str(CONVERSION_SETTINGS['ARCHIVE_COMPRESSION_LEVEL']).encode('utf-8'))
+    for path, arcname in static_files():
+        digest.update(arcname.encode('utf-8'))
+        with open(path, 'rb') as static_file:
+            digest.update(static_file.read())
+    return digest.hexdigest()
+
+
+def _build(path):
+    logger.info('building static files archive fragment %s', path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # built under a name of its own, so concurrent conversions never copy from a half-written fragment
+    build_path = '{}.{}'.format(path, os.getpid())
+    with ArchiveWriter(build_path) as archive:
+        for static_file_path, arcname in static_files():
+            archive.add_file(static_file_path, arcname=arcname)
+    os.replace(build_path, path)
+
+
+def _remove_outdated(*, keep):
+    directory = os.path.dirname(keep)
+    for entry in os.scandir(directory):
+        if entry.name.startswith(FRAGMENT_PREFIX) and entry.name.endswith('.zip') and entry.path != keep:
+            logger.info('removing outdated static files archive fragment %s', entry.path)
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:  # removed by a concurrent conversion already
+                pass
+
+
+def _files_within(directory, *, arcname):
+    files = []
+    for root, dirs, file_names in os.walk(directory):
+        dirs.sort()
+        for file_name in sorted(file_names):
+            path = os.path.join(root, file_name)
+            files.append((path, os.path.join(arcname, os.path.relpath(path, directory))))
+    return files
@@ -0,0 +1,172 @@
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+CACHED_PBF_FILENAME_EXTENSION = '.osm.pbf'
+LOCK_FILENAME_EXTENSION = '.lock'
+
+
+def source_snapshot_identity(source_pbf_file_path, *, granularity_in_seconds):
+    """
+    Identifies the data snapshot a PBF file holds.
+
+    The planet is replaced by a slightly newer one every few minutes. To still be able to share cuts, all snapshots
+    of a file written within the same period of ``granularity_in_seconds`` are considered the same snapshot.
+    """
+    modified_at = os.path.getmtime(source_pbf_file_path)
+    return '{}:{}'.format(os.path.abspath(source_pbf_file_path), int(modified_at // granularity_in_seconds))
+
+
+def cache_key(polyfile_string, snapshot_identity):
+    digest = hashlib.sha256()
+    digest.update(polyfile_string.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(snapshot_identity.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CutPbfCache:
+    """
+    Size-bounded, content-addressed on-disk cache of cut PBF files.
+
+    Entries are published atomically and evicted least-recently-used first. Concurrent requests for the same key
+    (within one host or across hosts sharing the cache directory) wait for the first one to produce the file instead
+    of producing it again.
+
+    Subclasses caching other kinds of files override ``FILENAME_EXTENSION``.
+    """
+    FILENAME_EXTENSION = CACHED_PBF_FILENAME_EXTENSION
+
+    def __init__(self, directory, *, max_size_in_bytes):
+        self._directory = directory
+        self._max_size_in_bytes = max_size_in_bytes
+        os.makedirs(self._directory, exist_ok=True)
+
+    def provide(self, key, produce, out_path):
+        """
+        Places the PBF file cached under ``key`` at ``out_path``, producing and caching it first on a cache miss.
+
+        Args:
+            key: the cache key, see ``cache_key``
+            produce: called with a path as only argument, must write the PBF file to that path unless it has been
+                published under ``key`` meanwhile
+            out_path: where the PBF file should be placed, as hard link if possible
+        """
+        cached_path = self._cached_path(key)
+        with self.locked(key):
+            if self.contains(key):
+                logger.info('reusing cached cut %s', key)
+                os.utime(cached_path)  # mark as recently used
+            else:
+                unpublished_path = self.unpublished_path(key)
+                try:
+                    produce(unpublished_path)
+                    if os.path.exists(unpublished_path):
+                        self.publish(key, unpublished_path)
+                finally:
+                    if os.path.exists(unpublished_path):
+                        os.remove(unpublished_path)
+            _link_or_copy(cached_path, out_path)
+        try:
+            self._evict(keep=cached_path)
+        except OSError:  # the file has been placed already, housekeeping must not fail the conversion
+            logger.exception('evicting cached cuts failed')
+
+    def contains(self, key):
+        return os.path.exists(self._cached_path(key))
+
+    def unpublished_path(self, key):
+        """
+        Returns: a path on the cache's file system to produce a file at, which can then be published under ``key``
+        """
+        return '{}.{}.part'.format(self._cached_path(key), os.getpid())
+
+    def publish(self, key, unpublished_path):
+        """
+        Atomically makes the file at ``unpublished_path`` available under ``key``. The caller must hold its lock, or
+        the planet pass lock for cuts from the planet (see ``planet_pass``).
+        """
+        os.replace(unpublished_path, self._cached_path(key))
+
+    def _cached_path(self, key):
+        return os.path.join(self._directory, key + self.FILENAME_EXTENSION)
+
+    def _lock_path(self, key):
+        return os.path.join(self._directory, key + LOCK_FILENAME_EXTENSION)
+
+    @contextmanager
+    def locked(self, key, *, blocking=True):
+        """
+        Exclusive lock on ``key`` across all processes sharing the cache directory.
+
+        Lock files are removed along with evicted entries by the holder of the lock. A lock acquired on a lock file
+        removed meanwhile protects nothing anymore, so locking is retried on the current lock file then.
+
+        Yields: whether the lock has been acquired, which can only be ``False`` if ``blocking`` is ``False``
+        """
+        lock_path = self._lock_path(key)
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        while True:
+            with open(lock_path, 'w') as lock_file:
+                try:
+                    fcntl.flock(lock_file, flags)
+                except BlockingIOError:
+                    yield False
+                    return
+                if not _is_current_lock_file(lock_file, lock_path):
+                    continue
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                return
+
+    def _entries_least_recently_used_first(self):
+        entries = []
+        for entry in os.scandir(self._directory):
+            if entry.is_file() and entry.name.endswith(self.FILENAME_EXTENSION):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def _evict(self, *, keep):
+        entries = self._entries_least_recently_used_first()
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total_size <= self._max_size_in_bytes:
+                break
+            if path == keep:
+                continue
+            key = os.path.basename(path)[:-len(self.FILENAME_EXTENSION)]
+            with self.locked(key, blocking=False) as acquired:
+                if not acquired:  # currently being produced or handed out
+                    continue
+                if os.path.exists(path):  # else evicted by a concurrent process meanwhile
+                    logger.info('evicting cached cut %s', key)
+                    os.remove(path)
+                # while still holding it, see ``locked``; if evicted meanwhile, it has just been created by locking
+                os.remove(self._lock_path(key))
+            total_size -= size
+
+
+def _is_current_lock_file(lock_file, lock_path):
+    try:
+        current_stat = os.stat(lock_path)
+    except FileNotFoundError:
+        return False
+    locked_stat = os.fstat(lock_file.fileno())
+    return (current_stat.st_dev, current_stat.st_ino) == (locked_stat.st_dev, locked_stat.st_ino)
+
+
+def _link_or_copy(source_path, target_path):
+    if os.path.exists(target_path):
+        os.remove(target_path)
+    try:
+        os.link(source_path, target_path)
+    except OSError:  # e.g. cache and target on different file systems
+        shutil.copyfile(source_path, target_path)
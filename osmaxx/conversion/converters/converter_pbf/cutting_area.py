@@ -0,0 +1,77 @@
+"""
+Reduces the complexity of clipping areas before PBF files are cut along them.
+
+Cutting tests every node against the clipping polygon, so its cost grows with the number of polygon vertices.
+Rectangles can be cut by bounding box instead, other areas are replaced by a simpler area completely including them.
+"""
+from math import cos, pi
+
+from django.contrib.gis.geos import MultiPolygon
+
+from osmaxx.clipping_area.to_polyfile import create_poly_file_string
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.utils.polyfile_helpers import parse_poly_string
+
+BUFFER_SEGMENTS_PER_QUADRANT = 2
+RELATIVE_RECTANGLE_AREA_TOLERANCE = 1e-9
+
+
+def cutting_polyfile_string(polyfile_string):
+    """
+    Returns: the polyfile string of the area to cut along in order to get all data within ``polyfile_string``
+    """
+    geom = parse_poly_string(polyfile_string)
+    reduced_geom = with_capped_vertex_count(geom, max_vertices=CONVERSION_SETTINGS['CUTTING_AREA_MAX_VERTICES'])
+    if reduced_geom is geom:
+        return polyfile_string
+    return create_poly_file_string(reduced_geom)
+
+
+def rectangle_bbox(geom):
+    """
+    Returns: ``(min_lon, min_lat, max_lon, max_lat)`` if ``geom`` is an axis-parallel rectangle, ``None`` otherwise
+    """
+    if len(geom) != 1 or geom[0].num_interior_rings != 0:
+        return None
+    envelope_area = geom.envelope.area
+    if envelope_area == 0 or envelope_area - geom.area > envelope_area * RELATIVE_RECTANGLE_AREA_TOLERANCE:
+        return None
+    return geom.extent
+
+
+def with_capped_vertex_count(geom, *, max_vertices):
+    """
+    Simplifies ``geom`` to at most ``max_vertices`` vertices, without losing any of the area enclosed by it.
+
+    Like ``Excerpt.simplified_buffered``, the area is first simplified and then buffered by (at least) the
+    simplification tolerance, which guarantees that the result completely includes ``geom``. The tolerance is doubled
+    until the result is simple enough. If no such tolerance is found, the bounding box is used.
+
+    Args:
+        geom: MultiPolygon in WGS 84
+        max_vertices: the maximum number of vertices of the result
+
+    Returns: ``geom`` itself if it is simple enough already, a MultiPolygon including it otherwise
+    """
+    if geom.num_coords <= max_vertices:
+        return geom
+    min_lon, min_lat, max_lon, max_lat = geom.extent
+    extent_size = max(max_lon - min_lon, max_lat - min_lat)
+    tolerance = extent_size / (4 * max_vertices)
+    while tolerance < extent_size:
+        reduced_geom = _simplified_buffered(geom, tolerance)
+        if reduced_geom.num_coords <= max_vertices and reduced_geom.contains(geom):
+            return reduced_geom
+        tolerance *= 2
+    return MultiPolygon(geom.envelope, srid=geom.srid)
+
+
+def _simplified_buffered(geom, tolerance):
+    simplified = geom.simplify(tolerance=tolerance, preserve_topology=True)
+    # The buffer's arcs are approximated by chords lying inside them. Enlarging the radius such that the chords
+    # touch the original arc keeps every point within the tolerance of the simplified area covered.
+    buffer_width = tolerance / cos(pi / (4 * BUFFER_SEGMENTS_PER_QUADRANT))
+    buffered = simplified.buffer(buffer_width, quadsegs=BUFFER_SEGMENTS_PER_QUADRANT)
+    if not isinstance(buffered, MultiPolygon):
+        buffered = MultiPolygon(buffered, srid=geom.srid)
+    return buffered
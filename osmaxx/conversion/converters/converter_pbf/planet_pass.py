@@ -0,0 +1,162 @@
+"""
+Coalesces the planet cuts of queued conversions into a single sequential pass over the planet.
+
+When a conversion is enqueued, its clipping polygon is registered as pending cut. A conversion that actually needs
+to cut from the planet waits for a short window, then takes the planet pass lock, claims all pending areas that are
+still uncut and cuts them together with its own area in one ``osmium extract`` run, publishing the additional cuts
+into the cut PBF cache. Conversions waiting for the lock meanwhile find their cut in the cache once they get it,
+instead of scanning the planet again.
+
+Every cut from the planet is produced while holding the planet pass lock, so a pass can publish the cuts it claimed
+without taking their keys' locks, which their owners might be holding while waiting for the pass.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_pbf.cache import cache_key
+from osmaxx.conversion.converters.converter_pbf.cutting_area import cutting_polyfile_string
+from osmaxx.conversion.converters.progress import check_call_reporting_progress
+
+logger = logging.getLogger(__name__)
+
+PENDING_CUTS_KEY = 'osmaxx:pending_planet_cuts'
+PENDING_CUTS_REGISTRATION_KEY = 'osmaxx:pending_planet_cuts:registered_at'
+PLANET_PASS_LOCK_NAME = 'planet-pass'
+
+
+def is_enabled():
+    return CONVERSION_SETTINGS['PLANET_PASS_COALESCING_WINDOW'] is not None and \
+        CONVERSION_SETTINGS['PBF_CACHE_DIRECTORY'] is not None
+
+
+def register_pending_cut(polyfile_string):
+    """
+    Announces that a conversion for this area has been enqueued and will need a cut PBF.
+    """
+    if not is_enabled():
+        return
+    polyfile_string = cutting_polyfile_string(polyfile_string)  # what the conversion will actually cut along
+    field = _polygon_hash(polyfile_string)
+    pipeline = _redis().pipeline()
+    pipeline.hset(PENDING_CUTS_KEY, field, polyfile_string)
+    pipeline.zadd(PENDING_CUTS_REGISTRATION_KEY, {field: time.time()})
+    pipeline.execute()
+
+
+def cut_together_with_pending(polyfile_string, pbf_out_path, *, cache, snapshot_identity):
+    """
+    Cuts ``polyfile_string`` from the planet into ``pbf_out_path`` and, in the same pass, all pending areas into the
+    cache.
+
+    If another pass has cut ``polyfile_string`` into the cache meanwhile, nothing is written to ``pbf_out_path``.
+
+    Args:
+        polyfile_string: the area to cut
+        pbf_out_path: where to write the cut of ``polyfile_string`` to
+        cache: ``CutPbfCache`` to publish the other cuts into
+        snapshot_identity: identity of the planet snapshot, as used for the cache keys
+    """
+    own_key = cache_key(polyfile_string, snapshot_identity)
+    # give conversions enqueued shortly after this one the chance to register, without blocking any running pass
+    time.sleep(CONVERSION_SETTINGS['PLANET_PASS_COALESCING_WINDOW'].total_seconds())
+    with cache.locked(PLANET_PASS_LOCK_NAME):
+        if cache.contains(own_key):
+            logger.info('area has been cut by a previous pass over the planet')
+            return
+        _deregister(polyfile_string)
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(pbf_out_path)) as tmp_dir:
+            extracts = [(polyfile_string, pbf_out_path)]
+            other_keys = []
+            for pending_polyfile_string in _pop_pending_planet_cuts():
+                key = cache_key(pending_polyfile_string, snapshot_identity)
+                if key == own_key or key in other_keys or cache.contains(key):
+                    continue
+                other_keys.append(key)
+                extracts.append((pending_polyfile_string, cache.unpublished_path(key)))
+
+            logger.info('cutting %d areas in one pass over the planet', len(extracts))
+            try:
+                _multi_extract(extracts, tmp_dir)
+                for key, (_, unpublished_path) in zip(other_keys, extracts[1:]):
+                    cache.publish(key, unpublished_path)
+            finally:
+                for _, unpublished_path in extracts[1:]:
+                    if os.path.exists(unpublished_path):
+                        os.remove(unpublished_path)
+
+
+def _multi_extract(extracts, tmp_dir):
+    config = dict(extracts=[])
+    for index, (polyfile_string, out_path) in enumerate(extracts):
+        polyfile_path = os.path.join(tmp_dir, '{}.poly'.format(index))
+        with open(polyfile_path, 'w') as polyfile:
+            polyfile.write(polyfile_string)
+        config['extracts'].append(dict(
+            output=out_path,
+            output_format='pbf',
+            polygon=dict(file_name=polyfile_path, file_type='poly'),
+        ))
+    config_path = os.path.join(tmp_dir, 'extracts.json')
+    with open(config_path, 'w') as config_file:
+        json.dump(config, config_file)
+    check_call_reporting_progress([
+        'osmium', 'extract',
+        '--config', config_path,
+        '--strategy', 'smart',  # complete ways and multipolygon relations, like osmconvert's --complete-ways
+        '--overwrite',
+        '--no-progress',
+        CONVERSION_SETTINGS['PBF_PLANET_FILE_PATH'],
+    ], stage='planet pass', input_file_path=CONVERSION_SETTINGS['PBF_PLANET_FILE_PATH'])
+
+
+def _pop_pending_planet_cuts():
+    """
+    Removes and returns the pending areas that are not covered by a pre-extract, oldest first.
+    """
+    from osmaxx.conversion.converters.converter_pbf.pre_extracts import smallest_containing_pbf_path
+    from osmaxx.utils.polyfile_helpers import parse_poly_string
+
+    redis = _redis()
+    oldest_relevant = time.time() - CONVERSION_SETTINGS['PLANET_PASS_PENDING_CUT_TTL'].total_seconds()
+    expired_fields = redis.zrangebyscore(PENDING_CUTS_REGISTRATION_KEY, '-inf', oldest_relevant)
+    if expired_fields:
+        _remove_fields(expired_fields)
+
+    fields = redis.zrange(PENDING_CUTS_REGISTRATION_KEY, 0, CONVERSION_SETTINGS['PLANET_PASS_MAX_EXTRACTS'] - 2)
+    if not fields:
+        return []
+    polyfile_strings = redis.hmget(PENDING_CUTS_KEY, fields)
+    _remove_fields(fields)
+    polyfile_strings = [
+        polyfile_string.decode('utf-8') for polyfile_string in polyfile_strings if polyfile_string is not None
+    ]
+    planet_file_path = CONVERSION_SETTINGS['PBF_PLANET_FILE_PATH']
+    return [
+        polyfile_string for polyfile_string in polyfile_strings
+        if smallest_containing_pbf_path(parse_poly_string(polyfile_string)) == planet_file_path
+    ]
+
+
+def _deregister(polyfile_string):
+    _remove_fields([_polygon_hash(polyfile_string)])
+
+
+def _remove_fields(fields):
+    pipeline = _redis().pipeline()
+    pipeline.hdel(PENDING_CUTS_KEY, *fields)
+    pipeline.zrem(PENDING_CUTS_REGISTRATION_KEY, *fields)
+    pipeline.execute()
+
+
+def _polygon_hash(polyfile_string):
+    return hashlib.sha256(polyfile_string.encode('utf-8')).hexdigest()
+
+
+def _redis():
+    import django_rq
+    return django_rq.get_connection()
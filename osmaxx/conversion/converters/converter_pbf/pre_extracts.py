@@ -0,0 +1,179 @@
+import json
+import logging
+import os
+import time
+
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from memoize import mproperty
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.utils import polyfile_helpers
+
+logger = logging.getLogger(__name__)
+
+PRE_EXTRACT_FILENAME_EXTENSION = '.osm.pbf'
+PRE_EXTRACT_INDEX_FILE_NAME = 'index.json'
+
+
+class PreExtract:
+    """
+    A regional excerpt of the planet, cut along one of the polyfiles shipped in ``POLYFILE_LOCATION``.
+
+    Polyfiles in a subdirectory (e.g. ``Germany/Berlin.poly``) are nested within a pre-extract named after the
+    subdirectory (e.g. ``Germany``), whose area is the union of all polyfiles within that subdirectory.
+
+    Pre-extracts are cut with complete ways and complex relations, so any area lying entirely within a pre-extract's
+    polygon can be cut from the (much smaller) pre-extract instead of from the planet without losing data.
+    """
+
+    def __init__(self, relative_name, *, source_polyfile_path=None, children=()):
+        self.relative_name = relative_name
+        self._source_polyfile_path = source_polyfile_path
+        self.children = list(children)
+        self.parent = None
+        for child in self.children:
+            child.parent = self
+
+    @mproperty
+    def geom(self):
+        if self._source_polyfile_path is not None:
+            with open(self._source_polyfile_path) as poly_file:
+                return polyfile_helpers.parse_poly(poly_file.readlines())
+        polygons = [polygon for child in self.children for polygon in child.geom]
+        union = MultiPolygon(*polygons, srid=4326).unary_union
+        if isinstance(union, Polygon):
+            union = MultiPolygon(union, srid=4326)
+        return union
+
+    @property
+    def pbf_path(self):
+        return os.path.join(
+            CONVERSION_SETTINGS['PRE_EXTRACT_DIRECTORY'], self.relative_name + PRE_EXTRACT_FILENAME_EXTENSION
+        )
+
+    @property
+    def polyfile_path(self):
+        """
+        Location of the polyfile this pre-extract has been cut along, next to the pre-extract itself.
+        """
+        return os.path.join(
+            CONVERSION_SETTINGS['PRE_EXTRACT_DIRECTORY'],
+            self.relative_name + polyfile_helpers.POLYFILE_FILENAME_EXTENSION,
+        )
+
+    @property
+    def source_pbf_path(self):
+        """
+        The file this pre-extract is cut from: its parent's pre-extract if that one is up to date, else the planet.
+        """
+        if self.parent is not None and self.parent.is_available():
+            return self.parent.pbf_path
+        return CONVERSION_SETTINGS['PBF_PLANET_FILE_PATH']
+
+    def is_available(self):
+        """
+        Returns: ``True`` if the pre-extract has been built and is recent enough to be used as cutting source
+        """
+        try:
+            modified_at = os.path.getmtime(self.pbf_path)
+        except FileNotFoundError:
+            return False
+        age_in_seconds = time.time() - modified_at
+        return age_in_seconds <= CONVERSION_SETTINGS['PRE_EXTRACT_MAX_AGE'].total_seconds()
+
+    def published_geom(self):
+        with open(self.polyfile_path) as poly_file:
+            return polyfile_helpers.parse_poly(poly_file.readlines())
+
+    def __str__(self):
+        return self.relative_name
+
+
+def pre_extract_hierarchy(polyfile_location=None):
+    """
+    Builds the pre-extract hierarchy from the polyfiles and their directory structure.
+
+    Args:
+        polyfile_location: directory to search for polyfiles, defaults to ``POLYFILE_LOCATION``
+
+    Returns: a list of all pre-extracts, ordered such that parents always come before their children
+    """
+    if polyfile_location is None:
+        from osmaxx.excerptexport._settings import POLYFILE_LOCATION
+        polyfile_location = POLYFILE_LOCATION
+    hierarchy = []
+
+    def _flatten(pre_extracts):
+        for pre_extract in pre_extracts:
+            hierarchy.append(pre_extract)
+            _flatten(pre_extract.children)
+
+    _flatten(_pre_extracts_in(polyfile_location, relative_directory=''))
+    return hierarchy
+
+
+def _pre_extracts_in(directory, *, relative_directory):
+    pre_extracts = []
+    for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+        relative_path = os.path.join(relative_directory, entry.name)
+        if entry.is_dir():
+            children = _pre_extracts_in(entry.path, relative_directory=relative_path)
+            if children:
+                pre_extracts.append(PreExtract(relative_path, children=children))
+        elif entry.name.endswith(polyfile_helpers.POLYFILE_FILENAME_EXTENSION):
+            relative_name = relative_path[:-len(polyfile_helpers.POLYFILE_FILENAME_EXTENSION)]
+            pre_extracts.append(PreExtract(relative_name, source_polyfile_path=entry.path))
+    return pre_extracts
+
+
+def write_index(pre_extracts):
+    """
+    Records name and extent of each pre-extract, so jobs only need to parse the polygons of likely candidates.
+    """
+    index = [
+        dict(relative_name=pre_extract.relative_name, extent=list(pre_extract.geom.extent))
+        for pre_extract in pre_extracts
+    ]
+    index_path = os.path.join(CONVERSION_SETTINGS['PRE_EXTRACT_DIRECTORY'], PRE_EXTRACT_INDEX_FILE_NAME)
+    unpublished_index_path = index_path + '.part'
+    with open(unpublished_index_path, 'w') as index_file:
+        json.dump(index, index_file)
+    os.replace(unpublished_index_path, index_path)
+
+
+def _read_index():
+    index_path = os.path.join(CONVERSION_SETTINGS['PRE_EXTRACT_DIRECTORY'], PRE_EXTRACT_INDEX_FILE_NAME)
+    try:
+        with open(index_path) as index_file:
+            return json.load(index_file)
+    except FileNotFoundError:
+        return []
+
+
+def _extent_contains(outer_extent, inner_extent):
+    outer_xmin, outer_ymin, outer_xmax, outer_ymax = outer_extent
+    inner_xmin, inner_ymin, inner_xmax, inner_ymax = inner_extent
+    return outer_xmin <= inner_xmin and outer_ymin <= inner_ymin and \
+        inner_xmax <= outer_xmax and inner_ymax <= outer_ymax
+
+
+def smallest_containing_pbf_path(geom):
+    """
+    Finds the smallest available cutting source that fully contains the given area.
+
+    Args:
+        geom: the clipping area as django.contrib.gis.geos.MultiPolygon
+
+    Returns:
+        path to the smallest up-to-date pre-extract containing ``geom``, or to the planet if there is none
+    """
+    candidates = [
+        PreExtract(entry['relative_name']) for entry in _read_index()
+        if _extent_contains(entry['extent'], geom.extent)
+    ]
+    available_candidates = [pre_extract for pre_extract in candidates if pre_extract.is_available()]
+    for pre_extract in sorted(available_candidates, key=lambda pre_extract: os.path.getsize(pre_extract.pbf_path)):
+        if pre_extract.published_geom().contains(geom):
+            logger.info('cutting from pre-extract %s instead of the planet', pre_extract)
+            return pre_extract.pbf_path
+    return CONVERSION_SETTINGS['PBF_PLANET_FILE_PATH']
@@ -1,5 +1,4 @@
 import os
-import shutil
 import tempfile
 
 from django.utils import timezone
@@ -7,45 +6,103 @@ from django.utils import timezone
 from rq import get_current_job
 
 from osmaxx.conversion._settings import CONVERSION_SETTINGS, odb_license
-from osmaxx.conversion.converters.utils import zip_folders_relative, recursive_getsize, logged_check_call
+from osmaxx.conversion.converters.archive import ArchiveWriter
+from osmaxx.conversion.converters.converter_pbf import planet_pass
+from osmaxx.conversion.converters.converter_pbf.cache import CutPbfCache, cache_key, source_snapshot_identity
+from osmaxx.conversion.converters.converter_pbf.cutting_area import cutting_polyfile_string, rectangle_bbox
+from osmaxx.conversion.converters.converter_pbf.pre_extracts import smallest_containing_pbf_path
+from osmaxx.conversion.converters.job_statistics import record_planet_snapshot, record_worker_environment, timed
+from osmaxx.conversion.converters.progress import check_call_reporting_progress
+from osmaxx.conversion.converters.utils import recursive_getsize
+from osmaxx.conversion.converters.workspace import Workspace
+from osmaxx.utils import polyfile_helpers
 
 
-def cut_area_from_pbf(pbf_result_file_path, extent_polyfile_path):
+def cut_area_from_pbf(pbf_result_file_path, extent_polyfile_path, source_pbf_file_path=None):
+    _osmconvert_cut(pbf_result_file_path, "-B={}".format(extent_polyfile_path), source_pbf_file_path)
+
+
+def cut_bbox_from_pbf(pbf_result_file_path, bbox, source_pbf_file_path=None):
+    _osmconvert_cut(pbf_result_file_path, "-b={},{},{},{}".format(*bbox), source_pbf_file_path)
+
+
+def _osmconvert_cut(pbf_result_file_path, clipping_argument, source_pbf_file_path):
+    if source_pbf_file_path is None:
+        source_pbf_file_path = CONVERSION_SETTINGS["PBF_PLANET_FILE_PATH"]
     command = [
         "osmconvert",
         "--out-pbf",
         "--complete-ways",
         "--complex-ways",
         "-o={}".format(pbf_result_file_path),
-        "-B={}".format(extent_polyfile_path),
-        "{}".format(CONVERSION_SETTINGS["PBF_PLANET_FILE_PATH"]),
+        clipping_argument,
+        "{}".format(source_pbf_file_path),
     ]
-    logged_check_call(command)
+    check_call_reporting_progress(command, stage='cut', input_file_path=source_pbf_file_path)
 
 
 def cut_pbf_along_polyfile(polyfile_string, pbf_out_path):
-    with tempfile.NamedTemporaryFile('w') as polyfile:
-        polyfile.write(polyfile_string)
-        polyfile.flush()
-        os.fsync(polyfile)
-        cut_area_from_pbf(pbf_out_path, polyfile.name)
+    polyfile_string = cutting_polyfile_string(polyfile_string)
+    cutting_geom = polyfile_helpers.parse_poly_string(polyfile_string)
+    source_pbf_file_path = smallest_containing_pbf_path(cutting_geom)
+    record_planet_snapshot(source_pbf_file_path)
+    bbox = rectangle_bbox(cutting_geom)
+
+    def cut(out_path):
+        if bbox is not None:
+            cut_bbox_from_pbf(out_path, bbox, source_pbf_file_path=source_pbf_file_path)
+            return
+        with tempfile.NamedTemporaryFile('w') as polyfile:
+            polyfile.write(polyfile_string)
+            polyfile.flush()
+            os.fsync(polyfile)
+            cut_area_from_pbf(out_path, polyfile.name, source_pbf_file_path=source_pbf_file_path)
+
+    cache = get_cut_pbf_cache()
+    if cache is None:
+        cut(pbf_out_path)
+        return
+    granularity_in_seconds = CONVERSION_SETTINGS['PBF_CACHE_SNAPSHOT_GRANULARITY'].total_seconds()
+    snapshot_identity = source_snapshot_identity(source_pbf_file_path, granularity_in_seconds=granularity_in_seconds)
+    key = cache_key(polyfile_string, snapshot_identity)
+
+    def cut_in_planet_pass(out_path):
+        planet_pass.cut_together_with_pending(
+            polyfile_string, out_path, cache=cache, snapshot_identity=snapshot_identity
+        )
+
+    is_planet_cut = source_pbf_file_path == CONVERSION_SETTINGS['PBF_PLANET_FILE_PATH']
+    cache.provide(key, cut_in_planet_pass if is_planet_cut and planet_pass.is_enabled() else cut, pbf_out_path)
+
+
+def get_cut_pbf_cache():
+    """
+    Returns: the shared cache for cut PBF files or ``None`` if caching is disabled
+    """
+    cache_directory = CONVERSION_SETTINGS['PBF_CACHE_DIRECTORY']
+    if cache_directory is None:
+        return None
+    return CutPbfCache(cache_directory, max_size_in_bytes=CONVERSION_SETTINGS['PBF_CACHE_MAX_SIZE_IN_BYTES'])
 
 
 def produce_pbf(*, output_zip_file_path, filename_prefix, osmosis_polygon_file_string, **__):
     _start_time = timezone.now()
+    record_worker_environment(tools=['osmconvert', 'osmium'])
 
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        out_dir = os.path.join(tmp_dir, 'pbf')
+    with Workspace() as workspace:
+        out_dir = workspace.path('pbf')
         os.makedirs(out_dir, exist_ok=True)
         pbf_out_path = os.path.join(out_dir, filename_prefix + '.pbf')
 
-        shutil.copy(odb_license, out_dir)
-
-        cut_pbf_along_polyfile(osmosis_polygon_file_string, pbf_out_path)
+        with timed('cut'):
+            cut_pbf_along_polyfile(osmosis_polygon_file_string, pbf_out_path)
 
         unzipped_result_size = recursive_getsize(out_dir)
 
-        zip_folders_relative([tmp_dir], output_zip_file_path)
+        with timed('zip'):
+            with ArchiveWriter(output_zip_file_path) as archive:
+                archive.add_directory(out_dir, arcname='pbf')
+                archive.add_file(odb_license, arcname=os.path.join('pbf', os.path.basename(odb_license)))
 
     job = get_current_job()
     if job:
@@ -0,0 +1,125 @@
+"""
+Records how a conversion went in the meta data of the current rq job, for the result harvester to persist it.
+
+    job.meta['stage_durations']     # seconds each stage took, by stage name, in the order the stages ended
+    job.meta['layer_statistics']    # seconds exporting each layer took and its number of features, by layer name
+    job.meta['worker_host']         # the host the conversion ran on
+    job.meta['planet_snapshot']     # the PBF file the data has been cut from and when it has been written
+    job.meta['tool_versions']       # versions of the external tools used, by tool name
+
+Outside of rq jobs, nothing is recorded.
+"""
+import datetime
+import functools
+import logging
+import os
+import socket
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from rq import get_current_job
+
+logger = logging.getLogger(__name__)
+
+_path_to_commandline_utils = os.path.join(os.path.dirname(__file__), 'converter_garmin', 'command_line_utils')
+
+TOOL_VERSION_COMMANDS = {
+    'osmconvert': ['osmconvert', '--help'],
+    'osmium': ['osmium', '--version'],
+    'osm2pgsql': ['osm2pgsql', '--version'],
+    'ogr2ogr': ['ogr2ogr', '--version'],
+    'splitter': ['java', '-jar', os.path.join(_path_to_commandline_utils, 'splitter', 'splitter.jar'), '--version'],
+    'mkgmap': ['java', '-jar', os.path.join(_path_to_commandline_utils, 'mkgmap', 'mkgmap.jar'), '--version'],
+}
+
+_meta_lock = threading.Lock()
+
+
+@contextmanager
+def timed(stage):
+    """
+    Records how long the enclosed block takes as duration of ``stage``.
+
+    Only records anything in the thread running the rq job, as only that one knows the job. Stages running on other
+    threads are measured there and recorded through ``record_stage_duration`` once they are done, e.g. through the
+    ``on_done`` callback of ``run_task_graph``.
+    """
+    started_at = time.monotonic()
+    yield
+    record_stage_duration(stage, round(time.monotonic() - started_at, 3))
+
+
+def record_stage_duration(stage, duration):
+    """
+    Records ``duration`` seconds as duration of ``stage``. Must be called in the thread running the rq job.
+    """
+    job = get_current_job()
+    if job is None:
+        return
+    with _meta_lock:
+        # replaced instead of updated, as the meta data may be being saved in another thread
+        stage_durations = OrderedDict(job.meta.get('stage_durations', ()))
+        stage_durations[stage] = duration
+        job.meta['stage_durations'] = stage_durations
+
+
+def record_layer_statistics(layer, *, duration, feature_count):
+    """
+    Records how long exporting ``layer`` took and how many features it has.
+
+    Must be called in the thread running the rq job, as only that one knows the job. Layers exported on other threads
+    are recorded once they are done, e.g. through the ``on_done`` callback of ``run_task_graph``.
+    """
+    job = get_current_job()
+    if job is None:
+        return
+    with _meta_lock:
+        layer_statistics = OrderedDict(job.meta.get('layer_statistics', ()))
+        layer_statistics[layer] = {'duration': duration, 'feature_count': feature_count}
+        job.meta['layer_statistics'] = layer_statistics
+
+
+def record_worker_environment(*, tools):
+    """
+    Records the host the conversion runs on and the versions of ``tools``.
+
+    Args:
+        tools: names of the external tools the conversion uses, see ``TOOL_VERSION_COMMANDS``
+    """
+    job = get_current_job()
+    if job is None:
+        return
+    with _meta_lock:
+        job.meta['worker_host'] = socket.gethostname()
+        job.meta['tool_versions'] = {tool: _tool_version(tool) for tool in tools}
+
+
+def record_planet_snapshot(source_pbf_file_path):
+    """
+    Records which snapshot of the OSM data the conversion is based on.
+    """
+    job = get_current_job()
+    if job is None:
+        return
+    modified_at = datetime.datetime.fromtimestamp(os.path.getmtime(source_pbf_file_path), tz=datetime.timezone.utc)
+    with _meta_lock:
+        job.meta['planet_snapshot'] = '{} ({})'.format(source_pbf_file_path, modified_at.isoformat())
+
+
+@functools.lru_cache()
+def _tool_version(tool):
+    """
+    Returns: the first line the tool writes when asked for its version or ``None`` if it can't be run
+    """
+    try:
+        output = subprocess.run(
+            TOOL_VERSION_COMMANDS[tool], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=60,
+        ).stdout.decode('utf-8', errors='replace')
+    except (OSError, subprocess.TimeoutExpired):
+        logger.exception('could not determine the version of %s', tool)
+        return None
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    return lines[0] if lines else None
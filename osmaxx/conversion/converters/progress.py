@@ -0,0 +1,281 @@
+"""
+Publishes the progress of the conversion running in the current rq job into the job's meta data.
+
+The record is stored as ``job.meta['progress']``:
+
+    {
+        'stage': 'import',              # what the conversion currently does
+        'percent': 42.0,                # done within the stage, if known
+        'eta': timedelta(minutes=3),    # remaining time of the stage, if known
+        'started_at': datetime,         # when the stage started
+        'changed_at': datetime,         # when the stage last advanced, stays put while it is stuck
+        'updated_at': datetime,         # when the record was last written
+        ...                             # stage specific details, e.g. the number of nodes imported so far
+    }
+
+The progress of some stages, e.g. long SQL statements, can't be measured. While they run within ``heartbeat``, their
+``changed_at`` is kept current for as long as the conversion is alive instead.
+"""
+import codecs
+import collections
+import logging
+import os
+import re
+import subprocess
+import threading
+from contextlib import contextmanager
+
+from django.utils import timezone
+from rq import get_current_job
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.utils import logged_check_call
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_TAIL_LINE_COUNT = 50
+_LINE_SEPARATOR_PATTERN = re.compile(r'[\r\n]')
+
+# the record of the stage each job running in this process is in, so the stage's start is kept across reports
+_current_records = {}
+_current_records_lock = threading.Lock()
+
+
+def report_progress(stage, *, percent=None, **details):
+    """
+    Publishes the progress of a stage not running an external tool. Does nothing outside of rq jobs.
+    """
+    job = get_current_job()
+    if job is None:
+        return
+    _record_of_stage(job, stage).update(percent=percent, publish=True, **details)
+
+
+@contextmanager
+def heartbeat():
+    """
+    Marks the current stage as advancing every ``PROGRESS_REPORT_INTERVAL`` while the block runs.
+
+    Meant for stages whose progress can't be measured, which would seem stalled otherwise. Does nothing outside of rq
+    jobs.
+    """
+    job = get_current_job()
+    if job is None:
+        yield
+        return
+    stopped = threading.Event()
+
+    def beat():
+        while not stopped.wait(CONVERSION_SETTINGS['PROGRESS_REPORT_INTERVAL'].total_seconds()):
+            with _current_records_lock:
+                record = _current_records.get(job.id)
+            if record is not None:
+                record.update(publish=True, beat=True)
+
+    beating_thread = threading.Thread(target=beat, daemon=True)
+    beating_thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        beating_thread.join()
+
+
+def check_call_reporting_progress(command, *, stage, parse_output=None, input_file_path=None, input_passes=None):
+    """
+    Runs ``command`` like ``logged_check_call``, reporting its progress every ``PROGRESS_REPORT_INTERVAL``.
+
+    Outside of rq jobs, there is nobody to report to and ``command`` is simply passed on to ``logged_check_call``.
+
+    Args:
+        command: the command to run, as list of arguments
+        stage: name of the stage ``command`` performs, e.g. ``'import'``
+        parse_output: called with each line the command writes to stdout or stderr, returns a dict of details
+            (optionally including ``percent``) or ``None``
+        input_file_path: a file ``command`` reads sequentially; how much of it has been read is reported
+        input_passes: how often ``command`` reads ``input_file_path`` from start to end, if known; allows deriving
+            ``percent`` from the position in the file
+
+    Raises:
+        subprocess.CalledProcessError: if ``command`` exits with a non-zero return value, holding the last lines of
+            its output
+    """
+    job = get_current_job()
+    if job is None:
+        return logged_check_call(command)
+    record = _record_of_stage(job, stage)
+    record.update(percent=0, publish=True)
+    input_tracker = None if input_file_path is None else _InputTracker(input_file_path, passes=input_passes)
+    output_tail = collections.deque(maxlen=OUTPUT_TAIL_LINE_COUNT)
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    reader = threading.Thread(target=_read_output, args=(process.stdout, output_tail, parse_output, record))
+    reader.start()
+    report_interval_in_seconds = CONVERSION_SETTINGS['PROGRESS_REPORT_INTERVAL'].total_seconds()
+    while True:
+        try:
+            process.wait(timeout=report_interval_in_seconds)
+            break
+        except subprocess.TimeoutExpired:
+            details = {} if input_tracker is None else input_tracker.details(process.pid)
+            record.update(publish=True, **details)
+    reader.join()
+    process.stdout.close()
+    if process.returncode != 0:
+        output = os.linesep.join(output_tail)
+        logger.error('Command `{}` exited with return value {}\nOutput:\n{}'.format(
+            command, process.returncode, output
+        ))
+        raise subprocess.CalledProcessError(process.returncode, command, output=output)
+    record.update(percent=100, publish=True)
+
+
+def parse_osm2pgsql_output(line):
+    """
+    Extracts the number of nodes, ways and relations processed so far from osm2pgsql's output.
+
+    E.g. ``Processing: Node(6420k 642.0k/s) Way(805k 80.50k/s) Relation(2810 281.00/s)``
+    """
+    counts = re.findall(r'(Node|Way|Relation)\((\d+)(k?) ', line)
+    if not counts:
+        return None
+    return {
+        '{}s'.format(kind.lower()): int(count) * (1000 if thousands else 1)
+        for kind, count, thousands in counts
+    }
+
+
+def parse_ogr2ogr_output(line):
+    """
+    Extracts the percentage done from the output of ``ogr2ogr -progress``, e.g. ``0...10...20...30``.
+    """
+    percentages = re.findall(r'(\d+)\.\.\.', line)
+    if not percentages:
+        return None
+    return dict(percent=float(percentages[-1]))
+
+
+def _record_of_stage(job, stage):
+    with _current_records_lock:
+        record = _current_records.get(job.id)
+        if record is None or record.stage != stage:
+            record = _ProgressRecord(job, stage)
+            # a worker process runs one job at a time, records of former jobs are not needed anymore
+            _current_records.clear()
+            _current_records[job.id] = record
+        return record
+
+
+class _ProgressRecord:
+    def __init__(self, job, stage):
+        self.stage = stage
+        self._job = job
+        self._lock = threading.Lock()
+        self._progress = dict(stage=stage, started_at=timezone.now())
+        self._published_at = None
+
+    def update(self, *, publish=False, beat=False, **details):
+        """
+        Args:
+            publish: publish immediately, otherwise the record is published at most every ``PROGRESS_REPORT_INTERVAL``
+            beat: consider the stage advancing, even if none of ``details`` changed
+            **details: the parts of the record that changed
+        """
+        with self._lock:
+            now = timezone.now()
+            changed = {key: value for key, value in details.items() if self._progress.get(key) != value}
+            if changed or beat or 'changed_at' not in self._progress:
+                self._progress.update(changed)
+                self._progress['changed_at'] = now
+            self._progress['eta'] = _eta(self._progress, now=now)
+            due = self._published_at is None or \
+                now - self._published_at >= CONVERSION_SETTINGS['PROGRESS_REPORT_INTERVAL']
+            if publish or due:
+                self._progress['updated_at'] = now
+                self._job.meta['progress'] = dict(self._progress)
+                self._job.save_meta()
+                self._published_at = now
+
+
+def _eta(progress, *, now):
+    percent = progress.get('percent')
+    if not percent or percent >= 100:
+        return None
+    elapsed = now - progress['started_at']
+    return elapsed * (100 - percent) / percent
+
+
+def _read_output(stream, output_tail, parse_output, record):
+    """
+    Drains ``stream`` until the command closes it. Failing to parse or publish the progress must not stop this, the
+    command would block writing to a full pipe otherwise.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = ''
+    failure_logged = False
+    for chunk in iter(lambda: os.read(stream.fileno(), 4096), b''):
+        lines = _LINE_SEPARATOR_PATTERN.split(pending + decoder.decode(chunk))
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                output_tail.append(line)
+        if parse_output is None:
+            continue
+        # progress indicators like ogr2ogr's are written without line breaks, so the incomplete line is parsed, too
+        for line in lines + [pending]:
+            try:
+                details = parse_output(line)
+                if details:
+                    record.update(**details)
+            except Exception:
+                if not failure_logged:  # it most likely fails for every further line as well
+                    logger.exception('Reporting the progress from the output line {!r} failed'.format(line))
+                    failure_logged = True
+    if pending.strip():
+        output_tail.append(pending)
+
+
+class _InputTracker:
+    """
+    Follows the position of a process in an input file through ``/proc``.
+    """
+
+    def __init__(self, input_file_path, *, passes):
+        self._input_file_path = os.path.realpath(input_file_path)
+        self._input_size = os.path.getsize(input_file_path)
+        self._passes = passes
+        self._completed_passes = 0
+        self._last_position = 0
+
+    def details(self, pid):
+        position = self._position_in_input(pid)
+        if position is None or self._input_size == 0:
+            return {}
+        if position < self._last_position:  # started reading the file again
+            self._completed_passes += 1
+        self._last_position = position
+        details = dict(
+            input_read_percent=round(100 * position / self._input_size, 1),
+            input_pass=self._completed_passes + 1,
+        )
+        if self._passes:
+            done = (self._completed_passes + position / self._input_size) / self._passes
+            details['percent'] = round(100 * min(done, 1), 1)
+        return details
+
+    def _position_in_input(self, pid):
+        fd_directory = '/proc/{}/fd'.format(pid)
+        try:
+            fds = os.listdir(fd_directory)
+        except OSError:  # not on Linux or process already gone
+            return None
+        for fd in fds:
+            try:
+                if os.readlink(os.path.join(fd_directory, fd)) != self._input_file_path:
+                    continue
+                with open('/proc/{}/fdinfo/{}'.format(pid, fd)) as fdinfo:
+                    for line in fdinfo:
+                        if line.startswith('pos:'):
+                            return int(line.split()[1])
+            except OSError:  # closed in the meantime
+                continue
+        return None
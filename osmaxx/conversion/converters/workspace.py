@@ -0,0 +1,115 @@
+import logging
+import os
+import re
+import shutil
+import tempfile
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_PREFIX = 'osmaxx_job_'
+_WORKSPACE_NAME_PATTERN = re.compile(r'^' + WORKSPACE_PREFIX + r'(?P<pid>\d+)_(?P<token>[a-z0-9_]+)$')
+
+
+class Workspace:
+    """
+    Scratch directory and (optionally) GIS conversion database of exactly one conversion.
+
+    Isolating conversions from each other allows running several of them on the same worker host at once. Everything
+    is removed again when leaving the context, whether the conversion succeeded or not. Leftovers of conversions
+    whose process died without cleaning up (e.g. killed workers) are removed when the next workspace is entered.
+
+    Usage:
+
+        with Workspace(with_database=True) as workspace:
+            do_something_in(workspace.directory, database=workspace.db_name)
+    """
+
+    def __init__(self, *, with_database=False):
+        self._with_database = with_database
+        self.directory = None
+        self.db_name = None
+
+    def __enter__(self):
+        remove_stale_workspaces(including_databases=self._with_database)
+        base_directory = workspace_base_directory()
+        os.makedirs(base_directory, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix='{}{}_'.format(WORKSPACE_PREFIX, os.getpid()), dir=base_directory)
+        if self._with_database:
+            self.db_name = _db_name_for(os.path.basename(self.directory))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.db_name is not None:
+            _drop_database(self.db_name)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+
+def workspace_base_directory():
+    return CONVERSION_SETTINGS['WORKSPACE_BASE_DIRECTORY'] or tempfile.gettempdir()
+
+
+def remove_stale_workspaces(*, including_databases=True):
+    """
+    Removes workspace directories and databases left behind by processes on this host that no longer exist.
+    """
+    base_directory = workspace_base_directory()
+    if os.path.isdir(base_directory):
+        for entry in os.scandir(base_directory):
+            if entry.is_dir() and is_stale(entry.name):
+                logger.warning('removing stale workspace directory %s', entry.path)
+                shutil.rmtree(entry.path, ignore_errors=True)
+    if not including_databases:
+        return
+    for db_name in _workspace_database_names():
+        if is_stale(db_name[len(_db_name_for('')):]):
+            logger.warning('removing stale workspace database %s', db_name)
+            _drop_database(db_name)
+
+
+def _db_name_for(workspace_name):
+    return '{}_{}'.format(CONVERSION_SETTINGS['GIS_CONVERSION_DB_NAME'], workspace_name)
+
+
+def is_stale(workspace_name):
+    """
+    Returns: whether ``workspace_name`` is the name of a workspace whose process has ended
+    """
+    match = _WORKSPACE_NAME_PATTERN.match(workspace_name)
+    if match is None:
+        return False
+    return not _process_exists(int(match.group('pid')))
+
+
+def _process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # exists, but belongs to someone else
+        return True
+    return True
+
+
+def _maintenance_postgres():
+    from osmaxx.conversion.converters.converter_gis.helper.default_postgres import get_default_postgres_wrapper
+    return get_default_postgres_wrapper(db_name='postgres')
+
+
+def _workspace_database_names():
+    result = _maintenance_postgres().execute_sql_command(
+        "SELECT datname FROM pg_database WHERE datname LIKE '{}%';".format(_db_name_for(WORKSPACE_PREFIX))
+    )
+    return [row[0] for row in result]
+
+
+def _drop_database(db_name):
+    from osmaxx.conversion.converters.converter_gis.helper.default_postgres import get_default_postgres_wrapper
+    try:
+        get_default_postgres_wrapper(db_name=db_name).drop_db()
+    except Exception as e:
+        logger.exception(e)
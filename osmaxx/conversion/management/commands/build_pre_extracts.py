@@ -0,0 +1,58 @@
+import logging
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from osmaxx.clipping_area.to_polyfile import create_poly_file_string
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_pbf.pre_extracts import pre_extract_hierarchy, write_index
+from osmaxx.conversion.converters.converter_pbf.to_pbf import cut_area_from_pbf
+
+logging.basicConfig()
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'builds the hierarchy of regional pre-extracts from the planet' \
+           ' - runs until interrupted every "PRE_EXTRACT_REBUILD_INTERVAL" unless' \
+           ' --run_once option is given'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run_once', action='store_true')
+
+    def handle(self, *args, **options):
+        if options.get('run_once', False):
+            self._build_all()
+        else:
+            while True:
+                self._build_all()
+                time.sleep(CONVERSION_SETTINGS['PRE_EXTRACT_REBUILD_INTERVAL'].total_seconds())
+
+    def _build_all(self):
+        hierarchy = pre_extract_hierarchy()
+        for pre_extract in hierarchy:
+            self._publish_polyfile(pre_extract)
+        write_index(hierarchy)
+        # parents come first, so each pre-extract can be cut from its freshly built parent
+        for pre_extract in hierarchy:
+            try:
+                self._build(pre_extract)
+            except Exception as e:
+                logger.exception(e)
+
+    def _publish_polyfile(self, pre_extract):
+        os.makedirs(os.path.dirname(pre_extract.polyfile_path), exist_ok=True)
+        unpublished_polyfile_path = pre_extract.polyfile_path + '.part'
+        with open(unpublished_polyfile_path, 'w') as polyfile:
+            polyfile.write(create_poly_file_string(pre_extract.geom))
+        os.replace(unpublished_polyfile_path, pre_extract.polyfile_path)
+
+    def _build(self, pre_extract):
+        logger.info('building pre-extract %s from %s', pre_extract, pre_extract.source_pbf_path)
+        unpublished_pbf_path = pre_extract.pbf_path + '.part'
+        cut_area_from_pbf(
+            unpublished_pbf_path, pre_extract.polyfile_path, source_pbf_file_path=pre_extract.source_pbf_path
+        )
+        # atomic, so running jobs never pick up a half-written pre-extract
+        os.replace(unpublished_pbf_path, pre_extract.pbf_path)
@@ -8,6 +8,7 @@ import shutil
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 from pbf_file_size_estimation import estimate_size
 
 from osmaxx.conversion import models as conversion_models, status
@@ -36,16 +37,17 @@ class Command(BaseCommand):
 
             for rq_job_id in queue.failed_job_registry.get_job_ids():
                 try:
-                    conversion_job = conversion_models.Job.objects.get(rq_job_id=rq_job_id)
+                    conversion_jobs = _conversion_jobs(rq_job_id)
                 except ObjectDoesNotExist as e:
                     logger.exception(e)
                     continue
-                self._set_failed_unless_final(conversion_job, rq_job_id=rq_job_id)
-                self._notify(conversion_job)
+                for conversion_job in conversion_jobs:
+                    self._set_failed_unless_final(conversion_job, rq_job_id=rq_job_id)
+                    self._notify(conversion_job)
 
     def _handle_running_jobs(self):
         active_jobs = conversion_models.Job.objects.exclude(status__in=status.FINAL_STATUSES)\
-            .values_list('rq_job_id', flat=True)
+            .values_list('rq_job_id', flat=True).distinct()
         for job_id in active_jobs:
             self._update_job(rq_job_id=job_id)
 
@@ -57,24 +59,29 @@ class Command(BaseCommand):
         job = fetch_job(rq_job_id, from_queues=settings.RQ_QUEUE_NAMES)
 
         try:
-            conversion_job = conversion_models.Job.objects.get(rq_job_id=rq_job_id)
+            conversion_jobs = _conversion_jobs(rq_job_id)
         except ObjectDoesNotExist as e:
             logger.exception(e)
             return
 
         if job is None:  # already processed by someone else
-            self._set_failed_unless_final(conversion_job, rq_job_id=rq_job_id)
-            self._notify(conversion_job)
+            for conversion_job in conversion_jobs:
+                self._set_failed_unless_final(conversion_job, rq_job_id=rq_job_id)
+                self._notify(conversion_job)
             return
 
         logger.info('updating job %d', rq_job_id)
-        conversion_job.status = job.get_status()
-
-        if job.get_status() == status.FINISHED:
-            add_file_to_job(conversion_job=conversion_job, result_zip_file=job.kwargs['output_zip_file_path'])
-            add_meta_data_to_job(conversion_job=conversion_job, rq_job=job)
-        conversion_job.save()
-        self._notify(conversion_job)
+        if job.get_status() == status.STARTED:
+            warn_if_stalled(rq_job=job)
+        for conversion_job in conversion_jobs:
+            conversion_job.status = job.get_status()
+            if job.get_status() == status.FINISHED:
+                add_file_to_job(
+                    conversion_job=conversion_job, result_zip_file=result_zip_file_of(conversion_job, rq_job=job)
+                )
+                add_meta_data_to_job(conversion_job=conversion_job, rq_job=job)
+            conversion_job.save()
+            self._notify(conversion_job)
 
     def _set_failed_unless_final(self, conversion_job, rq_job_id):
         conversion_job.refresh_from_db()
@@ -95,6 +102,28 @@ class Command(BaseCommand):
             )
 
 
+def _conversion_jobs(rq_job_id):
+    """
+    Returns: the conversion jobs ``rq_job_id`` performs, several ones if they belong to a job group
+
+    Raises:
+        ObjectDoesNotExist: if no conversion job belongs to ``rq_job_id``
+    """
+    conversion_jobs = list(conversion_models.Job.objects.filter(rq_job_id=rq_job_id))
+    if not conversion_jobs:
+        raise conversion_models.Job.DoesNotExist('no job with rq job id {}'.format(rq_job_id))
+    return conversion_jobs
+
+
+def result_zip_file_of(conversion_job, *, rq_job):
+    if 'exports' in rq_job.kwargs:  # a job group
+        return next(
+            export['output_zip_file_path'] for export in rq_job.kwargs['exports']
+            if export['job_id'] == conversion_job.id
+        )
+    return rq_job.kwargs['output_zip_file_path']
+
+
 def add_file_to_job(*, conversion_job, result_zip_file):
     conversion_job.resulting_file.name = conversion_job.zip_file_relative_path()
     new_path = os.path.join(settings.MEDIA_ROOT, conversion_job.resulting_file.name)
@@ -118,11 +147,29 @@ def add_meta_data_to_job(*, conversion_job, rq_job):
     except estimate_size.OutOfBoundsError:
         logger.exception("pbf estimation failed")
 
-    conversion_job.unzipped_result_size = rq_job.meta['unzipped_result_size']
+    if 'unzipped_result_sizes' in rq_job.meta:  # a job group
+        conversion_job.unzipped_result_size = rq_job.meta['unzipped_result_sizes'][
+            result_zip_file_of(conversion_job, rq_job=rq_job)
+        ]
+    else:
+        conversion_job.unzipped_result_size = rq_job.meta['unzipped_result_size']
     conversion_job.extraction_duration = rq_job.meta['duration']
+    conversion_job.stage_durations = rq_job.meta.get('stage_durations')
+    conversion_job.worker_host = rq_job.meta.get('worker_host')
+    conversion_job.planet_snapshot = rq_job.meta.get('planet_snapshot')
+    conversion_job.tool_versions = rq_job.meta.get('tool_versions')
     conversion_job.estimated_pbf_size = estimated_pbf_size
 
 
+def warn_if_stalled(*, rq_job):
+    progress = rq_job.meta.get('progress')
+    if progress is None:
+        return
+    stalled_for = timezone.now() - progress['changed_at']
+    if stalled_for > CONVERSION_SETTINGS['PROGRESS_STALL_WARNING_AGE']:
+        logger.warning('job %s has not advanced in stage %s for %s', rq_job.id, progress['stage'], stalled_for)
+
+
 def fetch_job(rq_job_id, from_queues):
     """
     :return: None if job couldn't be found in any queue else RQ job.
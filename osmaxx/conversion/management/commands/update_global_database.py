@@ -0,0 +1,39 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_gis.bootstrap import GlobalDatabase
+
+logging.basicConfig()
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'builds the global database from the planet unless published already and keeps it current by applying' \
+           ' the change files kept by the osm pbf updater - runs until interrupted, looking for new change files' \
+           ' every "GLOBAL_DATABASE_UPDATE_INTERVAL" unless --run_once option is given;' \
+           ' the layers are rebuilt and published at most every "GLOBAL_DATABASE_PUBLISH_INTERVAL";' \
+           ' must run on the host of the conversion database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--run_once', action='store_true')
+        parser.add_argument('--rebuild', action='store_true', help='build from the planet even if published already')
+
+    def handle(self, *args, **options):
+        if CONVERSION_SETTINGS['GLOBAL_DATABASE_NAME'] is None:
+            raise CommandError('GLOBAL_DATABASE_NAME is not set')
+        global_database = GlobalDatabase()
+        if options.get('rebuild', False) or not global_database.is_published():
+            logger.info('building global database %s', global_database.db_name)
+            global_database.bootstrap()
+        while True:
+            try:
+                applied_change_file_count = global_database.update()
+                logger.info('applied %s change files', applied_change_file_count)
+            except Exception as e:
+                logger.exception(e)
+            if options.get('run_once', False):
+                return
+            time.sleep(CONVERSION_SETTINGS['GLOBAL_DATABASE_UPDATE_INTERVAL'].total_seconds())
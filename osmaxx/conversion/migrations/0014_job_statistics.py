@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversion', '0013_auto_20170712_1825'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='planet_snapshot',
+            field=models.CharField(help_text='the OSM data file the extraction is based on and when it was written', max_length=250, null=True, verbose_name='planet snapshot'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='stage_durations',
+            field=django.contrib.postgres.fields.jsonb.JSONField(help_text='seconds each stage of the extraction took, by stage', null=True, verbose_name='stage durations'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='tool_versions',
+            field=django.contrib.postgres.fields.jsonb.JSONField(help_text='versions of the external tools used for the extraction', null=True, verbose_name='tool versions'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='worker_host',
+            field=models.CharField(help_text='the host the extraction ran on', max_length=250, null=True, verbose_name='worker host'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversion', '0014_job_statistics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parametrization',
+            name='layers',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(choices=[('address_p', 'address_p'), ('adminarea_a', 'adminarea_a'), ('boundary_l', 'boundary_l'), ('building_a', 'building_a'), ('coastline_l', 'coastline_l'), ('geoname_l', 'geoname_l'), ('geoname_p', 'geoname_p'), ('landmass_a', 'landmass_a'), ('landuse_a', 'landuse_a'), ('military_a', 'military_a'), ('military_p', 'military_p'), ('misc_l', 'misc_l'), ('natural_a', 'natural_a'), ('natural_p', 'natural_p'), ('nonop_l', 'nonop_l'), ('poi_a', 'poi_a'), ('poi_p', 'poi_p'), ('pow_a', 'pow_a'), ('pow_p', 'pow_p'), ('railway_l', 'railway_l'), ('road_l', 'road_l'), ('route_l', 'route_l'), ('traffic_a', 'traffic_a'), ('traffic_p', 'traffic_p'), ('transport_a', 'transport_a'), ('transport_l', 'transport_l'), ('transport_p', 'transport_p'), ('utility_a', 'utility_a'), ('utility_l', 'utility_l'), ('utility_p', 'utility_p'), ('water_a', 'water_a'), ('water_l', 'water_l'), ('water_p', 'water_p'), ('sea_a', 'sea_a')], max_length=50), blank=True, help_text='the layers to create, all layers of the detail level if empty', null=True, size=None, verbose_name='layers'),
+        ),
+    ]
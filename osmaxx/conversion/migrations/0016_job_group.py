@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversion', '0015_parametrization_layers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobGroup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rq_job_id', models.CharField(max_length=250, null=True, verbose_name='rq job id')),
+                ('queue_name', models.CharField(choices=[('default', 'default'), ('high', 'high')], default='default', help_text='queue name for processing', max_length=50, verbose_name='queue name')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='conversion.JobGroup', verbose_name='group'),
+        ),
+    ]
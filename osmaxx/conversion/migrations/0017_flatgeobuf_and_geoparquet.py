@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversion', '0016_job_group'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='parametrization',
+            name='out_format',
+            field=models.CharField(choices=[('fgdb', 'Esri File Geodatabase'), ('shapefile', 'Esri Shapefile'), ('gpkg', 'GeoPackage'), ('spatialite', 'SpatiaLite'), ('flatgeobuf', 'FlatGeobuf'), ('geoparquet', 'GeoParquet'), ('garmin', 'Garmin navigation & map data'), ('pbf', 'OSM Protocolbuffer Binary Format')], max_length=100, verbose_name='out format'),
+        ),
+    ]
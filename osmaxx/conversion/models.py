@@ -2,6 +2,7 @@ import os
 import time
 
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField, JSONField
 from django.db import models
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
@@ -9,8 +10,9 @@ from rest_framework.reverse import reverse
 
 from osmaxx.conversion import coordinate_reference_system as crs, output_format, status
 from osmaxx.clipping_area.models import ClippingArea
-from osmaxx.conversion.converters.converter import convert
+from osmaxx.conversion.converters.converter import convert, convert_group
 from osmaxx.conversion.converters.converter_gis.detail_levels import DETAIL_LEVEL_CHOICES, DETAIL_LEVEL_ALL
+from osmaxx.conversion.converters.converter_gis.layers import OUTPUT_LAYER_NAMES
 
 
 def job_directory_path(instance, filename):
@@ -25,6 +27,11 @@ class Parametrization(models.Model):
     )
     clipping_area = models.ForeignKey(ClippingArea, verbose_name=_('Clipping Area'), on_delete=models.CASCADE)
     detail_level = models.IntegerField(verbose_name=_('detail level'), choices=DETAIL_LEVEL_CHOICES, default=DETAIL_LEVEL_ALL)
+    layers = ArrayField(
+        models.CharField(choices=[(layer, layer) for layer in OUTPUT_LAYER_NAMES], max_length=50),
+        verbose_name=_('layers'), help_text=_("the layers to create, all layers of the detail level if empty"),
+        null=True, blank=True
+    )
 
     def __str__(self):
         return _("{}: {} as EPSG:{}").format(self.id, self.get_out_format_display(), self.out_srs)
@@ -34,9 +41,54 @@ class Parametrization(models.Model):
         return "EPSG:{}".format(self.out_srs)
 
 
+class JobGroup(models.Model):
+    """
+    Jobs converting the same clipping area with the same detail level and layers in a single rq job.
+
+    The data of the area is imported and filtered once and then exported to the format and spatial reference system
+    of each job.
+    """
+    rq_job_id = models.CharField(_('rq job id'), max_length=250, null=True)
+    queue_name = models.CharField(
+        _('queue name'), help_text=_('queue name for processing'), default='default',
+        max_length=50, choices=[(key, key) for key in settings.RQ_QUEUE_NAMES]
+    )
+
+    def start_conversion(self, *, use_worker=True):
+        jobs = list(self.jobs.select_related('parametrization__clipping_area').order_by('id'))
+        parametrization = jobs[0].parametrization
+        self.rq_job_id = convert_group(
+            exports=[
+                dict(
+                    job_id=job.id,
+                    conversion_format=job.parametrization.out_format,
+                    output_zip_file_path=job._out_zip_path(),
+                    filename_prefix=job._filename_prefix(),
+                    out_srs=job.parametrization.epsg,
+                )
+                for job in jobs
+            ],
+            area_name=parametrization.clipping_area.name,
+            osmosis_polygon_file_string=parametrization.clipping_area.osmosis_polygon_file_string,
+            detail_level=parametrization.detail_level,
+            layers=parametrization.layers or None,
+            use_worker=use_worker,
+            queue_name=self.queue_name,
+        )
+        self.save()
+        # the jobs' status and results are harvested from the group's rq job
+        self.jobs.update(rq_job_id=self.rq_job_id)
+
+    def __str__(self):
+        return _("job group {} with rq_id {}").format(self.id, self.rq_job_id)
+
+
 class Job(models.Model):
     callback_url = models.URLField(_('callback url'), max_length=250)
     parametrization = models.ForeignKey(verbose_name=_('parametrization'), to=Parametrization, on_delete=models.CASCADE)
+    group = models.ForeignKey(
+        verbose_name=_('group'), to=JobGroup, related_name='jobs', null=True, blank=True, on_delete=models.SET_NULL
+    )
     rq_job_id = models.CharField(_('rq job id'), max_length=250, null=True)
     status = models.CharField(_('job status'), choices=status.CHOICES, default=status.RECEIVED, max_length=20)
     resulting_file = models.FileField(_('resulting file'), upload_to=job_directory_path, null=True, max_length=250)
@@ -47,6 +99,19 @@ class Job(models.Model):
     extraction_duration = models.DurationField(
         _('extraction duration'), help_text=_('time needed to generate the extraction'), null=True
     )
+    stage_durations = JSONField(
+        _('stage durations'), help_text=_('seconds each stage of the extraction took, by stage'), null=True
+    )
+    worker_host = models.CharField(
+        _('worker host'), help_text=_('the host the extraction ran on'), max_length=250, null=True
+    )
+    planet_snapshot = models.CharField(
+        _('planet snapshot'), help_text=_('the OSM data file the extraction is based on and when it was written'),
+        max_length=250, null=True
+    )
+    tool_versions = JSONField(
+        _('tool versions'), help_text=_('versions of the external tools used for the extraction'), null=True
+    )
     own_base_url = models.CharField(
         _('own base url'), help_text=_('the url from which this job is reachable'), max_length=250
     )
@@ -63,6 +128,7 @@ class Job(models.Model):
             output_zip_file_path=self._out_zip_path(),
             filename_prefix=self._filename_prefix(),
             detail_level=self.parametrization.detail_level,
+            layers=self.parametrization.layers or None,
             out_srs=self.parametrization.epsg,
             use_worker=use_worker,
             queue_name=self.queue_name,
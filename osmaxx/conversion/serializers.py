@@ -1,12 +1,24 @@
 from rest_framework import serializers
 
 from osmaxx.conversion import output_format
+from osmaxx.conversion.converters.converter import GROUPABLE_FORMATS
 from osmaxx.conversion.converters.converter_gis import detail_levels
 from osmaxx.conversion.size_estimator import size_estimation_for_format
-from .models import Job, Parametrization
+from .models import Job, JobGroup, Parametrization
 
 
 class ParametrizationSerializer(serializers.ModelSerializer):
+    def validate(self, data):
+        layers = data.get('layers')
+        if layers:
+            detail_level = data.get('detail_level', detail_levels.DETAIL_LEVEL_ALL)
+            included_layers = detail_levels.DETAIL_LEVEL_TABLES[detail_level]['included_layers']
+            if not any(layer in included_layers for layer in layers):
+                raise serializers.ValidationError(
+                    {'layers': 'none of the layers is included in the chosen detail level'}
+                )
+        return data
+
     class Meta:
         model = Parametrization
         fields = '__all__'
@@ -25,10 +37,56 @@ class JobSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Job
-        fields = ['id', 'callback_url', 'parametrization', 'rq_job_id', 'status', 'resulting_file_path',
-                  'estimated_pbf_size', 'unzipped_result_size', 'extraction_duration', 'queue_name']
-        read_only_fields = ['rq_job_id', 'status', 'resulting_file_path',
-                            'estimated_pbf_size', 'unzipped_result_size', 'extraction_duration']
+        fields = ['id', 'callback_url', 'parametrization', 'group', 'rq_job_id', 'status', 'resulting_file_path',
+                  'estimated_pbf_size', 'unzipped_result_size', 'extraction_duration', 'stage_durations',
+                  'worker_host', 'planet_snapshot', 'tool_versions', 'queue_name']
+        read_only_fields = ['group', 'rq_job_id', 'status', 'resulting_file_path',
+                            'estimated_pbf_size', 'unzipped_result_size', 'extraction_duration', 'stage_durations',
+                            'worker_host', 'planet_snapshot', 'tool_versions']
+
+
+class GroupedJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'callback_url', 'parametrization', 'rq_job_id', 'status']
+        read_only_fields = ['rq_job_id', 'status']
+
+
+class JobGroupSerializer(serializers.ModelSerializer):
+    jobs = GroupedJobSerializer(many=True)
+
+    def validate_jobs(self, jobs):
+        if not jobs:
+            raise serializers.ValidationError('a job group needs at least one job')
+        parametrizations = [job['parametrization'] for job in jobs]
+        shared_parameters = {
+            (parametrization.clipping_area_id, parametrization.detail_level, tuple(parametrization.layers or ()))
+            for parametrization in parametrizations
+        }
+        if len(shared_parameters) > 1:
+            raise serializers.ValidationError(
+                'the jobs of a group must share their clipping area, detail level and layers'
+            )
+        ungroupable_formats = {parametrization.out_format for parametrization in parametrizations} - GROUPABLE_FORMATS
+        if ungroupable_formats:
+            raise serializers.ValidationError(
+                'formats {} cannot be converted in groups'.format(', '.join(sorted(ungroupable_formats)))
+            )
+        return jobs
+
+    def create(self, validated_data):
+        jobs = validated_data.pop('jobs')
+        request = self.context.get('request', None)
+        own_base_url = request.build_absolute_uri('/') if request is not None else None
+        group = JobGroup.objects.create(**validated_data)
+        for job in jobs:
+            Job.objects.create(group=group, queue_name=group.queue_name, own_base_url=own_base_url, **job)
+        return group
+
+    class Meta:
+        model = JobGroup
+        fields = ['id', 'jobs', 'rq_job_id', 'queue_name']
+        read_only_fields = ['rq_job_id']
 
 
 class FormatSizeEstimationSerializer(serializers.Serializer):
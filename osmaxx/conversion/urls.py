@@ -2,7 +2,7 @@ from django.conf.urls import url, include
 from rest_framework.routers import DefaultRouter
 
 from osmaxx.clipping_area.viewsets import ClippingAreaViewSet
-from osmaxx.conversion.viewsets import JobViewSet, ParametrizationViewSet, FormatSizeEstimationView
+from osmaxx.conversion.viewsets import JobViewSet, JobGroupViewSet, ParametrizationViewSet, FormatSizeEstimationView
 from pbf_file_size_estimation.views import SizeEstimationView
 
 router = DefaultRouter()
@@ -10,6 +10,7 @@ router.register(r'estimate_size_in_bytes', SizeEstimationView, base_name='estima
 router.register(r'format_size_estimation', FormatSizeEstimationView, base_name='format_size_estimation')
 router.register(r'clipping_area', ClippingAreaViewSet, base_name='clipping_area')
 router.register(r'conversion_job', JobViewSet, base_name='conversion_job')
+router.register(r'conversion_job_group', JobGroupViewSet, base_name='conversion_job_group')
 router.register(r'conversion_parametrization', ParametrizationViewSet, base_name='conversion_parametrization')
 
 urlpatterns = [
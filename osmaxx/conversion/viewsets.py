@@ -1,9 +1,9 @@
-from rest_framework import permissions, viewsets
+from rest_framework import mixins, permissions, viewsets
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
-from .models import Job, Parametrization
-from .serializers import JobSerializer, ParametrizationSerializer, FormatSizeEstimationSerializer
+from .models import Job, JobGroup, Parametrization
+from .serializers import JobSerializer, JobGroupSerializer, ParametrizationSerializer, FormatSizeEstimationSerializer
 
 
 class JobViewSet(viewsets.ModelViewSet):
@@ -18,6 +18,19 @@ class JobViewSet(viewsets.ModelViewSet):
         serializer.instance.start_conversion()
 
 
+class JobGroupViewSet(
+        mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    queryset = JobGroup.objects.all().order_by('-id')
+    serializer_class = JobGroupSerializer
+    permission_classes = (
+        permissions.IsAuthenticated,
+    )
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer=serializer)
+        serializer.instance.start_conversion()
+
+
 class ParametrizationViewSet(viewsets.ModelViewSet):
     queryset = Parametrization.objects.all()
     serializer_class = ParametrizationSerializer
@@ -0,0 +1,79 @@
+import os
+import zipfile
+
+import pytest
+
+from osmaxx.conversion.converters.archive import ArchiveWriter
+
+
+@pytest.fixture
+def result_dir(tmpdir):
+    result_dir = tmpdir.mkdir('result')
+    result_dir.mkdir('data').join('roads.gpkg').write_binary(b'road ' * 10000)
+    result_dir.mkdir('pbf').join('area.pbf').write_binary(b'already compressed ' * 1000)
+    result_dir.mkdir('empty')
+    return str(result_dir)
+
+
+def test_archive_holds_the_added_files_below_their_arcnames(tmpdir, result_dir):
+    zip_file_path = str(tmpdir.join('result.zip'))
+    license_file = tmpdir.join('LICENSE')
+    license_file.write_text('Ünïcödé license', encoding='utf-8')
+    cwd = os.getcwd()
+
+    with ArchiveWriter(zip_file_path, max_workers=2) as archive:
+        archive.add_directory(result_dir)
+        archive.add_file(str(license_file), arcname='static/LICENSE')
+
+    assert os.getcwd() == cwd
+    with zipfile.ZipFile(zip_file_path) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == ['data/roads.gpkg', 'pbf/area.pbf', 'static/LICENSE']
+        assert zip_file.read('data/roads.gpkg') == b'road ' * 10000
+        assert zip_file.read('static/LICENSE').decode('utf-8') == 'Ünïcödé license'
+
+
+def test_already_compressed_members_are_stored_and_others_deflated(tmpdir, result_dir):
+    zip_file_path = str(tmpdir.join('result.zip'))
+
+    with ArchiveWriter(zip_file_path, compression_level=1) as archive:
+        archive.add_directory(result_dir, arcname='export')
+
+    with zipfile.ZipFile(zip_file_path) as zip_file:
+        roads, area = zip_file.getinfo('export/data/roads.gpkg'), zip_file.getinfo('export/pbf/area.pbf')
+    assert roads.compress_type == zipfile.ZIP_DEFLATED
+    assert roads.compress_size < roads.file_size
+    assert area.compress_type == zipfile.ZIP_STORED
+    assert area.compress_size == area.file_size
+
+
+def test_unfinished_archive_is_removed_on_errors(tmpdir, result_dir):
+    zip_file_path = str(tmpdir.join('result.zip'))
+
+    with pytest.raises(FileNotFoundError):
+        with ArchiveWriter(zip_file_path) as archive:
+            archive.add_directory(result_dir)
+            archive.add_file(str(tmpdir.join('missing.txt')), arcname='missing.txt')
+
+    assert not os.path.exists(zip_file_path)
+
+
+def test_members_of_other_archives_are_copied_as_they_are(tmpdir, result_dir):
+    fragment_path, zip_file_path = str(tmpdir.join('fragment.zip')), str(tmpdir.join('result.zip'))
+    with ArchiveWriter(fragment_path) as fragment:
+        fragment.add_directory(result_dir, arcname='static')
+    license_file = tmpdir.join('LICENSE')
+    license_file.write_text('license', encoding='utf-8')
+
+    with ArchiveWriter(zip_file_path) as archive:
+        archive.add_file(str(license_file), arcname='LICENSE')
+        archive.add_members_of(fragment_path)
+
+    with zipfile.ZipFile(fragment_path) as fragment, zipfile.ZipFile(zip_file_path) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == ['LICENSE', 'static/data/roads.gpkg', 'static/pbf/area.pbf']
+        for info in fragment.infolist():
+            copied_info = zip_file.getinfo(info.filename)
+            assert (copied_info.compress_type, copied_info.compress_size, copied_info.CRC) == \
+                (info.compress_type, info.compress_size, info.CRC)
+            assert zip_file.read(info.filename) == fragment.read(info.filename)
@@ -1,33 +1,81 @@
+import os
+import re
 from unittest import mock
 
+from rq.job import _job_stack
+
 from osmaxx.conversion.converters.converter_gis.bootstrap import bootstrap
 from osmaxx.conversion.converters.converter_gis.detail_levels import DETAIL_LEVEL_REDUCED
 
 
-def test_filter_scripts_are_executed_in_correct_order(sql_scripts_filter, area_polyfile_string):
+def _assert_executed_in_order_per_folder(expected_script_paths, execute_sql_file_mock, bootstrap_module_path):
+    filter_dir = os.path.join(bootstrap_module_path, 'sql', 'filter')
+
+    def folder(script_path):
+        return os.path.relpath(script_path, filter_dir).split(os.sep)[0]
+
+    executed_script_paths = [call[1][0] for call in execute_sql_file_mock.mock_calls]
+    assert sorted(executed_script_paths) == sorted(expected_script_paths)
+    for script_folder in set(map(folder, expected_script_paths)):
+        assert [path for path in executed_script_paths if folder(path) == script_folder] == \
+            [path for path in expected_script_paths if folder(path) == script_folder]
+
+
+def test_filter_scripts_are_executed_in_correct_order(sql_scripts_filter, bootstrap_module_path, area_polyfile_string):
     bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string)
     with mock.patch.object(bootstrapper, '_postgres') as postgres_mock:
         bootstrapper._filter_data()
 
-        expected_calls = [
-            mock.call(relative_script_path) for relative_script_path in sql_scripts_filter
-        ]
-        assert expected_calls == postgres_mock.execute_sql_file.mock_calls
+        _assert_executed_in_order_per_folder(
+            sql_scripts_filter, postgres_mock.execute_sql_file, bootstrap_module_path
+        )
 
 
 def test_filter_scripts_with_lesser_detail_are_executed_in_correct_order(
-        sql_scripts_filter_level_60, area_polyfile_string
+        sql_scripts_filter_level_60, bootstrap_module_path, area_polyfile_string
 ):
     bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string, detail_level=DETAIL_LEVEL_REDUCED)
     with mock.patch.object(bootstrapper, '_postgres') as postgres_mock:
         bootstrapper._filter_data()
 
+        _assert_executed_in_order_per_folder(
+            sql_scripts_filter_level_60, postgres_mock.execute_sql_file, bootstrap_module_path
+        )
+
+
+def test_filter_scripts_are_executed_in_declared_order_without_parallelism(
+        sql_scripts_filter, area_polyfile_string, mocker):
+    from osmaxx.conversion._settings import CONVERSION_SETTINGS
+    mocker.patch.dict(CONVERSION_SETTINGS, {'FILTER_STAGE_PARALLELISM': 1})
+    bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string)
+    with mock.patch.object(bootstrapper, '_postgres') as postgres_mock:
+        bootstrapper._filter_data()
+
         expected_calls = [
-            mock.call(relative_script_path) for relative_script_path in sql_scripts_filter_level_60
+            mock.call(relative_script_path) for relative_script_path in sql_scripts_filter
         ]
         assert expected_calls == postgres_mock.execute_sql_file.mock_calls
 
 
+def test_durations_of_filter_folders_run_concurrently_reach_the_job(area_polyfile_string, mocker):
+    from osmaxx.conversion._settings import CONVERSION_SETTINGS
+    mocker.patch.dict(CONVERSION_SETTINGS, {'FILTER_STAGE_PARALLELISM': 4})
+    mocker.patch.object(bootstrap, 'report_progress')
+    job = mock.Mock(meta={})
+    bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string)
+    _job_stack.push(job)  # known to the current thread only, like in an rq worker
+    try:
+        with mock.patch.object(bootstrapper, '_postgres'):
+            bootstrapper._filter_data()
+    finally:
+        _job_stack.pop()
+
+    filter_folder_stages = [stage for stage in job.meta['stage_durations'] if stage != 'filter/analyze']
+    assert sorted(filter_folder_stages) == sorted(
+        'filter/{}'.format(folder) for folder in bootstrapper._filter_sql_script_folders()
+    )
+
+
 def test_create_views_scripts_are_executed_in_correct_order(sql_scripts_create_view, area_polyfile_string):
     bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string)
     with mock.patch.object(bootstrapper, '_postgres') as postgres_mock:
@@ -52,12 +100,112 @@ def test_create_views_with_lesser_detail_are_limited_to_specified_tables(
         assert expected_calls == postgres_mock.execute_sql_file.mock_calls
 
 
-def test_function_scripts_are_executed_in_correct_order(sql_scripts_create_functions, area_polyfile_string):
+def test_data_dependent_function_scripts_are_executed(sql_scripts_create_functions, area_polyfile_string):
     bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string)
     with mock.patch.object(bootstrapper, '_postgres') as postgres_mock:
         bootstrapper._setup_db_functions()
 
         expected_calls = [
-            mock.call(relative_script_path) for relative_script_path in sql_scripts_create_functions
+            mock.call(script_path) for script_path in sql_scripts_create_functions
+            if os.path.basename(script_path) in bootstrap.BootStrapper.DATA_DEPENDENT_FUNCTION_SCRIPTS
         ]
         assert expected_calls == postgres_mock.execute_sql_file.mock_calls
+
+
+def test_data_dependent_function_scripts_are_skipped_when_no_filter_folder_needs_them(
+        sql_scripts_create_functions, area_polyfile_string):
+    bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string, detail_level=DETAIL_LEVEL_REDUCED)
+    with mock.patch.object(bootstrapper, '_postgres') as postgres_mock:
+        bootstrapper._setup_db_functions()
+
+        assert not postgres_mock.execute_sql_file.called
+
+
+def test_template_database_contains_schemas_and_other_function_scripts_in_correct_order(
+        sql_scripts_create_functions, bootstrap_module_path, area_polyfile_string):
+    bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string)
+    template_database = bootstrapper._template_database()
+
+    expected_script_paths = [
+        os.path.join(bootstrap_module_path, 'sql/drop_and_recreate/drop_and_recreate.sql')
+    ] + [
+        script_path for script_path in sql_scripts_create_functions
+        if os.path.basename(script_path) not in bootstrap.BootStrapper.DATA_DEPENDENT_FUNCTION_SCRIPTS
+    ]
+    assert template_database._script_paths == expected_script_paths
+
+
+def test_each_job_database_is_cloned_from_the_template(area_polyfile_string, mocker):
+    mocker.patch.object(bootstrap.TemplateDatabase, 'ensure', return_value='osmaxx_db_template_123')
+    bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string)
+    with mock.patch.object(bootstrapper, '_postgres') as postgres_mock:
+        bootstrapper._reset_database()
+
+        postgres_mock.create_db.assert_called_once_with(template='osmaxx_db_template_123')
+        assert not postgres_mock.create_extension.called
+        assert not postgres_mock.execute_sql_file.called
+
+
+def test_import_keeps_slim_tables_only_when_address_layer_is_included(area_polyfile_string, mocker):
+    plan_import = mocker.patch.object(bootstrap, 'plan_import')
+    bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string)._plan_import()
+    bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string, detail_level=DETAIL_LEVEL_REDUCED)._plan_import()
+
+    full_detail_call, reduced_detail_call = plan_import.mock_calls
+    assert full_detail_call[2]['keep_slim_tables'] is True
+    assert full_detail_call[2]['extra_attributes'] is True
+    assert reduced_detail_call[2]['keep_slim_tables'] is False
+    assert reduced_detail_call[2]['extra_attributes'] is True
+
+
+def test_filter_scripts_create_unlogged_osmaxx_tables_only(sql_scripts_filter):
+    for script_path in sql_scripts_filter:
+        with open(script_path) as script:
+            assert not re.search(r'CREATE\s+TABLE\s+osmaxx\.', script.read(), re.IGNORECASE), script_path
+
+
+def test_osmaxx_tables_are_analyzed_after_filtering(area_polyfile_string, mocker):
+    bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string)
+    postgres_mock = mocker.patch.object(bootstrapper, '_postgres')
+    postgres_mock.execute_sql_command.return_value = [('road_l',), ('address_p',)]
+    bootstrapper._filter_data()
+
+    analyze_commands = [call[1][0] for call in postgres_mock.execute_sql_command.mock_calls[1:]]
+    assert sorted(analyze_commands) == ['ANALYZE osmaxx."address_p";', 'ANALYZE osmaxx."road_l";']
+
+
+def test_only_filter_folders_of_requested_layers_are_executed(area_polyfile_string, bootstrap_module_path):
+    bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string, layers=['road_l', 'water_p'])
+    with mock.patch.object(bootstrapper, '_postgres') as postgres_mock:
+        bootstrapper._filter_data()
+
+    filter_dir = os.path.join(bootstrap_module_path, 'sql', 'filter')
+    executed_folders = {
+        os.path.relpath(call[1][0], filter_dir).split(os.sep)[0]
+        for call in postgres_mock.execute_sql_file.mock_calls
+    }
+    assert executed_folders == {'road', 'water'}
+
+
+def test_requested_layers_are_limited_to_the_detail_level(area_polyfile_string):
+    bootstrapper = bootstrap.BootStrapper(
+        area_polyfile_string=area_polyfile_string, detail_level=DETAIL_LEVEL_REDUCED, layers=['road_l', 'building_a'],
+    )
+    assert bootstrapper._filter_sql_script_folders() == ['road']
+
+
+def test_filter_folder_prerequisites_of_requested_layers_are_executed_too(area_polyfile_string, mocker):
+    mocker.patch.object(
+        bootstrap.BootStrapper, 'FILTER_SQL_SCRIPT_FOLDER_PREREQUISITES', {'road': ['railway'], 'railway': ['water']}
+    )
+    bootstrapper = bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string, layers=['road_l'])
+    assert bootstrapper._filter_sql_script_folders() == ['railway', 'road', 'water']
+
+
+def test_osm_boundaries_are_imported_only_if_one_of_their_layers_is_requested(area_polyfile_string, mocker):
+    osm_boundaries_importer = mocker.patch.object(bootstrap, 'OSMBoundariesImporter')
+    bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string, layers=['road_l'])._import_boundaries()
+    assert not osm_boundaries_importer.called
+
+    bootstrap.BootStrapper(area_polyfile_string=area_polyfile_string, layers=['sea_a'])._import_boundaries()
+    assert osm_boundaries_importer.called
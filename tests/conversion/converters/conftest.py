@@ -113,7 +113,12 @@ def sql_scripts_filter(bootstrap_module_path, relative_sql_script_paths):
 
 @pytest.fixture(scope='session')
 def sql_scripts_filter_level_60(bootstrap_module_path, relative_sql_script_paths):
-    sql_scripts_filter_leveled = relative_sql_script_paths
+    # these folders only create layers not included in the reduced detail level
+    excluded_folders = ['sql/filter/address/', 'sql/filter/building/', 'sql/filter/nonop/', 'sql/filter/traffic/']
+    sql_scripts_filter_leveled = [
+        script_path for script_path in relative_sql_script_paths
+        if not any(script_path.startswith(folder) for folder in excluded_folders)
+    ]
     replacements = [
         ('sql/filter/road/010_road.sql', 'sql/filter/road/level-60/010_road.sql')
     ]
@@ -1,4 +1,7 @@
-from osmaxx.conversion.converters.converter import convert
+import pytest
+
+from osmaxx.conversion import output_format
+from osmaxx.conversion.converters.converter import convert, convert_group
 
 
 def test_calls_converter_and_returns_none_when_use_worker_is_omitted(conversion_format, area_name, simple_osmosis_line_string, output_zip_file_path, filename_prefix, detail_level, out_srs, mocker):
@@ -32,3 +35,34 @@ def test_convert_returns_id_when_use_worker_is_true(conversion_format, area_name
         use_worker=True,
     )
     assert convert_return_value == 42
+
+
+def test_convert_group_exports_all_formats_from_a_single_bootstrap(area_name, simple_osmosis_line_string, mocker):
+    perform_group_export = mocker.patch(
+        'osmaxx.conversion.converters.converter_gis.perform_group_export', autospec=True
+    )
+    exports = [
+        dict(conversion_format=output_format.GPKG, output_zip_file_path='/tmp/a.zip', filename_prefix='a',
+             out_srs='EPSG:4326'),
+        dict(conversion_format=output_format.SHAPEFILE, output_zip_file_path='/tmp/b.zip', filename_prefix='b',
+             out_srs='EPSG:3857'),
+    ]
+    assert convert_group(
+        exports=exports, area_name=area_name, osmosis_polygon_file_string=simple_osmosis_line_string, detail_level=60,
+    ) is None
+    perform_group_export.assert_called_once_with(
+        exports=exports, area_name=area_name, osmosis_polygon_file_string=simple_osmosis_line_string,
+        detail_level=60, layers=None,
+    )
+
+
+def test_convert_group_rejects_formats_not_exported_from_a_database(area_name, simple_osmosis_line_string):
+    exports = [
+        dict(conversion_format=output_format.GARMIN, output_zip_file_path='/tmp/a.zip', filename_prefix='a',
+             out_srs='EPSG:4326'),
+    ]
+    with pytest.raises(ValueError):
+        convert_group(
+            exports=exports, area_name=area_name, osmosis_polygon_file_string=simple_osmosis_line_string,
+            detail_level=60,
+        )
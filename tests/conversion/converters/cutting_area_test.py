@@ -0,0 +1,32 @@
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+
+from osmaxx.conversion.converters.converter_pbf.cutting_area import rectangle_bbox, with_capped_vertex_count
+from osmaxx.utils.polyfile_helpers import parse_poly_string
+
+
+def _detailed_multipolygon():
+    coastline = Point(8.5, 47.3).buffer(0.5, quadsegs=2000)
+    island = Point(10, 47.3).buffer(0.1, quadsegs=500)
+    return MultiPolygon(Polygon(coastline.exterior_ring), Polygon(island.exterior_ring), srid=4326)
+
+
+def test_detailed_area_is_reduced_to_the_vertex_cap_without_losing_any_area():
+    geom = _detailed_multipolygon()
+    reduced = with_capped_vertex_count(geom, max_vertices=200)
+    assert reduced.num_coords <= 200
+    assert reduced.contains(geom)
+
+
+def test_simple_area_is_kept_as_is(simple_osmosis_line_string):
+    geom = parse_poly_string(simple_osmosis_line_string)
+    assert with_capped_vertex_count(geom, max_vertices=200) is geom
+
+
+def test_rectangle_is_recognized():
+    geom = MultiPolygon(Polygon.from_bbox((7.3, 46.9, 7.5, 47.0)), srid=4326)
+    assert rectangle_bbox(geom) == (7.3, 46.9, 7.5, 47.0)
+
+
+def test_other_areas_are_not_recognized_as_rectangle(simple_osmosis_line_string):
+    assert rectangle_bbox(parse_poly_string(simple_osmosis_line_string)) is None
+    assert rectangle_bbox(_detailed_multipolygon()) is None
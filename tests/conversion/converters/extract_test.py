@@ -0,0 +1,139 @@
+import os
+from collections import OrderedDict
+from unittest import mock
+
+import pytest
+from rq.job import _job_stack
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+
+from osmaxx.conversion import output_format
+from osmaxx.conversion.converters.converter_gis.extract.db_to_format import extract
+
+LAYERS = ['building_a', 'road_l', 'poi_p']
+LAYER_GEOMETRIES = OrderedDict([
+    ('building_a', ('geom', 'MULTIPOLYGON', 4326)), ('road_l', ('geom', 'MULTILINESTRING', 4326)),
+    ('poi_p', ('geom', 'POINT', 4326)),
+])
+
+
+@pytest.fixture
+def ogr2ogr_calls(mocker):
+    calls = []
+
+    def ogr2ogr(command):
+        calls.append(command)
+        destination = command[3]
+        if not os.path.exists(destination):
+            open(destination, 'w').close()
+
+    mocker.patch.object(extract, '_layer_geometries', return_value=LAYER_GEOMETRIES)
+    mocker.patch.object(extract, '_feature_count', return_value=7)
+    mocker.patch.object(extract, 'logged_check_call', side_effect=ogr2ogr)
+    return calls
+
+
+@pytest.fixture
+def current_rq_job():
+    job = mock.Mock(meta={})
+    _job_stack.push(job)  # known to the current thread only, like in an rq worker
+    yield job
+    _job_stack.pop()
+
+
+def test_shapefile_layers_are_exported_to_a_file_each(tmpdir, ogr2ogr_calls, mocker):
+    mocker.patch.dict(CONVERSION_SETTINGS, {'EXPORT_SPATIALLY_SORTED': False})
+    record_layer_statistics = mocker.patch.object(extract, 'record_layer_statistics')
+
+    output_path = extract.extract_to(
+        to_format=output_format.SHAPEFILE, output_dir=str(tmpdir), base_filename='export', out_srs='EPSG:4326',
+        db_name='osmaxx_db',
+    )
+
+    assert output_path == os.path.join(str(tmpdir), 'export.shp')
+    assert sorted(os.listdir(output_path)) == ['building_a.shp', 'poi_p.shp', 'road_l.shp']
+    assert sorted(command[-3] for command in ogr2ogr_calls) == sorted(LAYERS)
+    assert all(command[-2:] == ['-lco', 'ENCODING=UTF-8'] for command in ogr2ogr_calls)
+    assert sorted(call[1][0] for call in record_layer_statistics.mock_calls) == sorted(LAYERS)
+    assert all(call[2]['feature_count'] == 7 for call in record_layer_statistics.mock_calls)
+
+
+def test_layers_of_single_file_formats_are_merged_into_one_dataset(tmpdir, ogr2ogr_calls):
+    output_path = extract.extract_to(
+        to_format=output_format.SPATIALITE, output_dir=str(tmpdir), base_filename='export', out_srs='EPSG:4326',
+        db_name='osmaxx_db',
+    )
+
+    assert output_path == os.path.join(str(tmpdir), 'export.sqlite')
+    assert os.listdir(str(tmpdir)) == ['export.sqlite']
+    exports, merges = ogr2ogr_calls[:len(LAYERS)], ogr2ogr_calls[len(LAYERS):]
+    assert all('-dsco' in command and '-t_srs' in command for command in exports)
+    assert [command[:4] for command in merges] == [['ogr2ogr', '-f', 'SQLite', output_path]] * 2
+    assert [os.path.basename(command[4]) for command in merges] == ['road_l.sqlite', 'poi_p.sqlite']
+    assert all(command[5:] == ['-update', '-nlt', 'GEOMETRY'] for command in merges)
+
+
+def test_layers_of_formats_with_a_file_per_layer_are_not_merged(tmpdir, ogr2ogr_calls):
+    output_path = extract.extract_to(
+        to_format=output_format.GEOPARQUET, output_dir=str(tmpdir), base_filename='export', out_srs='EPSG:4326',
+        db_name='osmaxx_db',
+    )
+
+    assert output_path == os.path.join(str(tmpdir), 'export.parquet')
+    assert sorted(os.listdir(output_path)) == ['building_a.parquet', 'poi_p.parquet', 'road_l.parquet']
+    assert len(ogr2ogr_calls) == len(LAYERS)
+    assert all(command[:3] == ['ogr2ogr', '-f', 'Parquet'] for command in ogr2ogr_calls)
+
+
+def test_spatially_sorted_layers_are_read_in_geohash_order_of_their_centroids(tmpdir, ogr2ogr_calls, mocker):
+    mocker.patch.dict(CONVERSION_SETTINGS, {'EXPORT_SPATIALLY_SORTED': True})
+
+    extract.extract_to(
+        to_format=output_format.FLATGEOBUF, output_dir=str(tmpdir), base_filename='export', out_srs='EPSG:4326',
+        db_name='osmaxx_db', schema='osmaxx_job_1',
+    )
+
+    road_command = next(command for command in ogr2ogr_calls if 'road_l' in command)
+    sql = road_command[road_command.index('-sql') + 1]
+    assert sql.startswith('SELECT * FROM "osmaxx_job_1"."road_l" ORDER BY ')
+    assert 'ST_GeoHash(ST_Centroid("geom"))' in sql
+    assert road_command[road_command.index('-nln') + 1] == 'road_l'
+    assert road_command[road_command.index('-nlt') + 1] == 'MULTILINESTRING'
+    assert road_command[road_command.index('-s_srs') + 1] == 'EPSG:4326'
+
+
+def test_spatially_sorted_layers_are_read_in_their_own_spatial_reference_system(tmpdir, ogr2ogr_calls, mocker):
+    mocker.patch.dict(CONVERSION_SETTINGS, {'EXPORT_SPATIALLY_SORTED': True})
+    mocker.patch.object(extract, '_layer_geometries', return_value=OrderedDict([
+        ('road_l', ('geom', 'MULTILINESTRING', 3857)),
+    ]))
+
+    extract.extract_to(
+        to_format=output_format.GPKG, output_dir=str(tmpdir), base_filename='export', out_srs='EPSG:4326',
+        db_name='osmaxx_db', schema='osmaxx_job_1',
+    )
+
+    road_command, = ogr2ogr_calls
+    assert road_command[road_command.index('-s_srs') + 1] == 'EPSG:3857'
+    assert 'ST_GeoHash(ST_Transform(ST_Centroid("geom"), 4326))' in road_command[road_command.index('-sql') + 1]
+
+
+def test_layers_are_not_spatially_sorted_by_default(tmpdir, ogr2ogr_calls):
+    extract.extract_to(
+        to_format=output_format.GPKG, output_dir=str(tmpdir), base_filename='export', out_srs='EPSG:4326',
+        db_name='osmaxx_db',
+    )
+
+    assert not any('-sql' in command for command in ogr2ogr_calls)
+
+
+def test_layer_statistics_of_layers_exported_concurrently_reach_the_job(tmpdir, ogr2ogr_calls, current_rq_job, mocker):
+    mocker.patch.dict(CONVERSION_SETTINGS, {'EXPORT_PARALLELISM': 3})
+
+    extract.extract_to(
+        to_format=output_format.SHAPEFILE, output_dir=str(tmpdir), base_filename='export', out_srs='EPSG:4326',
+        db_name='osmaxx_db',
+    )
+
+    assert sorted(current_rq_job.meta['layer_statistics']) == sorted(LAYERS)
+    assert all(statistics['feature_count'] == 7 for statistics in current_rq_job.meta['layer_statistics'].values())
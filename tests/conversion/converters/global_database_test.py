@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_gis.bootstrap import global_database
+from osmaxx.conversion.converters.converter_gis.detail_levels import DETAIL_LEVEL_ALL, DETAIL_LEVEL_REDUCED
+from osmaxx.utils import polyfile_helpers
+
+
+@pytest.fixture
+def change_file_directory(tmpdir, mocker):
+    directory = str(tmpdir.mkdir('changes'))
+    mocker.patch.dict(CONVERSION_SETTINGS, {
+        'GLOBAL_DATABASE_NAME': 'osmaxx_global',
+        'GLOBAL_DATABASE_CHANGE_FILE_DIRECTORY': directory,
+    })
+    return directory
+
+
+def test_requested_layers_are_copied_whole_and_only_land_and_sea_layers_are_cut(
+        change_file_directory, area_polyfile_string):
+    geom = polyfile_helpers.parse_poly_string(area_polyfile_string)
+    clip_sql = global_database.GlobalDatabase(layers=['road_l', 'sea_a'])._clip_sql('osmaxx_job_1_abc', geom=geom)
+
+    assert 'LOCK TABLE osmaxx_published."road_l" IN ACCESS SHARE MODE;' in clip_sql
+    assert 'CREATE TABLE "osmaxx_job_1_abc"."road_l" AS SELECT * FROM view_osmaxx_published."road_l" ' in clip_sql
+    assert 'CREATE TABLE "osmaxx_job_1_abc"."sea_a" AS SELECT ogc_fid, fid, ' \
+           'CAST(wkb_geometry AS geometry(MULTIPOLYGON, 4326)) AS geom FROM (SELECT ' in clip_sql
+    assert 'FROM public.sea_a_subdivided WHERE ST_Intersects(' in clip_sql
+    assert clip_sql.count('CREATE TABLE') == 2
+
+
+def test_update_applies_newer_change_files_in_order_and_publishes_again(change_file_directory, mocker):
+    for file_name in ['20170102T000000Z.osc.gz', '20170101T000000Z.osc.gz', '20170103T000000Z.osc.gz',
+                      'new_changes.osc.gz']:
+        open(os.path.join(change_file_directory, file_name), 'w').close()
+    database = global_database.GlobalDatabase()
+    postgres_mock = mocker.patch.object(database, '_postgres')
+    postgres_mock.execute_sql_command.return_value.scalar.side_effect = ['20170101T000000Z.osc.gz', True]
+    run_osm2pgsql = mocker.patch.object(database, '_run_osm2pgsql')
+    rebuild_and_publish_layers = mocker.patch.object(database, '_rebuild_and_publish_layers')
+
+    assert database.update() == 2
+
+    assert [call[1][1] for call in run_osm2pgsql.mock_calls] == [
+        os.path.join(change_file_directory, '20170102T000000Z.osc.gz'),
+        os.path.join(change_file_directory, '20170103T000000Z.osc.gz'),
+    ]
+    assert run_osm2pgsql.mock_calls[0][1][0][0] == '--append'
+    rebuild_and_publish_layers.assert_called_once_with()
+
+
+def test_update_without_publishing_due_keeps_published_layers(change_file_directory, mocker):
+    open(os.path.join(change_file_directory, '20170101T000000Z.osc.gz'), 'w').close()
+    open(os.path.join(change_file_directory, '20170102T000000Z.osc.gz'), 'w').close()
+    database = global_database.GlobalDatabase()
+    postgres_mock = mocker.patch.object(database, '_postgres')
+    postgres_mock.execute_sql_command.return_value.scalar.side_effect = ['20170101T000000Z.osc.gz', False]
+    mocker.patch.object(database, '_run_osm2pgsql')
+    rebuild_and_publish_layers = mocker.patch.object(database, '_rebuild_and_publish_layers')
+
+    assert database.update() == 1
+    assert not rebuild_and_publish_layers.called
+    publishing_due_sql = postgres_mock.execute_sql_command.call_args_list[-1][0][0]
+    assert "max(published_at) < now() - interval '86400 seconds'" in publishing_due_sql
+
+
+def test_bootstrap_marks_the_change_files_contained_in_the_planet_as_applied(change_file_directory, tmpdir, mocker):
+    for file_name in ['20170101T000000Z.osc.gz', '20170102T000000Z.osc.gz', '20170103T000000Z.osc.gz']:
+        open(os.path.join(change_file_directory, file_name), 'w').close()
+    planet_path = str(tmpdir.join('planet-latest.osm.pbf'))
+    # as written by osm_pbf_updater after moving the planet updated to the changes of this file into place
+    tmpdir.join('planet-latest.osm.pbf' + global_database.LAST_CHANGE_FILE_MARKER_SUFFIX).write(
+        '20170102T000000Z.osc.gz'
+    )
+    mocker.patch.dict(CONVERSION_SETTINGS, {'PBF_PLANET_FILE_PATH': planet_path})
+    database = global_database.GlobalDatabase()
+    mocker.patch.object(database, '_postgres')
+    for method in ['_reset_database', '_import_boundaries', '_import_pbf', '_rebuild_and_publish_layers']:
+        mocker.patch.object(database, method)
+    mark_as_applied = mocker.patch.object(database, '_mark_as_applied')
+
+    database.bootstrap()
+
+    mark_as_applied.assert_called_once_with([
+        os.path.join(change_file_directory, '20170101T000000Z.osc.gz'),
+        os.path.join(change_file_directory, '20170102T000000Z.osc.gz'),
+    ])
+
+
+def test_only_full_detail_conversions_are_clipped_from_the_published_global_database(change_file_directory, mocker):
+    is_published = mocker.patch.object(global_database.GlobalDatabase, 'is_published', return_value=True)
+    assert isinstance(
+        global_database.published_global_database(detail_level=DETAIL_LEVEL_ALL), global_database.GlobalDatabase
+    )
+    assert global_database.published_global_database(detail_level=DETAIL_LEVEL_REDUCED) is None
+
+    is_published.return_value = False
+    assert global_database.published_global_database(detail_level=DETAIL_LEVEL_ALL) is None
+
+    mocker.patch.dict(CONVERSION_SETTINGS, {'GLOBAL_DATABASE_NAME': None})
+    assert global_database.published_global_database(detail_level=DETAIL_LEVEL_ALL) is None
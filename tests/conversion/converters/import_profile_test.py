@@ -0,0 +1,63 @@
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_gis.bootstrap import import_profile
+
+MiB = 1024 ** 2
+GiB = 1024 ** 3
+
+
+def _plan_import(
+        mocker, *, pbf_size, available_memory, cpu_count=8, worker_concurrency=1, keep_slim_tables=False,
+        extra_attributes=True):
+    mocker.patch.dict(CONVERSION_SETTINGS, {'WORKER_CONCURRENCY': worker_concurrency})
+    mocker.patch('os.path.getsize', return_value=pbf_size)
+    mocker.patch('os.cpu_count', return_value=cpu_count)
+    mocker.patch.object(import_profile, '_available_memory_in_bytes', return_value=available_memory)
+    return import_profile.plan_import(
+        '/tmp/extract.pbf',
+        flat_nodes_file_path='/tmp/flat_nodes.bin',
+        keep_slim_tables=keep_slim_tables,
+        extra_attributes=extra_attributes,
+    )
+
+
+def test_small_extract_gets_small_cache_few_processes_and_no_flat_nodes(mocker):
+    profile = _plan_import(mocker, pbf_size=40 * MiB, available_memory=16 * GiB)
+    assert profile.cache_size_in_bytes == import_profile.MIN_NODE_CACHE_SIZE_IN_BYTES
+    assert profile.number_of_processes == 2
+    assert profile.flat_nodes_file_path is None
+    assert profile.command_line_options() == [
+        '--slim', '--cache', '200', '--number-processes', '2', '--drop', '--extra-attributes',
+    ]
+
+
+def test_large_extract_uses_all_cpus_and_cache_proportional_to_its_size(mocker):
+    profile = _plan_import(mocker, pbf_size=2 * GiB, available_memory=16 * GiB, cpu_count=8)
+    assert profile.cache_size_in_bytes == 3 * GiB
+    assert profile.number_of_processes == 8
+    assert profile.flat_nodes_file_path is None
+
+
+def test_extract_exceeding_memory_gets_flat_nodes_and_cache_within_memory(mocker):
+    profile = _plan_import(mocker, pbf_size=20 * GiB, available_memory=16 * GiB)
+    assert profile.cache_size_in_bytes == 12 * GiB
+    assert profile.flat_nodes_file_path == '/tmp/flat_nodes.bin'
+    assert profile.command_line_options() == [
+        '--slim', '--cache', '12288', '--number-processes', '8', '--flat-nodes', '/tmp/flat_nodes.bin', '--drop',
+        '--extra-attributes',
+    ]
+
+
+def test_concurrent_conversions_divide_memory_and_cpus_among_their_imports(mocker):
+    profile = _plan_import(mocker, pbf_size=20 * GiB, available_memory=16 * GiB, cpu_count=8, worker_concurrency=3)
+    assert profile.cache_size_in_bytes == 4 * GiB
+    assert profile.number_of_processes == 2
+    assert profile.flat_nodes_file_path == '/tmp/flat_nodes.bin'
+
+
+def test_slim_tables_and_extra_attributes_are_kept_on_demand(mocker):
+    profile = _plan_import(
+        mocker, pbf_size=40 * MiB, available_memory=16 * GiB, keep_slim_tables=True, extra_attributes=False,
+    )
+    assert '--slim' in profile.command_line_options()
+    assert '--drop' not in profile.command_line_options()
+    assert '--extra-attributes' not in profile.command_line_options()
@@ -0,0 +1,225 @@
+import logging
+import time
+from contextlib import closing
+
+import pytest
+import sqlalchemy
+
+from tests.conversion.converters.inside_worker_test.conftest import sql_from_bootstrap_relative_location, slow
+
+logger = logging.getLogger(__name__)
+
+# interpolation lines, each with both of its endpoints and 5 more addresses
+LINE_COUNT = 20000
+
+# addr_interpolated as created by 0040_interpolate_addresses.sql before the endpoints were looked up set-based
+FORMER_ADDR_INTERPOLATED_SQL = """
+DROP TABLE IF EXISTS former_addr_interpolated;
+CREATE TABLE former_addr_interpolated AS
+with addr_interpolation_line as (
+  select osm_id,
+    hstore(tags)->'addr:interpolation' as interpolation_type,
+    hstore(tags)->'addr:street' as addr_street,
+    way
+  from osm_line
+  where (hstore(tags)->'addr:interpolation') in ('even','odd','all')
+),
+addr_interpolation_line_nodes as (
+  select l.*,
+    nodes[1] as firstnode_id,
+    nodes[array_length(nodes, 1)] as lastnode_id
+  FROM osm_ways w
+  join addr_interpolation_line l on l.osm_id=w.id
+),
+addr_interpolation_line_first_addr as (
+  select l.*,
+    to_pos_int( hstore(p.tags)->'addr:housenumber' ) as first_housenr,
+    hstore(p.tags)->'addr:street' as first_addr_street
+  FROM osm_point p
+  join addr_interpolation_line_nodes l on l.firstnode_id=p.osm_id
+),
+addr_interpolation_line_last_addr as (
+  select l.osm_id,
+    to_pos_int( hstore(p.tags)->'addr:housenumber' ) as last_housenr,
+    hstore(p.tags)->'addr:street' as last_addr_street
+  FROM osm_point p
+  join addr_interpolation_line_nodes l on l.lastnode_id=p.osm_id
+)
+select
+  first.osm_id as line_id,
+  coalesce(addr_street,first_addr_street,last_addr_street) as addr_street,
+  interpolation_type,
+  least(first_housenr,last_housenr) as first_housenr,
+  greatest(first_housenr, last_housenr) as last_housenr,
+  case when (first_housenr > last_housenr) then ST_Reverse(way)
+    else way end as line_geom
+from addr_interpolation_line_first_addr first
+join addr_interpolation_line_last_addr last on last.osm_id=first.osm_id
+where abs(first_housenr - last_housenr) < 1000
+and first_housenr is not null
+and last_housenr is not null
+and (
+  (abs(first_housenr - last_housenr) >= 2 AND interpolation_type IN ('even', 'odd'))
+  or (abs(first_housenr - last_housenr) >= 1 AND interpolation_type = 'all')
+  )
+and (
+  (interpolation_type='even' and first_housenr%2=0 and last_housenr%2=0)
+  or (interpolation_type='odd' and first_housenr%2=1 and last_housenr%2=1)
+  or interpolation_type='all'
+  )
+order by interpolation_type, addr_street;
+"""
+
+# the per-line loop 0040_interpolate_addresses.sql defined before the housenumbers were generated set-based
+FORMER_ADDR_INTERPOLATE_SQL = """
+create or replace function former_addr_interpolate(
+    line_id bigint,
+    addr_street text,
+    interpolation_type text,
+    first_housenr integer,
+    last_housenr integer,
+    line_geom geometry)
+returns void as $$
+declare
+    delta integer := 2;
+    countstart numeric;
+    countend numeric;
+    step numeric;
+    location numeric;
+begin
+    if (interpolation_type = 'all') then
+        delta := 1;
+    else
+        delta := 2;
+    end if;
+    countstart := first_housenr + delta;
+    countend := last_housenr - delta;
+    if countend = countstart then
+        select 0.5 into step;
+    else
+        select 1/((countend - countstart) / delta::numeric + 2) into step;
+    end if;
+    select step into location;
+    for housenr in countstart..countend by delta loop
+      INSERT INTO former_interpolated_points
+      select line_id, addr_street, housenr, st_line_interpolate_point(line_geom, location);
+      select location+step into location;
+    end loop;
+end;
+$$ language plpgsql volatile;
+DROP TABLE IF EXISTS former_interpolated_points;
+CREATE TABLE former_interpolated_points(line_id integer, addr_street text, housenr integer, point_geom geometry);
+SELECT former_addr_interpolate(line_id, addr_street, interpolation_type, first_housenr, last_housenr, line_geom)
+FROM addr_interpolated;
+"""
+
+ADDRESS_DENSE_DATA_SQL = """
+INSERT INTO osm_ways (id, nodes)
+SELECT i, ARRAY[i * 10 + 1, i * 10 + 2, i * 10 + 3] FROM generate_series(1, :line_count) i;
+
+INSERT INTO osm_line (osm_id, tags, way)
+SELECT i,
+  hstore(ARRAY[
+    'addr:interpolation', (ARRAY['even', 'odd', 'all', 'alphabetic'])[i % 4 + 1],
+    'addr:street', CASE WHEN i % 3 = 0 THEN NULL ELSE 'Line Street ' || i % 50 END
+  ]),
+  ST_SetSRID(ST_MakeLine(ARRAY[ST_MakePoint(i, 0), ST_MakePoint(i, 50), ST_MakePoint(i + 20, 100)]), 900913)
+FROM generate_series(1, :line_count) i;
+
+-- endpoints with all kinds of housenumbers, the node in between is no point of its own
+INSERT INTO osm_point (osm_id, tags, way)
+SELECT i * 10 + endpoint,
+  hstore(ARRAY[
+    'addr:housenumber', CASE
+      WHEN i % 13 = 0 THEN 'unknown'
+      WHEN i % 17 = 0 THEN (i * endpoint * 7 % 3000)::text
+      WHEN i % 11 = 0 THEN ((i * 7 + endpoint / 3 * (i % 41)) % 120)::text || 'a'
+      ELSE ((i * 7 + endpoint / 3 * (i % 41)) % 120)::text
+    END,
+    'addr:street', CASE WHEN i % 5 = 0 THEN NULL ELSE 'Point Street ' || i % 7 END
+  ]),
+  ST_SetSRID(ST_MakePoint(i, endpoint * 50), 900913)
+FROM generate_series(1, :line_count) i, (VALUES (1), (3)) AS endpoints(endpoint);
+
+-- addresses not interpolated
+INSERT INTO osm_point (osm_id, tags, way)
+SELECT i * 10 + 4 + n, hstore('addr:housenumber', n::text), ST_SetSRID(ST_MakePoint(i, n), 900913)
+FROM generate_series(1, :line_count) i, generate_series(0, 4) n;
+
+ANALYZE osm_ways; ANALYZE osm_line; ANALYZE osm_point;
+"""
+
+
+@pytest.fixture
+def address_dense_data(osmaxx_functions, clean_osm_tables, request):
+    assert osmaxx_functions == clean_osm_tables  # same db-connection
+    engine = osmaxx_functions
+    engine.execute(sqlalchemy.text(ADDRESS_DENSE_DATA_SQL).execution_options(autocommit=True), line_count=LINE_COUNT)
+
+    def _cleanup():
+        engine.execute(sqlalchemy.text(
+            'DROP TABLE IF EXISTS former_addr_interpolated; DROP TABLE IF EXISTS former_interpolated_points; '
+            'DROP TABLE IF EXISTS interpolated_points;'
+        ).execution_options(autocommit=True))
+    request.addfinalizer(_cleanup)
+    return engine
+
+
+@slow
+def test_addr_interpolated_equals_former_result(address_dense_data):
+    engine = address_dense_data
+
+    former_duration = _timed_execute(engine, FORMER_ADDR_INTERPOLATED_SQL)
+    duration = _timed_execute(
+        engine, sql_from_bootstrap_relative_location('sql/functions/0040_interpolate_addresses.sql')
+    )
+    logger.info(
+        'addr_interpolated of %s lines took %.3f s, formerly %.3f s', LINE_COUNT, duration, former_duration
+    )
+
+    columns = 'line_id, addr_street, interpolation_type, first_housenr, last_housenr, ST_AsEWKB(line_geom)'
+    assert _row_count(engine, 'addr_interpolated') > 0
+    assert _row_count(engine, 'addr_interpolated') == _row_count(engine, 'former_addr_interpolated')
+    assert _row_count(engine, _rows_missing_in('former_addr_interpolated', 'addr_interpolated', columns)) == 0
+
+
+@slow
+def test_interpolated_housenumbers_equal_former_ones(address_dense_data):
+    engine = address_dense_data
+    engine.execute(sqlalchemy.text(
+        sql_from_bootstrap_relative_location('sql/functions/0040_interpolate_addresses.sql')
+    ).execution_options(autocommit=True))
+
+    former_duration = _timed_execute(engine, FORMER_ADDR_INTERPOLATE_SQL)
+    duration = _timed_execute(
+        engine,
+        'DROP TABLE IF EXISTS interpolated_points; CREATE TABLE interpolated_points AS '
+        'SELECT line_id, addr_street, housenr, st_line_interpolate_point(line_geom, location) AS point_geom '
+        'FROM addr_interpolated, addr_interpolation_housenumbers(interpolation_type, first_housenr, last_housenr);',
+    )
+    logger.info(
+        'interpolating the housenumbers of %s lines took %.3f s, formerly %.3f s', LINE_COUNT, duration,
+        former_duration,
+    )
+
+    columns = 'line_id, addr_street, housenr, ST_AsEWKB(point_geom)'
+    assert _row_count(engine, 'interpolated_points') > 0
+    assert _row_count(engine, 'interpolated_points') == _row_count(engine, 'former_interpolated_points')
+    assert _row_count(engine, _rows_missing_in('former_interpolated_points', 'interpolated_points', columns)) == 0
+
+
+def _timed_execute(engine, sql):
+    started_at = time.monotonic()
+    engine.execute(sqlalchemy.text(sql).execution_options(autocommit=True))
+    return time.monotonic() - started_at
+
+
+def _rows_missing_in(table, other_table, columns):
+    return '(SELECT {columns} FROM {other_table} EXCEPT ALL SELECT {columns} FROM {table}) AS missing'.format(
+        columns=columns, table=table, other_table=other_table,
+    )
+
+
+def _row_count(engine, from_clause):
+    with closing(engine.execute(sqlalchemy.text('SELECT count(*) FROM {};'.format(from_clause)))) as result:
+        return result.scalar()
@@ -0,0 +1,36 @@
+import os
+import subprocess
+
+import pytest
+
+from osmaxx.conversion import output_format
+from osmaxx.conversion.converters.converter_gis.extract.db_to_format import extract
+from tests.conftest import postgres_container_translit_host, postgres_container_userland_port
+from tests.conversion.converters.inside_worker_test.conftest import slow, db_name
+from tests.conversion.converters.inside_worker_test.declarative_schema import osm_models
+
+
+@pytest.fixture
+def cemetery_data_import(data_import, monkeypatch):
+    # ogr2ogr reads the layers through libpq, which takes the test database's host and port from the environment
+    monkeypatch.setenv('PGHOST', postgres_container_translit_host)
+    monkeypatch.setenv('PGPORT', str(postgres_container_userland_port))
+    with data_import({osm_models.t_osm_polygon: dict(landuse='cemetery')}) as engine:
+        yield engine
+
+
+@slow
+@pytest.mark.parametrize(
+    'to_format, ogr_driver', [(output_format.FLATGEOBUF, 'FlatGeobuf'), (output_format.GEOPARQUET, 'Parquet')]
+)
+def test_extract_to_writes_a_readable_file_per_layer(cemetery_data_import, tmpdir, to_format, ogr_driver):
+    output_path = extract.extract_to(
+        to_format=to_format, output_dir=str(tmpdir), base_filename='export', out_srs='EPSG:4326', db_name=db_name,
+    )
+
+    extension = output_format.DEFINITIONS[to_format].layer_filename_extension
+    layer_path = os.path.join(output_path, 'poi_a' + extension)
+    ogrinfo_output = subprocess.check_output(['ogrinfo', '-ro', '-so', layer_path, 'poi_a']).decode('utf-8')
+    assert "using driver `{}' successful".format(ogr_driver) in ogrinfo_output
+    assert extract._feature_count(layer_path, 'poi_a') == 1
+    assert all(file_name.endswith(extension) for file_name in os.listdir(output_path))
@@ -0,0 +1,69 @@
+from contextlib import closing
+
+import pytest
+import sqlalchemy
+
+from tests.conversion.converters.inside_worker_test.conftest import sql_from_bootstrap_relative_location, slow
+from tests.conversion.converters.inside_worker_test.declarative_schema import osm_models
+
+# the statements sweeping_data.sql applied to each row before lowercasing and trimming were merged into one pass
+FORMER_HARMONIZATIONS = {
+    'lower and trim': 'trim(lower(:value))',
+    'lower': 'lower(:value)',
+    'trim': 'trim(:value)',
+    'none': 'CAST(:value AS text)',
+}
+
+HARMONIZED_COLUMNS = [
+    (osm_models.t_osm_point, 'amenity', 'lower and trim'),
+    (osm_models.t_osm_point, 'office', 'lower and trim'),
+    (osm_models.t_osm_point, 'addr:postcode', 'lower'),
+    (osm_models.t_osm_point, 'addr:street', 'none'),
+    (osm_models.t_osm_point, 'name', 'none'),
+    (osm_models.t_osm_line, 'highway', 'lower and trim'),
+    (osm_models.t_osm_line, 'tracktype', 'lower and trim'),
+    (osm_models.t_osm_polygon, 'building', 'lower and trim'),
+    (osm_models.t_osm_polygon, 'office', 'trim'),
+    (osm_models.t_osm_polygon, 'tracktype', 'none'),
+]
+
+VALUES = ['residential', 'Residential', '  Primary Road ', '\tTabbed ', 'ÖBB Infrastruktur', 'МОСКВА ', 'Straße']
+
+
+@pytest.fixture(
+    params=HARMONIZED_COLUMNS,
+    ids=['{}.{}'.format(table.name, column) for table, column, _ in HARMONIZED_COLUMNS],
+)
+def harmonized_column(request):
+    return request.param
+
+
+@pytest.fixture(params=VALUES)
+def value(request):
+    return request.param
+
+
+@slow
+def test_single_pass_harmonization_yields_former_harmonization_and_keeps_tags(
+        osmaxx_functions, clean_osm_tables, harmonized_column, value):
+    assert osmaxx_functions == clean_osm_tables  # same db-connection
+    engine = osmaxx_functions
+    table, column, former_harmonization = harmonized_column
+
+    engine.execute(
+        table.insert().values({column: value, 'tags': {column: value}}).execution_options(autocommit=True)
+    )
+    engine.execute(
+        sqlalchemy.text(sql_from_bootstrap_relative_location('sql/sweeping_data.sql')).execution_options(
+            autocommit=True
+        )
+    )
+
+    with closing(engine.execute(sqlalchemy.select([table.c[column], table.c.tags]))) as result:
+        swept_value, tags = result.first()
+    with closing(engine.execute(
+        sqlalchemy.text('SELECT {}'.format(FORMER_HARMONIZATIONS[former_harmonization])), value=value
+    )) as result:
+        formerly_swept_value = result.scalar()
+    assert swept_value == formerly_swept_value
+    assert tags == {column: value}
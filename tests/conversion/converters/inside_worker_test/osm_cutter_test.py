@@ -1,4 +1,4 @@
-from osmaxx.conversion.converters.converter_pbf.to_pbf import cut_area_from_pbf
+from osmaxx.conversion.converters.converter_pbf.to_pbf import cut_area_from_pbf, cut_bbox_from_pbf
 
 
 def test_cut_area_from_pbf(mocker):
@@ -20,3 +20,26 @@ def test_cut_area_from_pbf(mocker):
         "{}".format(CONVERSION_SETTINGS["PBF_PLANET_FILE_PATH"]),
     ]
     check_call_mock.assert_called_with(command)
+
+
+def test_cut_area_from_pbf_uses_given_source(mocker):
+    import subprocess
+
+    check_call_mock = mocker.patch.object(subprocess, 'check_call')
+    pbf_result_file_path = mocker.Mock()
+    extent_polyfile_path = mocker.Mock()
+
+    cut_area_from_pbf(pbf_result_file_path, extent_polyfile_path, source_pbf_file_path='/some/pre-extract.osm.pbf')
+    command = check_call_mock.call_args[0][0]
+    assert command[-1] == '/some/pre-extract.osm.pbf'
+
+
+def test_cut_bbox_from_pbf(mocker):
+    import subprocess
+
+    check_call_mock = mocker.patch.object(subprocess, 'check_call')
+    pbf_result_file_path = mocker.Mock()
+
+    cut_bbox_from_pbf(pbf_result_file_path, (7.3, 46.9, 7.5, 47.0))
+    command = check_call_mock.call_args[0][0]
+    assert "-b=7.3,46.9,7.5,47.0" in command
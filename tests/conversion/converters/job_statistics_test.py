@@ -0,0 +1,73 @@
+import subprocess
+from unittest import mock
+
+import pytest
+
+from osmaxx.conversion.converters import job_statistics
+
+
+@pytest.fixture
+def rq_job(mocker):
+    job = mock.Mock(meta={})
+    mocker.patch.object(job_statistics, 'get_current_job', return_value=job)
+    return job
+
+
+def test_timed_records_stage_durations_in_order(rq_job, mocker):
+    mocker.patch.object(job_statistics.time, 'monotonic', side_effect=[0, 1.5, 2, 12])
+    with job_statistics.timed('cut'):
+        pass
+    with job_statistics.timed('import'):
+        pass
+    assert list(rq_job.meta['stage_durations'].items()) == [('cut', 1.5), ('import', 10)]
+
+
+def test_timed_records_nothing_when_stage_fails(rq_job):
+    with pytest.raises(RuntimeError):
+        with job_statistics.timed('cut'):
+            raise RuntimeError()
+    assert 'stage_durations' not in rq_job.meta
+
+
+def test_stage_durations_measured_elsewhere_are_recorded_after_timed_ones(rq_job, mocker):
+    mocker.patch.object(job_statistics.time, 'monotonic', side_effect=[0, 1.5])
+    with job_statistics.timed('filter'):
+        pass
+    job_statistics.record_stage_duration('filter/road', 0.75)
+    assert list(rq_job.meta['stage_durations'].items()) == [('filter', 1.5), ('filter/road', 0.75)]
+
+
+def test_timed_outside_of_rq_job_records_nothing(mocker):
+    mocker.patch.object(job_statistics, 'get_current_job', return_value=None)
+    with job_statistics.timed('cut'):
+        pass
+
+
+def test_worker_environment_holds_host_and_first_line_of_tool_versions(rq_job, mocker):
+    job_statistics._tool_version.cache_clear()
+    mocker.patch('socket.gethostname', return_value='worker-1')
+    run = mocker.patch.object(
+        subprocess, 'run', return_value=mock.Mock(stdout=b'\nosm2pgsql version 0.96.0 (64 bit id space)\n\nmore\n')
+    )
+    job_statistics.record_worker_environment(tools=['osm2pgsql'])
+    assert rq_job.meta['worker_host'] == 'worker-1'
+    assert rq_job.meta['tool_versions'] == {'osm2pgsql': 'osm2pgsql version 0.96.0 (64 bit id space)'}
+    assert run.call_args[0][0] == ['osm2pgsql', '--version']
+    job_statistics._tool_version.cache_clear()
+
+
+def test_missing_tool_has_no_version(rq_job, mocker):
+    job_statistics._tool_version.cache_clear()
+    mocker.patch.object(subprocess, 'run', side_effect=FileNotFoundError())
+    job_statistics.record_worker_environment(tools=['osmium'])
+    assert rq_job.meta['tool_versions'] == {'osmium': None}
+    job_statistics._tool_version.cache_clear()
+
+
+def test_layer_statistics_are_recorded_in_the_order_the_layers_are_done(rq_job):
+    job_statistics.record_layer_statistics('road_l', duration=2.5, feature_count=120)
+    job_statistics.record_layer_statistics('adminarea_a', duration=0.25, feature_count=3)
+    assert list(rq_job.meta['layer_statistics'].items()) == [
+        ('road_l', {'duration': 2.5, 'feature_count': 120}),
+        ('adminarea_a', {'duration': 0.25, 'feature_count': 3}),
+    ]
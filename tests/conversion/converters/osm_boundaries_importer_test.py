@@ -0,0 +1,133 @@
+from unittest import mock
+
+import pytest
+
+from osmaxx.conversion.converters.converter_gis.helper import osm_boundaries_importer
+from osmaxx.utils import polyfile_helpers
+
+COPY_DATA = b'PGCOPY\n\xff\r\n\x00' + bytes(range(256)) * 4096
+
+
+def _connection(copy_expert):
+    connection = mock.Mock()
+    connection.cursor.return_value.copy_expert.side_effect = copy_expert
+    return connection
+
+
+def test_copy_between_streams_everything_copied_out_into_copy_in():
+    copied_in = []
+
+    def copy_out(sql, file):
+        for start in range(0, len(COPY_DATA), 8192):
+            file.write(COPY_DATA[start:start + 8192])
+
+    def copy_in(sql, file):
+        copied_in.append(file.read())
+
+    source_connection = _connection(copy_out)
+    target_connection = _connection(copy_in)
+
+    osm_boundaries_importer._copy_between(source_connection, 'COPY out', target_connection, 'COPY in')
+
+    assert copied_in == [COPY_DATA]
+    assert source_connection.cursor.return_value.copy_expert.call_args[0][0] == 'COPY out'
+    assert target_connection.cursor.return_value.copy_expert.call_args[0][0] == 'COPY in'
+
+
+def test_copy_between_fails_if_copying_out_fails():
+    def copy_out(sql, file):
+        file.write(COPY_DATA[:100])
+        raise RuntimeError('connection to the OSM boundaries database lost')
+
+    with pytest.raises(RuntimeError):
+        osm_boundaries_importer._copy_between(
+            _connection(copy_out), 'COPY out', _connection(lambda sql, file: file.read()), 'COPY in'
+        )
+
+
+def test_copy_between_doesnt_hang_if_copying_in_fails():
+    def copy_out(sql, file):
+        file.write(COPY_DATA)
+
+    def copy_in(sql, file):
+        file.read(10)
+        raise ValueError('invalid COPY data')
+
+    with pytest.raises(ValueError):
+        osm_boundaries_importer._copy_between(_connection(copy_out), 'COPY out', _connection(copy_in), 'COPY in')
+
+
+@pytest.fixture
+def importer(mocker):
+    mocker.patch.object(osm_boundaries_importer, 'create_engine')
+    mocker.patch.object(osm_boundaries_importer, '_osm_boundaries_db_engine')
+    mocker.patch.object(osm_boundaries_importer, '_osm_boundaries_meta_data')
+    return osm_boundaries_importer.OSMBoundariesImporter(local_db_name='osmaxx_db')
+
+
+def test_land_and_sea_are_cut_from_pieces_of_their_subdivided_copies(importer, area_polyfile_string):
+    extent = polyfile_helpers.parse_poly_string(area_polyfile_string)
+
+    sea_sql = importer._clipped_rows_sql('sea_a', extent)
+    coastline_sql = importer._clipped_rows_sql('coastline_l', extent)
+
+    assert 'FROM public.sea_a_subdivided WHERE ST_Intersects(wkb_geometry, ' in sea_sql
+    assert sea_sql.endswith('GROUP BY ogc_fid, fid')
+    assert coastline_sql.startswith('SELECT ogc_fid, fid, wkb_geometry FROM coastline_l WHERE ST_Intersects(')
+
+
+def _connection_finding_fingerprints(current_fingerprint, subdivided_fingerprint):
+    connection = mock.MagicMock()
+
+    def execute(statement, **parameters):
+        result = mock.Mock()
+        if 'relfilenode' in str(statement):
+            result.scalar.return_value = current_fingerprint
+        elif str(statement).startswith('SELECT fingerprint'):
+            result.scalar.return_value = subdivided_fingerprint
+        return result
+    connection.execute.side_effect = execute
+    return connection
+
+
+def _executed_sql(connection):
+    return [str(call[1][0]) for call in connection.execute.mock_calls]
+
+
+def test_subdivided_tables_are_built_if_the_tables_have_changed(importer):
+    connection = _connection_finding_fingerprints('sea_a:2', 'sea_a:1')
+    importer._osm_boundaries_db_engine.begin.return_value.__enter__.return_value = connection
+
+    importer.ensure_subdivided_tables()
+
+    executed_sql = _executed_sql(connection)
+    assert any(sql.startswith('DROP TABLE IF EXISTS sea_a_subdivided; ') for sql in executed_sql)
+    assert any(sql.startswith('DROP TABLE IF EXISTS landmass_a_subdivided; ') for sql in executed_sql)
+    assert connection.execute.mock_calls[-1][2] == dict(fingerprint='sea_a:2')
+
+
+def test_subdivided_tables_are_kept_if_the_tables_are_unchanged(importer):
+    connection = _connection_finding_fingerprints('sea_a:1', 'sea_a:1')
+    importer._osm_boundaries_db_engine.begin.return_value.__enter__.return_value = connection
+
+    importer.ensure_subdivided_tables()
+
+    assert not any('subdivided' in sql for sql in _executed_sql(connection))
+
+
+def test_clipped_rows_are_copied_out_once_and_then_loaded_from_the_cache(importer, tmpdir):
+    cache = osm_boundaries_importer.ClippedBoundariesCache(str(tmpdir), max_size_in_bytes=10 * len(COPY_DATA))
+    source_connection = _connection(lambda sql, file: file.write(COPY_DATA))
+    importer._osm_boundaries_db_engine.raw_connection.return_value = source_connection
+    copied_in = []
+    local_connection = _connection(lambda sql, file: copied_in.append(file.read()))
+    importer._local_db_engine.raw_connection.return_value = local_connection
+
+    for _ in range(2):
+        importer._copy_into_local_db_through_cache(cache, 'some_key', 'sea_a', 'SELECT 1')
+
+    assert source_connection.cursor.return_value.copy_expert.call_count == 1
+    assert source_connection.cursor.return_value.copy_expert.call_args[0][0] == \
+        'COPY (SELECT 1) TO STDOUT WITH (FORMAT binary)'
+    assert copied_in == [COPY_DATA, COPY_DATA]
+    assert cache.contains('some_key')
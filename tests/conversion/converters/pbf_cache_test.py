@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+
+import pytest
+
+from osmaxx.conversion.converters.converter_pbf.cache import CutPbfCache, cache_key
+
+
+@pytest.fixture
+def cache_directory(tmpdir):
+    return str(tmpdir.mkdir('pbf_cache'))
+
+
+@pytest.fixture
+def out_directory(tmpdir):
+    return str(tmpdir.mkdir('out'))
+
+
+def _producer(content, calls):
+    def produce(path):
+        calls.append(path)
+        with open(path, 'wb') as pbf_file:
+            pbf_file.write(content)
+    return produce
+
+
+def test_cache_key_depends_on_polygon_and_snapshot():
+    assert cache_key('poly', 'snapshot-1') == cache_key('poly', 'snapshot-1')
+    assert cache_key('poly', 'snapshot-1') != cache_key('poly', 'snapshot-2')
+    assert cache_key('poly', 'snapshot-1') != cache_key('other poly', 'snapshot-1')
+
+
+def test_cut_is_produced_only_once_per_key(cache_directory, out_directory):
+    cache = CutPbfCache(cache_directory, max_size_in_bytes=1024)
+    calls = []
+    for job in ['fgdb', 'garmin']:
+        out_path = os.path.join(out_directory, job + '.pbf')
+        cache.provide('some-key', _producer(b'pbf', calls), out_path)
+        with open(out_path, 'rb') as pbf_file:
+            assert pbf_file.read() == b'pbf'
+    assert len(calls) == 1
+
+
+def test_failed_production_is_not_published(cache_directory, out_directory):
+    cache = CutPbfCache(cache_directory, max_size_in_bytes=1024)
+
+    def failing_produce(path):
+        with open(path, 'wb') as pbf_file:
+            pbf_file.write(b'half')
+        raise RuntimeError('osmconvert crashed')
+
+    with pytest.raises(RuntimeError):
+        cache.provide('some-key', failing_produce, os.path.join(out_directory, 'out.pbf'))
+    assert not any(name.endswith('.pbf') or name.endswith('.part') for name in os.listdir(cache_directory))
+
+
+def test_least_recently_used_entries_are_evicted(cache_directory, out_directory):
+    cache = CutPbfCache(cache_directory, max_size_in_bytes=10)
+    calls = []
+    for key in ['old', 'recent', 'new']:
+        cache.provide(key, _producer(b'12345', calls), os.path.join(out_directory, key + '.pbf'))
+        os.utime(os.path.join(cache_directory, key + '.osm.pbf'), (len(calls), len(calls)))
+    cached_files = sorted(name for name in os.listdir(cache_directory) if name.endswith('.osm.pbf'))
+    assert cached_files == ['new.osm.pbf', 'recent.osm.pbf']
+
+
+def test_evicted_entries_leave_no_lock_files_behind(cache_directory, out_directory):
+    cache = CutPbfCache(cache_directory, max_size_in_bytes=10)
+    calls = []
+    for key in ['old', 'recent', 'new']:
+        cache.provide(key, _producer(b'12345', calls), os.path.join(out_directory, key + '.pbf'))
+        os.utime(os.path.join(cache_directory, key + '.osm.pbf'), (len(calls), len(calls)))
+    assert sorted(name for name in os.listdir(cache_directory) if name.endswith('.lock')) == \
+        ['new.lock', 'recent.lock']
+
+
+def test_lock_acquired_on_a_removed_lock_file_is_retried(cache_directory):
+    cache = CutPbfCache(cache_directory, max_size_in_bytes=10)
+    lock_path = os.path.join(cache_directory, 'key.lock')
+    lock_file_existed_while_locked = []
+
+    def wait_for_lock():
+        with cache.locked('key'):
+            lock_file_existed_while_locked.append(os.path.exists(lock_path))
+
+    with cache.locked('key'):
+        waiting = threading.Thread(target=wait_for_lock)
+        waiting.start()
+        time.sleep(0.1)  # let it open the lock file and wait for the lock
+        os.remove(lock_path)  # like an eviction does
+    waiting.join()
+
+    assert lock_file_existed_while_locked == [True]
+
+
+def test_entry_evicted_by_a_concurrent_evictor_is_skipped(cache_directory, out_directory, mocker):
+    cache, concurrent_cache = (CutPbfCache(cache_directory, max_size_in_bytes=5) for _ in range(2))
+    calls = []
+    cache.provide('old', _producer(b'12345', calls), os.path.join(out_directory, 'old.pbf'))
+    with open(os.path.join(cache_directory, 'new.osm.pbf'), 'wb') as pbf_file:
+        pbf_file.write(b'12345')
+    os.utime(os.path.join(cache_directory, 'old.osm.pbf'), (0, 0))
+    entries_listed_by_both = concurrent_cache._entries_least_recently_used_first()
+    mocker.patch.object(
+        concurrent_cache, '_entries_least_recently_used_first', return_value=entries_listed_by_both,
+    )
+
+    cache._evict(keep=os.path.join(cache_directory, 'new.osm.pbf'))
+    concurrent_cache._evict(keep=os.path.join(cache_directory, 'new.osm.pbf'))
+
+    assert sorted(os.listdir(cache_directory)) == ['new.osm.pbf']
+
+
+def test_failing_eviction_does_not_fail_providing(cache_directory, out_directory, mocker):
+    cache = CutPbfCache(cache_directory, max_size_in_bytes=5)
+    mocker.patch.object(cache, '_evict', side_effect=FileNotFoundError)
+    out_path = os.path.join(out_directory, 'out.pbf')
+
+    cache.provide('some-key', _producer(b'12345', []), out_path)
+
+    with open(out_path, 'rb') as pbf_file:
+        assert pbf_file.read() == b'12345'
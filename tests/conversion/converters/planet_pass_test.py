@@ -0,0 +1,92 @@
+import json
+from datetime import timedelta
+
+import pytest
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_pbf import planet_pass
+from osmaxx.conversion.converters.converter_pbf.cache import CutPbfCache, cache_key
+
+
+@pytest.fixture
+def cache(tmpdir, mocker):
+    directory = str(tmpdir.mkdir('pbf_cache'))
+    mocker.patch.dict(CONVERSION_SETTINGS, {
+        'PBF_CACHE_DIRECTORY': directory,
+        'PLANET_PASS_COALESCING_WINDOW': timedelta(seconds=0),
+    })
+    return CutPbfCache(directory, max_size_in_bytes=1024 ** 2)
+
+
+@pytest.fixture
+def osmium_extract_paths(mocker):
+    extracted_paths = []
+
+    def extract(command, **_):
+        config_path = command[command.index('--config') + 1]
+        with open(config_path) as config_file:
+            for extract in json.load(config_file)['extracts']:
+                extracted_paths.append(extract['output'])
+                with open(extract['output'], 'wb') as pbf_file:
+                    pbf_file.write(b'cut in planet pass')
+    mocker.patch.object(planet_pass, 'check_call_reporting_progress', side_effect=extract)
+    return extracted_paths
+
+
+def test_pending_cuts_are_cut_in_the_same_pass(tmpdir, cache, osmium_extract_paths, mocker):
+    mocker.patch.object(planet_pass, '_deregister')
+    mocker.patch.object(planet_pass, '_pop_pending_planet_cuts', return_value=['pending poly', 'own poly'])
+    out_path = str(tmpdir.join('own.pbf'))
+
+    planet_pass.cut_together_with_pending('own poly', out_path, cache=cache, snapshot_identity='snapshot')
+
+    assert len(osmium_extract_paths) == 2
+    assert tmpdir.join('own.pbf').read_binary() == b'cut in planet pass'
+    assert cache.contains(cache_key('pending poly', 'snapshot'))
+    assert not cache.contains(cache_key('own poly', 'snapshot'))
+
+
+def test_already_cached_pending_cuts_are_not_cut_again(tmpdir, cache, osmium_extract_paths, mocker):
+    mocker.patch.object(planet_pass, '_deregister')
+    mocker.patch.object(planet_pass, '_pop_pending_planet_cuts', return_value=['pending poly'])
+    pending_key = cache_key('pending poly', 'snapshot')
+    with open(cache.unpublished_path(pending_key), 'wb') as pbf_file:
+        pbf_file.write(b'cut before')
+    cache.publish(pending_key, cache.unpublished_path(pending_key))
+
+    planet_pass.cut_together_with_pending(
+        'own poly', str(tmpdir.join('own.pbf')), cache=cache, snapshot_identity='snapshot'
+    )
+
+    assert osmium_extract_paths == [str(tmpdir.join('own.pbf'))]
+
+
+def test_pending_cuts_of_conversions_waiting_for_the_pass_are_cut_in_the_same_pass(
+        tmpdir, cache, osmium_extract_paths, mocker):
+    mocker.patch.object(planet_pass, '_deregister')
+    mocker.patch.object(planet_pass, '_pop_pending_planet_cuts', return_value=['pending poly'])
+    pending_key = cache_key('pending poly', 'snapshot')
+
+    with cache.locked(pending_key):  # as held by the waiting conversion while it is providing its cut
+        planet_pass.cut_together_with_pending(
+            'own poly', str(tmpdir.join('own.pbf')), cache=cache, snapshot_identity='snapshot'
+        )
+
+    assert len(osmium_extract_paths) == 2
+    assert cache.contains(pending_key)
+
+
+def test_conversion_waiting_for_the_pass_takes_its_cut_from_the_cache(tmpdir, cache, osmium_extract_paths, mocker):
+    mocker.patch.object(planet_pass, '_deregister')
+    mocker.patch.object(planet_pass, '_pop_pending_planet_cuts', return_value=['pending poly'])
+    planet_pass.cut_together_with_pending(
+        'own poly', str(tmpdir.join('own.pbf')), cache=cache, snapshot_identity='snapshot'
+    )
+    del osmium_extract_paths[:]
+
+    def cut_in_planet_pass(out_path):
+        planet_pass.cut_together_with_pending('pending poly', out_path, cache=cache, snapshot_identity='snapshot')
+    cache.provide(cache_key('pending poly', 'snapshot'), cut_in_planet_pass, str(tmpdir.join('pending.pbf')))
+
+    assert osmium_extract_paths == []
+    assert tmpdir.join('pending.pbf').read_binary() == b'cut in planet pass'
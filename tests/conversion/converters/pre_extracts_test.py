@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_pbf import pre_extracts
+from osmaxx.utils.polyfile_helpers import parse_poly_string
+
+square_polyfile_string = os.linesep.join([
+    'none',
+    '1-outer',
+    '  0.000000E+00 0.000000E+00',
+    '  0.000000E+00 4.000000E+00',
+    '  4.000000E+00 4.000000E+00',
+    '  4.000000E+00 0.000000E+00',
+    '  0.000000E+00 0.000000E+00',
+    'END',
+    'END',
+    '',
+])
+
+
+@pytest.fixture
+def pre_extract_directory(tmpdir, mocker):
+    directory = str(tmpdir.mkdir('pre-extracts'))
+    mocker.patch.dict(CONVERSION_SETTINGS, {'PRE_EXTRACT_DIRECTORY': directory})
+    return directory
+
+
+@pytest.fixture
+def built_square_pre_extract(pre_extract_directory):
+    polyfile_path = os.path.join(pre_extract_directory, 'Square.poly')
+    with open(polyfile_path, 'w') as polyfile:
+        polyfile.write(square_polyfile_string)
+    pre_extract = pre_extracts.PreExtract('Square', source_polyfile_path=polyfile_path)
+    with open(pre_extract.pbf_path, 'wb') as pbf_file:
+        pbf_file.write(b'pbf')
+    pre_extracts.write_index([pre_extract])
+    return pre_extract
+
+
+def test_regions_are_nested_within_their_country():
+    berlin = next(
+        pre_extract for pre_extract in pre_extracts.pre_extract_hierarchy()
+        if pre_extract.relative_name == os.path.join('Germany', 'Berlin')
+    )
+    assert berlin.parent.relative_name == 'Germany'
+    assert berlin.parent.parent is None
+
+
+def test_parents_come_before_their_children():
+    hierarchy = pre_extracts.pre_extract_hierarchy()
+    for index, pre_extract in enumerate(hierarchy):
+        if pre_extract.parent is not None:
+            assert hierarchy.index(pre_extract.parent) < index
+
+
+def test_planet_is_used_when_no_pre_extract_has_been_built(pre_extract_directory, simple_osmosis_line_string):
+    geom = parse_poly_string(simple_osmosis_line_string)
+    assert pre_extracts.smallest_containing_pbf_path(geom) == CONVERSION_SETTINGS['PBF_PLANET_FILE_PATH']
+
+
+def test_containing_pre_extract_is_used(built_square_pre_extract, simple_osmosis_line_string):
+    geom = parse_poly_string(simple_osmosis_line_string)
+    assert pre_extracts.smallest_containing_pbf_path(geom) == built_square_pre_extract.pbf_path
+
+
+def test_outdated_pre_extract_is_not_used(built_square_pre_extract, simple_osmosis_line_string):
+    outdated = os.path.getmtime(built_square_pre_extract.pbf_path) - 2 * CONVERSION_SETTINGS['PRE_EXTRACT_MAX_AGE'].total_seconds()
+    os.utime(built_square_pre_extract.pbf_path, (outdated, outdated))
+    geom = parse_poly_string(simple_osmosis_line_string)
+    assert pre_extracts.smallest_containing_pbf_path(geom) == CONVERSION_SETTINGS['PBF_PLANET_FILE_PATH']
+
+
+def test_pre_extract_not_containing_the_area_is_not_used(built_square_pre_extract):
+    geom = parse_poly_string(square_polyfile_string.replace('4.000000E+00', '5.000000E+00'))
+    assert pre_extracts.smallest_containing_pbf_path(geom) == CONVERSION_SETTINGS['PBF_PLANET_FILE_PATH']
@@ -0,0 +1,92 @@
+import subprocess
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from osmaxx.conversion.converters import progress
+
+
+@pytest.fixture
+def rq_job(mocker):
+    job = mocker.Mock(meta={})
+    mocker.patch.object(progress, 'get_current_job', return_value=job)
+    return job
+
+
+def test_progress_of_command_is_published_into_job_meta(rq_job):
+    progress.check_call_reporting_progress(
+        ['sh', '-c', 'printf "0...10...20...30"; printf "...100 - done.\\n"'],
+        stage='export',
+        parse_output=progress.parse_ogr2ogr_output,
+    )
+    assert rq_job.meta['progress']['stage'] == 'export'
+    assert rq_job.meta['progress']['percent'] == 100
+    assert rq_job.meta['progress']['eta'] is None
+    assert rq_job.save_meta.called
+
+
+def test_failing_command_raises_with_its_output(rq_job):
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        progress.check_call_reporting_progress(['sh', '-c', 'echo broken; exit 3'], stage='import')
+    assert excinfo.value.returncode == 3
+    assert excinfo.value.output == 'broken'
+    assert rq_job.meta['progress']['percent'] == 0
+
+
+def test_output_is_drained_even_if_parsing_it_fails(rq_job):
+    def failing_parse_output(line):
+        raise ValueError('unexpected output')
+
+    conversion = threading.Thread(
+        target=progress.check_call_reporting_progress,
+        # far more output than fits into the pipe, so the command blocks if it isn't read anymore
+        args=(['sh', '-c', 'yes progress | head -n 100000'],),
+        kwargs=dict(stage='import', parse_output=failing_parse_output),
+        daemon=True,
+    )
+    conversion.start()
+    conversion.join(timeout=30)
+    assert not conversion.is_alive()
+    assert rq_job.meta['progress']['percent'] == 100
+
+
+def test_command_is_simply_called_outside_of_rq_jobs(mocker):
+    mocker.patch.object(progress, 'get_current_job', return_value=None)
+    check_call_mock = mocker.patch.object(subprocess, 'check_call')
+    progress.check_call_reporting_progress(['true'], stage='cut')
+    check_call_mock.assert_called_with(['true'])
+
+
+def test_osm2pgsql_counts_are_parsed():
+    line = 'Processing: Node(6420k 642.0k/s) Way(805k 80.50k/s) Relation(2810 281.00/s)'
+    assert progress.parse_osm2pgsql_output(line) == dict(nodes=6420000, ways=805000, relations=2810)
+    assert progress.parse_osm2pgsql_output('Using projection SRS 4326 (Latlong)') is None
+
+
+def test_repeated_reports_of_a_stage_keep_its_start(rq_job, mocker):
+    started_at = timezone.now()
+    now = mocker.patch.object(progress.timezone, 'now', return_value=started_at)
+    progress.report_progress('export', percent=0)
+    now.return_value = started_at + timedelta(minutes=1)
+    progress.report_progress('export', percent=25)
+
+    assert rq_job.meta['progress']['started_at'] == started_at
+    assert rq_job.meta['progress']['eta'] == timedelta(minutes=3)
+
+    progress.report_progress('export/merge')
+    assert rq_job.meta['progress']['started_at'] == started_at + timedelta(minutes=1)
+
+
+def test_heartbeat_keeps_a_stage_without_measurable_progress_advancing(rq_job, mocker):
+    mocker.patch.dict(progress.CONVERSION_SETTINGS, {'PROGRESS_REPORT_INTERVAL': timedelta(milliseconds=10)})
+    progress.report_progress('harmonize')
+    reported_at = rq_job.meta['progress']['changed_at']
+
+    with progress.heartbeat():
+        time.sleep(0.1)
+
+    assert rq_job.meta['progress']['stage'] == 'harmonize'
+    assert rq_job.meta['progress']['changed_at'] > reported_at
@@ -0,0 +1,25 @@
+import os
+import zipfile
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters.converter_gis import static_files
+
+
+def test_static_files_are_zipped_once_into_an_archive_fragment(tmpdir, mocker):
+    mocker.patch.dict(CONVERSION_SETTINGS, {'WORKSPACE_BASE_DIRECTORY': str(tmpdir)})
+    outdated_fragment = tmpdir.join(static_files.FRAGMENT_PREFIX + 'outdated.zip')
+    outdated_fragment.write('')
+    build = mocker.spy(static_files, '_build')
+
+    fragment_path = static_files.static_files_archive_fragment()
+    assert static_files.static_files_archive_fragment() == fragment_path
+
+    assert build.call_count == 1
+    assert os.listdir(str(tmpdir)) == [os.path.basename(fragment_path)]
+    with zipfile.ZipFile(fragment_path) as fragment:
+        assert fragment.testzip() is None
+        names = fragment.namelist()
+    assert names == [arcname for _, arcname in static_files.static_files()]
+    assert 'static/ODB_LICENSE' in names
+    assert 'symbology/QGIS/README.rst' in names
+    assert any(name.startswith('symbology/OSMaxx_point_symbols/') for name in names)
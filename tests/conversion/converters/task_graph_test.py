@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from osmaxx.conversion.converters.converter_gis.bootstrap.task_graph import run_task_graph
+
+
+def test_tasks_run_in_given_order_with_a_single_worker():
+    executed = []
+    run_task_graph(['a', 'b', 'c'], prerequisites={}, run=executed.append, max_workers=1)
+    assert executed == ['a', 'b', 'c']
+
+
+def test_tasks_start_after_their_prerequisites():
+    executed = []
+    run_task_graph(['a', 'b', 'c'], prerequisites={'a': {'c'}}, run=executed.append, max_workers=4)
+    assert executed.index('c') < executed.index('a')
+
+
+def test_independent_tasks_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)  # breaks unless all three tasks run at the same time
+    run_task_graph(['a', 'b', 'c'], prerequisites={}, run=lambda task: barrier.wait(), max_workers=3)
+
+
+def test_failing_task_stops_the_graph():
+    executed = []
+
+    def run(task):
+        if task == 'a':
+            raise RuntimeError('SQL error')
+        executed.append(task)
+
+    with pytest.raises(RuntimeError):
+        run_task_graph(['a', 'b'], prerequisites={'b': {'a'}}, run=run, max_workers=2)
+    assert executed == []
+
+
+def test_failing_task_cancels_the_tasks_not_started_yet():
+    executed = []
+
+    def run(task):
+        if task == 'a':
+            raise RuntimeError('SQL error')
+        executed.append(task)
+
+    with pytest.raises(RuntimeError):
+        run_task_graph(['a', 'b', 'c'], prerequisites={}, run=run, max_workers=1)
+    assert executed == []
+
+
+def test_what_tasks_return_is_passed_on_when_they_are_done():
+    results = {}
+    run_task_graph(
+        ['a', 'b'], prerequisites={}, run=str.upper, max_workers=2, on_done=results.__setitem__,
+    )
+    assert results == {'a': 'A', 'b': 'B'}
+
+
+def test_cyclic_prerequisites_are_rejected():
+    with pytest.raises(ValueError):
+        run_task_graph(['a', 'b'], prerequisites={'a': {'b'}, 'b': {'a'}}, run=lambda task: None, max_workers=2)
+
+
+def test_unknown_prerequisites_are_rejected():
+    with pytest.raises(ValueError):
+        run_task_graph(['a'], prerequisites={'a': {'x'}}, run=lambda task: None, max_workers=2)
@@ -0,0 +1,20 @@
+from osmaxx.conversion.converters.converter_gis.bootstrap.template_database import TemplateDatabase
+
+
+def test_template_is_renamed_when_a_script_changes(tmpdir):
+    script = tmpdir.join('0010_function.sql')
+    script.write('CREATE FUNCTION f() ...;')
+    template_database = TemplateDatabase(extensions=['postgis'], script_paths=[str(script)])
+    name_before = template_database.name
+
+    script.write('CREATE FUNCTION g() ...;')
+
+    assert template_database.name != name_before
+    assert template_database.name.startswith('osmaxx_db_template_')
+
+
+def test_template_is_renamed_when_extensions_change(tmpdir):
+    script = tmpdir.join('0010_function.sql')
+    script.write('CREATE FUNCTION f() ...;')
+    assert TemplateDatabase(extensions=['postgis'], script_paths=[str(script)]).name != \
+        TemplateDatabase(extensions=['postgis', 'hstore'], script_paths=[str(script)]).name
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from osmaxx.conversion.converters.converter_gis.bootstrap import transliteration_cache
+
+
+def test_names_missing_in_the_conversion_database_are_copied_in_batches(mocker):
+    mocker.patch.object(transliteration_cache, 'BATCH_SIZE', 2)
+    cache_postgres = mock.Mock()
+    mocker.patch.object(transliteration_cache, 'get_default_postgres_wrapper', return_value=cache_postgres)
+    cache = transliteration_cache.TransliterationCache()
+    mocker.patch.object(cache, '_ensure')
+    cache_postgres.execute_sql_command.side_effect = [
+        None, [('Zürich', 'Zürich'), ('Москва', 'Moskva')],
+        None, [('東京', 'dōng jīng')],
+    ]
+    postgres = mock.Mock()
+    postgres.stream_sql_command.return_value = iter([[('Москва',), ('Zürich',)], [('東京',)]])
+
+    assert cache.copy_to(postgres) == 3
+
+    cache._ensure.assert_called_once_with()
+    postgres.stream_sql_command.assert_called_once_with(transliteration_cache._missing_names_sql(), batch_size=2)
+    transliterated_names = [call[2]['names'] for call in cache_postgres.execute_sql_command.mock_calls]
+    assert transliterated_names == [['Zürich', 'Москва'], ['Zürich', 'Москва'], ['東京'], ['東京']]
+    assert 'ORDER BY name' in cache_postgres.execute_sql_command.mock_calls[0][1][0]
+    copies = [call[2] for call in postgres.execute_sql_command.mock_calls]
+    assert copies == [
+        dict(originals=['Zürich', 'Москва'], transliterations=['Zürich', 'Moskva']),
+        dict(originals=['東京'], transliterations=['dōng jīng']),
+    ]
+
+
+def test_only_names_not_copied_yet_are_looked_up():
+    missing_names_sql = transliteration_cache._missing_names_sql()
+    assert 'SELECT name FROM osm_point WHERE name IS NOT NULL UNION ' in missing_names_sql
+    assert 'SELECT int_name FROM osm_polygon WHERE int_name IS NOT NULL' in missing_names_sql
+    assert missing_names_sql.endswith(' EXCEPT SELECT original FROM osmaxx_transliteration ORDER BY 1;')
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from osmaxx.conversion._settings import CONVERSION_SETTINGS
+from osmaxx.conversion.converters import workspace as workspace_module
+from osmaxx.conversion.converters.workspace import Workspace
+
+
+@pytest.fixture
+def workspace_base_directory(tmpdir, mocker):
+    directory = str(tmpdir.mkdir('workspaces'))
+    mocker.patch.dict(CONVERSION_SETTINGS, {'WORKSPACE_BASE_DIRECTORY': directory})
+    return directory
+
+
+@pytest.fixture
+def drop_database_mock(mocker):
+    mocker.patch.object(workspace_module, '_workspace_database_names', return_value=[])
+    return mocker.patch.object(workspace_module, '_drop_database')
+
+
+def test_workspaces_are_separate_and_removed_afterwards(workspace_base_directory):
+    with Workspace() as first, Workspace() as second:
+        assert first.directory != second.directory
+        assert os.path.isdir(first.directory)
+        assert first.db_name is None
+    assert os.listdir(workspace_base_directory) == []
+
+
+def test_workspace_is_removed_on_failure(workspace_base_directory):
+    with pytest.raises(RuntimeError):
+        with Workspace():
+            raise RuntimeError('conversion crashed')
+    assert os.listdir(workspace_base_directory) == []
+
+
+def test_workspace_database_is_unique_and_dropped(workspace_base_directory, drop_database_mock):
+    with Workspace(with_database=True) as first, Workspace(with_database=True) as second:
+        assert first.db_name != second.db_name
+        assert first.db_name.startswith(CONVERSION_SETTINGS['GIS_CONVERSION_DB_NAME'])
+    assert sorted(call[0][0] for call in drop_database_mock.call_args_list) == sorted([first.db_name, second.db_name])
+
+
+def test_leftovers_of_dead_processes_are_removed(workspace_base_directory, mocker):
+    mocker.patch.object(workspace_module, '_process_exists', side_effect=lambda pid: pid == os.getpid())
+    stale_directory = os.path.join(workspace_base_directory, 'osmaxx_job_999999_abc123')
+    unrelated_directory = os.path.join(workspace_base_directory, 'something_else')
+    os.makedirs(stale_directory)
+    os.makedirs(unrelated_directory)
+    with Workspace() as workspace:
+        assert sorted(os.listdir(workspace_base_directory)) == sorted(
+            [os.path.basename(workspace.directory), 'something_else']
+        )
@@ -24,7 +24,7 @@ def test_handle_failed_jobs_calls_set_failed_unless_final(mocker, fake_rq_id, fa
     from osmaxx.conversion.models import Job
 
     conversion_job_mock = Mock()
-    mocker.patch.object(Job.objects, 'get', return_value=conversion_job_mock)
+    mocker.patch.object(Job.objects, 'filter', return_value=[conversion_job_mock])
     cmd = result_harvester.Command()
     _set_failed_unless_final = mocker.patch.object(cmd, '_set_failed_unless_final')
     _update_job_mock = mocker.patch.object(cmd, '_notify')
@@ -77,6 +77,53 @@ def test_add_meta_data_to_job_with_out_of_bounds_exception():
         assert conversion_job.estimated_pbf_size is None
 
 
+def test_add_meta_data_to_job_copies_job_statistics(mocker):
+    from osmaxx.conversion.management.commands.result_harvester import add_meta_data_to_job
+    mocker.patch('pbf_file_size_estimation.estimate_size.estimate_size_of_extent', return_value=1000)
+    conversion_job = MagicMock()
+    conversion_job.parametrization.clipping_area.clipping_multi_polygon.extent = 8, 47, 9, 48
+    rq_job = Mock()
+    rq_job.meta = {
+        'unzipped_result_size': 0,
+        'duration': 0,
+        'stage_durations': {'cut': 1.5, 'import': 12.0},
+        'worker_host': 'worker-1',
+        'planet_snapshot': '/var/data/osm-planet/planet-latest.osm.pbf (2019-04-01T00:00:00+00:00)',
+        'tool_versions': {'osm2pgsql': 'osm2pgsql version 0.96.0 (64 bit id space)'},
+    }
+
+    add_meta_data_to_job(conversion_job=conversion_job, rq_job=rq_job)
+
+    assert conversion_job.stage_durations == {'cut': 1.5, 'import': 12.0}
+    assert conversion_job.worker_host == 'worker-1'
+    assert conversion_job.planet_snapshot == rq_job.meta['planet_snapshot']
+    assert conversion_job.tool_versions == {'osm2pgsql': 'osm2pgsql version 0.96.0 (64 bit id space)'}
+
+
+def test_add_meta_data_to_grouped_job_copies_its_own_result_size(mocker):
+    from osmaxx.conversion.management.commands.result_harvester import add_meta_data_to_job, result_zip_file_of
+    mocker.patch('pbf_file_size_estimation.estimate_size.estimate_size_of_extent', return_value=1000)
+    conversion_job = MagicMock(id=2)
+    conversion_job.parametrization.clipping_area.clipping_multi_polygon.extent = 8, 47, 9, 48
+    rq_job = Mock()
+    rq_job.kwargs = {'exports': [
+        {'job_id': 1, 'output_zip_file_path': '/media/job_result_files/1/area_gpkg.zip'},
+        {'job_id': 2, 'output_zip_file_path': '/media/job_result_files/2/area_shapefile.zip'},
+    ]}
+    rq_job.meta = {
+        'unzipped_result_sizes': {
+            '/media/job_result_files/1/area_gpkg.zip': 1000,
+            '/media/job_result_files/2/area_shapefile.zip': 2000,
+        },
+        'duration': 0,
+    }
+
+    add_meta_data_to_job(conversion_job=conversion_job, rq_job=rq_job)
+
+    assert result_zip_file_of(conversion_job, rq_job=rq_job) == '/media/job_result_files/2/area_shapefile.zip'
+    assert conversion_job.unzipped_result_size == 2000
+
+
 def multiple_queue_test_parameters():
     queue_with_all_jobs = Mock()
     queue_with_no_jobs = Mock()
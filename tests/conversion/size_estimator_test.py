@@ -29,6 +29,14 @@ range_for_format_and_level = {
         detail_levels.DETAIL_LEVEL_ALL: {'upper': 48, 'lower': 4},
         detail_levels.DETAIL_LEVEL_REDUCED: {'upper': 16, 'lower': 1.5},
     },
+    output_format.FLATGEOBUF: {
+        detail_levels.DETAIL_LEVEL_ALL: {'upper': 15.5, 'lower': 3},
+        detail_levels.DETAIL_LEVEL_REDUCED: {'upper': 4.5, 'lower': 1.1},
+    },
+    output_format.GEOPARQUET: {
+        detail_levels.DETAIL_LEVEL_ALL: {'upper': 5.4, 'lower': 1},
+        detail_levels.DETAIL_LEVEL_REDUCED: {'upper': 1.6, 'lower': 0.4},
+    },
 }
 
 
@@ -1,7 +1,8 @@
 import pytest
 from rest_framework.reverse import reverse
 
-from osmaxx.conversion import status
+from osmaxx.conversion import output_format, status
+from osmaxx.conversion.converters.converter_gis import detail_levels
 
 authenticated_access_urls = [
     reverse('clipping_area-list'),
@@ -37,6 +38,22 @@ def test_conversion_parametrization_creation_success(authenticated_api_client, c
     assert response.status_code == 201
 
 
+@pytest.mark.django_db()
+def test_conversion_parametrization_creation_of_layers_outside_the_detail_level_fails(
+        authenticated_api_client, persisted_valid_clipping_area):
+    conversion_parametrization_data = {
+        'out_format': output_format.GPKG, 'out_srs': 4326, 'clipping_area': persisted_valid_clipping_area.id,
+        'detail_level': detail_levels.DETAIL_LEVEL_REDUCED, 'layers': ['building_a'],
+    }
+    response = authenticated_api_client.post(reverse('conversion_parametrization-list'), conversion_parametrization_data, format='json')
+    assert response.status_code == 400
+    assert 'layers' in response.json()
+
+    conversion_parametrization_data['layers'] = ['building_a', 'road_l']
+    response = authenticated_api_client.post(reverse('conversion_parametrization-list'), conversion_parametrization_data, format='json')
+    assert response.status_code == 201
+
+
 @pytest.mark.django_db()
 def test_conversion_parametrization_creation_fails(api_client, conversion_parametrization_data):
     response = api_client.post(reverse('conversion_parametrization-list'), conversion_parametrization_data, format='json')
@@ -106,3 +123,48 @@ def test_conversion_job_creation_enqueues(authenticated_api_client, conversion_j
     conversion_start_start_format_extraction_mock = mocker.patch('osmaxx.conversion.converters.converter.rq_enqueue_with_settings', return_value=rq_mock_return())
     authenticated_api_client.post(reverse('conversion_job-list'), conversion_job_data, format='json')
     assert conversion_start_start_format_extraction_mock.call_count == 1
+
+
+@pytest.fixture
+def job_group_data(persisted_valid_clipping_area):
+    from osmaxx.conversion.models import Parametrization
+    parametrizations = [
+        Parametrization.objects.create(
+            out_format=out_format, out_srs=4326, detail_level=60, clipping_area=persisted_valid_clipping_area
+        )
+        for out_format in [output_format.GPKG, output_format.SHAPEFILE]
+    ]
+    return {
+        'jobs': [
+            {'callback_url': 'http://callback.example.com/{}'.format(index), 'parametrization': parametrization.id}
+            for index, parametrization in enumerate(parametrizations)
+        ],
+    }
+
+
+@pytest.mark.django_db()
+def test_job_group_creation_enqueues_a_single_conversion(authenticated_api_client, job_group_data, rq_mock_return,
+                                                         mocker):
+    rq_enqueue_mock = mocker.patch(
+        'osmaxx.conversion.converters.converter.rq_enqueue_with_settings', return_value=rq_mock_return()
+    )
+    response = authenticated_api_client.post(reverse('conversion_job_group-list'), job_group_data, format='json')
+    assert response.status_code == 201
+    assert rq_enqueue_mock.call_count == 1
+    assert [export['conversion_format'] for export in rq_enqueue_mock.call_args[1]['exports']] == [
+        output_format.GPKG, output_format.SHAPEFILE
+    ]
+    from osmaxx.conversion.models import JobGroup
+    group = JobGroup.objects.get(id=response.json()['id'])
+    assert [job.rq_job_id for job in group.jobs.all()] == ['42', '42']
+
+
+@pytest.mark.django_db()
+def test_job_group_creation_fails_for_jobs_of_different_detail_levels(authenticated_api_client, job_group_data,
+                                                                      mocker):
+    start_conversion_mock = mocker.patch('osmaxx.conversion.models.JobGroup.start_conversion')
+    from osmaxx.conversion.models import Parametrization
+    Parametrization.objects.filter(id=job_group_data['jobs'][0]['parametrization']).update(detail_level=120)
+    response = authenticated_api_client.post(reverse('conversion_job_group-list'), job_group_data, format='json')
+    assert response.status_code == 400
+    assert start_conversion_mock.call_count == 0